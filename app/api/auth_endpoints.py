@@ -1,20 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
 
 from app.api.schemas.user_schema import UserLogin
-from app.db.connection import get_db
+from app.db.connection import DbSession
 from app.service.user_service import UserService
 
 router = APIRouter()
 
 
 @router.post("/auth/login")
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: DbSession):
     """
     Endpoint para autenticar un usuario
     """
-    result = UserService.verificar_credenciales(db, user_data)
+    result = await db.run_sync(UserService.verificar_credenciales, user_data)
     
     if result["success"]:
         usuario = result["data"]
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.connection import get_db
-from app.api.schemas.delivery_schemas import DeliveredPiecesCreate, DeliveredPiecesResponse, DeliveredPiecesUpdate
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app.db.connection import DbSession
+from app.db.versions import obtener_version, no_modificado
+from app.utils.respuestas import RespuestaOrjson
+from app.api.schemas.delivery_schemas import DeliveredPiecesCreate, DeliveredPiecesResponse, DeliveredPiecesUpdate, DeliveredPiecesGroupItem
 from app.service.delivery_service import DeliveryService
+from app.service.delivery_import import DeliveryImport
+from app.service.delivery_search import DeliverySearch
+from datetime import date, datetime
+from typing import List, Optional
+import io
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,56 +17,193 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.get("/deliveries")
-async def get_deliveries(db: Session = Depends(get_db)):
-    """Obtener una entrega activa por cada id_group"""
-    deliveries = DeliveryService.get_deliveries_one_per_group(db)
-    return deliveries
+@router.get("/deliveries", response_class=RespuestaOrjson)
+async def get_deliveries(
+    request: Request,
+    db: DbSession,
+    owner: Optional[str] = None,
+    desde: Optional[date] = Query(None, alias="from"),
+    hasta: Optional[date] = Query(None, alias="to"),
+    lot: Optional[str] = None,
+    tipo: Optional[str] = Query(None, alias="type"),
+    color: Optional[str] = None,
+    status: str = "active",
+    sort: str = "fecha-desc",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=DeliveryService.LIMITE_MAXIMO)
+):
+    """
+    Obtener una entrega por cada id_group con los totales del grupo.
+
+    Parámetros:
+    - owner, from / to, lot, type, color, status: Filtros
+    - sort: fecha-desc, fecha-asc, responsable-asc, responsable-desc, lote-asc, total-desc o total-asc
+    - cursor: Valor del encabezado `X-Next-Cursor` de la página anterior
+    - limit: Grupos por página
+
+    Responde 304 si las versiones de las entregas y de sus grupos coinciden
+    con If-None-Match.
+    """
+    etag, encabezados = await db.run_sync(obtener_version, "delivered_pieces", "delivery_groups")
+    if no_modificado(request, etag):
+        return Response(status_code=304, headers=encabezados)
+
+    try:
+        deliveries, siguiente = await db.run_sync(
+            DeliveryService.get_deliveries_one_per_group,
+            owner, desde, hasta, lot, tipo, color, status, sort, cursor, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if siguiente:
+        encabezados["X-Next-Cursor"] = siguiente
+    return RespuestaOrjson(deliveries, headers=encabezados)
 
 
 @router.post("/deliveries", response_model=DeliveredPiecesResponse)
-async def create_delivery(delivery: DeliveredPiecesCreate, db: Session = Depends(get_db)):
+async def create_delivery(delivery: DeliveredPiecesCreate, db: DbSession):
     """Crear una nueva entrega"""
     try:
         logger.info(f"Recibiendo entrega: {delivery}")
-        new_delivery = DeliveryService.create_delivery(db, delivery)
+        new_delivery = await db.run_sync(DeliveryService.create_delivery, delivery)
         return new_delivery
     except Exception as e:
         logger.error(f"Error al crear entrega: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/deliveries/group/{id_group}")
-async def get_deliveries_by_group(id_group: str, db: Session = Depends(get_db)):
+@router.post("/deliveries/import")
+async def import_deliveries(db: DbSession, archivo: UploadFile = File(...), modified_by: str = None):
+    """
+    Importar entregas desde un CSV (UTF-8, separado por comas o punto y coma).
+    Las filas válidas se cargan por lotes; las inválidas se reportan con su
+    número de línea. La lectura y validación del CSV corren en el pool de
+    hilos; en el event loop solo se espera la carga de cada lote.
+    """
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    reporte = DeliveryImport.nuevo_reporte()
+    grupos = set()
+    lotes = DeliveryImport.lotes(texto, modified_by)
+    try:
+        while (lote := await run_in_threadpool(next, lotes, None)) is not None:
+            validas, errores = lote
+            await DeliveryImport.cargar_async(db, validas)
+            DeliveryImport.acumular(reporte, validas, errores)
+            grupos.update(fila['id_group'] for fila in validas)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        lotes.close()
+        texto.detach()
+    await db.run_sync(DeliveryImport.recalcular_grupos, grupos)
+
+    logger.info(f"Importación de entregas: {reporte['importadas']} filas, {reporte['con_errores']} con errores")
+    return reporte
+
+
+@router.get("/deliveries/group/{id_group}", response_class=RespuestaOrjson)
+async def get_deliveries_by_group(id_group: str, db: DbSession):
     """Obtener todas las entregas activas de un grupo"""
-    deliveries = DeliveryService.get_deliveries_by_group(db, id_group)
+    deliveries = await db.run_sync(DeliveryService.get_deliveries_by_group, id_group)
     if not deliveries:
         raise HTTPException(status_code=404, detail="Grupo de entregas no encontrado")
+    return RespuestaOrjson(deliveries)
+
+
+@router.get("/deliveries/search")
+async def search_deliveries(
+    response: Response,
+    db: DbSession,
+    q: str = Query(..., min_length=DeliverySearch.LONGITUD_MINIMA),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=DeliverySearch.LIMITE_MAXIMO)
+):
+    """
+    Buscar entregas activas por responsable, lote, color, tela, rib o anotación.
+
+    Parámetros:
+    - q: Texto a buscar (al menos 3 caracteres; tolera errores de tipeo en PostgreSQL)
+    - cursor: Valor del encabezado `X-Next-Cursor` de la página anterior
+    - limit: Resultados por página
+
+    Los resultados vienen de la más a la menos relevante, con su `puntaje`.
+    """
+    try:
+        deliveries, siguiente = await db.run_sync(DeliverySearch.buscar, q, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
     return deliveries
 
 
+@router.get("/deliveries/changes")
+async def get_delivery_changes(
+    db: DbSession,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=DeliveryService.CAMBIOS_LIMITE_MAXIMO)
+):
+    """
+    Cambios de entregas (altas, ediciones y eliminaciones) desde `since`.
+
+    Parámetros:
+    - since: `watermark` de la sincronización anterior (sin él, todo el historial)
+    - cursor: `next_cursor` de la página anterior
+    - limit: Filas por página
+
+    Se sigue pidiendo con `cursor` mientras haya `next_cursor`; la última página
+    trae el `watermark` para la próxima sincronización.
+    """
+    try:
+        return await db.run_sync(DeliveryService.get_changes, since, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put("/deliveries/group/{id_group}")
+async def reconcile_group(id_group: str, deliveries: List[DeliveredPiecesGroupItem], db: DbSession,
+                          modified_by: str = None):
+    """
+    Guardar un grupo completo en una sola transacción.
+    Recibe la lista deseada de entregas: las que traen id_delivery se actualizan,
+    las que no lo traen se crean y las que faltan se marcan como inactivas.
+    """
+    try:
+        resultado = await db.run_sync(DeliveryService.reconcile_group, id_group, deliveries, modified_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Grupo de entregas no encontrado")
+    return resultado
+
+
 @router.get("/deliveries/{delivery_id}", response_model=DeliveredPiecesResponse)
-async def get_delivery(delivery_id: int, db: Session = Depends(get_db)):
+async def get_delivery(delivery_id: int, db: DbSession):
     """Obtener una entrega por ID"""
-    delivery = DeliveryService.get_delivery_by_id(db, delivery_id)
+    delivery = await db.run_sync(DeliveryService.get_delivery_by_id, delivery_id)
     if not delivery:
         raise HTTPException(status_code=404, detail="Entrega no encontrada")
     return delivery
 
 
 @router.put("/deliveries/{delivery_id}", response_model=DeliveredPiecesResponse)
-async def update_delivery(delivery_id: int, delivery: DeliveredPiecesUpdate, db: Session = Depends(get_db)):
+async def update_delivery(delivery_id: int, delivery: DeliveredPiecesUpdate, db: DbSession):
     """Actualizar una entrega con registro de auditoría"""
-    updated_delivery = DeliveryService.update_delivery(db, delivery_id, delivery)
+    updated_delivery = await db.run_sync(DeliveryService.update_delivery, delivery_id, delivery)
     if not updated_delivery:
         raise HTTPException(status_code=404, detail="Entrega no encontrada")
     return updated_delivery
 
 
 @router.delete("/deliveries/{delivery_id}")
-async def delete_delivery(delivery_id: int, modified_by: str = None, db: Session = Depends(get_db)):
+async def delete_delivery(delivery_id: int, db: DbSession, modified_by: str = None):
     """Marcar una entrega como inactiva en lugar de eliminarla"""
-    success = DeliveryService.delete_delivery(db, delivery_id, modified_by)
+    success = await db.run_sync(DeliveryService.delete_delivery, delivery_id, modified_by)
     if not success:
         raise HTTPException(status_code=404, detail="Entrega no encontrada")
     return {"message": "Entrega marcada como inactiva correctamente", "id_delivery": delivery_id}
\ No newline at end of file
@@ -7,13 +7,13 @@ import json
 
 from app.api.schemas.gastos_schema import GastoSchema
 
-from app.db.connection import get_db
+from app.db.connection import DbSession
 from app.service.assistence_service import (
     marcar_llegada, 
     marcar_salida, 
-    obtener_asistencias_hoy,
-    obtener_trabajadores_activos
+    obtener_asistencias_hoy
 )
+from app.service.cost_engine import CostEngine
 import pytz
 
 templates = Jinja2Templates(directory="app/templates")
@@ -244,90 +244,43 @@ async def descargar_produccion_pdf(request: Request):
 
 @router.post("/calcular-costo-operacion", response_class=HTMLResponse)
 #calculo de costo de operacion
-async def calcular_costo(request: Request):
+async def calcular_costo(request: Request, db: DbSession):
     """
     Calcula el costo de operación consultando ÚNICAMENTE los trabajadores de la base de datos.
     Las cantidades y salarios se calculan automáticamente basados en los trabajadores activos.
     """
-    db = get_db()
-    if db is None:
+    try:
+        snapshot = await db.run_sync(CostEngine.snapshot)
+    except Exception:
         return templates.TemplateResponse("error.html", {
             "request": request,
-            "error": "No se pudo conectar a la base de datos"
+            "error": "Error al obtener trabajadores"
         })
     
-    try:
-        # Obtener trabajadores de la base de datos
-        resultado_trabajadores = obtener_trabajadores_activos(db)
-        
-        if not resultado_trabajadores["success"]:
-            return templates.TemplateResponse("error.html", {
-                "request": request,
-                "error": "Error al obtener trabajadores"
-            })
-        
-        trabajadores = resultado_trabajadores["data"]
-        
-        # Contar trabajadores por cargo
-        operarias = [t for t in trabajadores if t['cargo'].lower() == 'operaria']
-        aprendices = [t for t in trabajadores if t['cargo'].lower() == 'aprendiz']
-        
-        # Obtener cantidades reales de trabajadores
-        cantidad_trabajadoras = len(operarias)
-        cantidad_trabajadoras_prestaciones = 0  # Se asume que todas las operarias tienen prestaciones
-        cantidad_practicantes = len(aprendices)
-        
-        # Calcular salarios promedio por cargo
-        salario_operaria = sum(t['salario'] for t in operarias) / len(operarias) if operarias else 56000
-        salario_operaria_prestaciones = sum(t['salario'] for t in operarias) / len(operarias) if operarias else 56000
-        salario_aprendiz = sum(t['salario'] for t in aprendices) / len(aprendices) if aprendices else 30000
-        
-        # Datos base
-        arriendo_diario = arriendo / 30
-        
-        # Cálculos
-        costo_trabajadoras = cantidad_trabajadoras * salario_operaria
-        costo_trabajadoras_prestaciones = cantidad_trabajadoras_prestaciones * salario_operaria_prestaciones
-        costo_practicantes = cantidad_practicantes * salario_aprendiz
-        gastos_fijos_total = sum(gastos_fijos.values())
-        
-        costo_operacion = (costo_trabajadoras + 
-                          costo_trabajadoras_prestaciones +
-                          costo_practicantes + 
-                          gastos_fijos_total + 
-                          arriendo_diario)
-        
-        # Datos para el template
-        datos = {
-            'cantidad_trabajadoras': cantidad_trabajadoras,
-            'cantidad_trabajadoras_prestaciones': cantidad_trabajadoras_prestaciones,
-            'cantidad_practicantes': cantidad_practicantes,
-            'operarias': operarias,
-            'aprendices': aprendices,
-            'costo_trabajadoras': costo_trabajadoras,
-            'costo_trabajadoras_prestaciones': costo_trabajadoras_prestaciones,
-            'costo_practicantes': costo_practicantes,
-            'arriendo_diario': int(arriendo_diario),
-            'gastos_fijos': gastos_fijos,
-            'gastos_fijos_total': gastos_fijos_total,
-            'costo_operacion': int(costo_operacion)
-        }
-        
-        # Obtener fecha y hora de Bogotá
-        fecha_hora_bogota = obtener_fecha_hora_bogota()
-        
-        return templates.TemplateResponse("resultado_costo_operacion.html", {
-            "request": request, 
-            "datos": datos,
-            "fecha_hora_bogota": fecha_hora_bogota
-        })
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    # Cantidades reales por cargo y salarios promedio de la base de datos
+    costos = CostEngine.costo_nomina_actual(snapshot)
+    
+    # Datos para el template
+    datos = {
+        **costos,
+        'arriendo_diario': int(costos['arriendo_diario']),
+        'gastos_fijos': gastos_fijos,
+        'costo_operacion': int(costos['costo_operacion'])
+    }
+    
+    # Obtener fecha y hora de Bogotá
+    fecha_hora_bogota = obtener_fecha_hora_bogota()
+    
+    return templates.TemplateResponse("resultado_costo_operacion.html", {
+        "request": request, 
+        "datos": datos,
+        "fecha_hora_bogota": fecha_hora_bogota
+    })
 
 @router.post("/calcular-equilibrio", response_class=HTMLResponse)
 async def calcular_punto_equilibrio(
     request: Request,
+    db: DbSession,
     precio_unidad: float = Form(...),
     unidades_fabricadas: int = Form(0)
 ):
@@ -335,155 +288,78 @@ async def calcular_punto_equilibrio(
     Calcula el punto de equilibrio consultando ÚNICAMENTE los salarios de la base de datos.
     Las cantidades se reciben del formulario pero los salarios vienen SIEMPRE de la DB.
     """
-    db = get_db()
-    if db is None:
+    try:
+        snapshot = await db.run_sync(CostEngine.snapshot)
+    except Exception:
         return templates.TemplateResponse("error.html", {
             "request": request,
-            "error": "No se pudo conectar a la base de datos"
+            "error": "Error al obtener trabajadores"
         })
     
-    try:
-        # Obtener trabajadores de la base de datos
-        resultado_trabajadores = obtener_trabajadores_activos(db)
-        
-        if not resultado_trabajadores["success"]:
-            return templates.TemplateResponse("error.html", {
-                "request": request,
-                "error": "Error al obtener trabajadores"
-            })
-        
-        trabajadores = resultado_trabajadores["data"]
-        
-        # Contar trabajadores por cargo
-        operarias = [t for t in trabajadores if t['cargo'].lower() == 'operaria']
-        aprendices = [t for t in trabajadores if t['cargo'].lower() == 'aprendiz']
-        
-        # Obtener cantidades reales de trabajadores
-        cantidad_trabajadoras = len(operarias)
-        cantidad_trabajadoras_prestaciones = 0  # Se asume que todas las operarias tienen prestaciones
-        cantidad_practicantes = len(aprendices)
-        
-        # Calcular salarios promedio por cargo
-        salario_operaria = sum(t['salario'] for t in operarias) / len(operarias) if operarias else 56000
-        salario_operaria_prestaciones = sum(t['salario'] for t in operarias) / len(operarias) if operarias else 56000
-        salario_aprendiz = sum(t['salario'] for t in aprendices) / len(aprendices) if aprendices else 30000
-        
-        # Datos base
-        arriendo_diario = arriendo / 30
-
-        # Cálculo del costo fijo total
-        costo_trabajadoras = cantidad_trabajadoras * salario_operaria
-        costo_trabajadoras_prestaciones = cantidad_trabajadoras_prestaciones * salario_operaria_prestaciones
-        costo_practicantes = cantidad_practicantes * salario_aprendiz
-        gastos_fijos_total = sum(gastos_fijos.values())
-        
-        costo_fijo_total = (costo_trabajadoras + 
-                           costo_trabajadoras_prestaciones +
-                           costo_practicantes + 
-                           gastos_fijos_total + 
-                           arriendo_diario)
+    # Costo fijo total con la nómina actual
+    costos = CostEngine.costo_nomina_actual(snapshot)
+    costo_fijo_total = costos.pop('costo_operacion')
 
-        
-        if precio_unidad <= 0:
-            punto_equilibrio = float('inf')  # No es posible alcanzar equilibrio
-        else:
-            punto_equilibrio = costo_fijo_total / precio_unidad
+    
+    if precio_unidad <= 0:
+        punto_equilibrio = float('inf')  # No es posible alcanzar equilibrio
+    else:
+        punto_equilibrio = costo_fijo_total / precio_unidad
 
-        ingresos_equilibrio = punto_equilibrio * precio_unidad
+    ingresos_equilibrio = punto_equilibrio * precio_unidad
 
-        # Cálculo de ganancia real del día (si se ingresaron unidades fabricadas)
-        ganancia_real = None
-        ingresos_reales = None
-        utilidad_neta = None
-        
-        if unidades_fabricadas > 0:
-            ingresos_reales = unidades_fabricadas * precio_unidad
-            utilidad_neta = ingresos_reales - costo_fijo_total
-            ganancia_real = utilidad_neta
+    # Cálculo de ganancia real del día (si se ingresaron unidades fabricadas)
+    ganancia_real = None
+    ingresos_reales = None
+    utilidad_neta = None
+    
+    if unidades_fabricadas > 0:
+        ingresos_reales = unidades_fabricadas * precio_unidad
+        utilidad_neta = ingresos_reales - costo_fijo_total
+        ganancia_real = utilidad_neta
 
-        # Datos para el template
-        datos = {
-            'cantidad_trabajadoras': cantidad_trabajadoras,
-            'cantidad_trabajadoras_prestaciones': cantidad_trabajadoras_prestaciones,
-            'cantidad_practicantes': cantidad_practicantes,
-            'operarias': operarias,
-            'aprendices': aprendices,
-            'costo_trabajadoras': costo_trabajadoras,
-            'costo_trabajadoras_prestaciones': costo_trabajadoras_prestaciones,
-            'costo_practicantes': costo_practicantes,
-            'arriendo_diario': int(arriendo_diario),
-            'gastos_fijos_total': gastos_fijos_total,
-            'costo_fijo_total': int(costo_fijo_total),
-            'precio_unidad': precio_unidad,
-            'punto_equilibrio': punto_equilibrio,
-            'ingresos_equilibrio': int(ingresos_equilibrio) if punto_equilibrio != float('inf') else 0,
-            'unidades_fabricadas': unidades_fabricadas,
-            'ganancia_real': ganancia_real,
-            'ingresos_reales': ingresos_reales,
-            'utilidad_neta': utilidad_neta
-        }
-        
-        # Obtener fecha y hora de Bogotá
-        fecha_hora_bogota = obtener_fecha_hora_bogota()
-        
-        return templates.TemplateResponse("resultado_equilibrio.html", {
-            "request": request, 
-            "datos": datos,
-            "fecha_hora_bogota": fecha_hora_bogota
-        })
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    # Datos para el template
+    datos = {
+        **costos,
+        'arriendo_diario': int(costos['arriendo_diario']),
+        'costo_fijo_total': int(costo_fijo_total),
+        'precio_unidad': precio_unidad,
+        'punto_equilibrio': punto_equilibrio,
+        'ingresos_equilibrio': int(ingresos_equilibrio) if punto_equilibrio != float('inf') else 0,
+        'unidades_fabricadas': unidades_fabricadas,
+        'ganancia_real': ganancia_real,
+        'ingresos_reales': ingresos_reales,
+        'utilidad_neta': utilidad_neta
+    }
+    
+    # Obtener fecha y hora de Bogotá
+    fecha_hora_bogota = obtener_fecha_hora_bogota()
+    
+    return templates.TemplateResponse("resultado_equilibrio.html", {
+        "request": request, 
+        "datos": datos,
+        "fecha_hora_bogota": fecha_hora_bogota
+    })
 
 @router.get("/cost_operation")
-async def get_cost_operation(cantidad_trabajadoras: int, cantidad_trabajadoras_prestaciones: int, cantidad_practicantes: int):
+async def get_cost_operation(cantidad_trabajadoras: int, cantidad_trabajadoras_prestaciones: int, cantidad_practicantes: int, db: DbSession):
     """
     Obtiene el costo de operación consultando ÚNICAMENTE los salarios de la base de datos.
     Los salarios SIEMPRE vienen de la DB, nunca del formulario.
     """
-    db = get_db()
-    if db is None:
+    try:
+        snapshot = await db.run_sync(CostEngine.snapshot)
+    except Exception:
         return JSONResponse(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            content={"error": "No se pudo conectar a la base de datos"}
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Error al obtener trabajadores"}
         )
     
-    try:
-        # Obtener trabajadores de la base de datos
-        resultado_trabajadores = obtener_trabajadores_activos(db)
-        
-        if not resultado_trabajadores["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"error": "Error al obtener trabajadores"}
-            )
-        
-        trabajadores = resultado_trabajadores["data"]
-        
-        # Obtener salarios ÚNICAMENTE de la base de datos
-        # Calcular promedio de salarios por cargo
-        operarias = [t for t in trabajadores if t['cargo'].lower() == 'operaria']
-        aprendices = [t for t in trabajadores if t['cargo'].lower() == 'aprendiz']
-        
-        # Calcular promedio de salarios por cargo
-        salario_operaria = sum(t['salario'] for t in operarias) / len(operarias) if operarias else 56000
-        salario_operaria_prestaciones = sum(t['salario'] for t in operarias) / len(operarias) if operarias else 56000
-        salario_aprendiz = sum(t['salario'] for t in aprendices) / len(aprendices) if aprendices else 30000
-        
-        arriendo_x_dia = arriendo / 30
-
-        costo_operacion = (cantidad_trabajadoras * salario_operaria + 
-                          cantidad_trabajadoras_prestaciones * salario_operaria_prestaciones +
-                          cantidad_practicantes * salario_aprendiz + 
-                          gastos_fijos['hilos'] + 
-                          gastos_fijos['luz'] + 
-                          gastos_fijos['maquinas'] + 
-                          arriendo_x_dia)
-        
-        return JSONResponse(content={"costo_operacion": costo_operacion})
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    costo_operacion = CostEngine.costo_operacion(
+        snapshot, cantidad_trabajadoras, cantidad_trabajadoras_prestaciones, cantidad_practicantes
+    )['costo_operacion']
+    
+    return JSONResponse(content={"costo_operacion": costo_operacion})
 
 @router.get("/breakeven_point")
 def get_breakeven_point(precio_producto: float, costo_variable_unitario: float, costo_fijo_total: float):
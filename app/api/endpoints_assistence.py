@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Request, Form, HTTPException, status
+from fastapi import APIRouter, Request, Form, HTTPException, Query, status
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
-from datetime import datetime
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+import asyncio
+import csv
+import io
+from datetime import datetime, date
+from typing import List, Optional
 import pytz
 
 from app.api.schemas.gastos_schema import GastoSchema
-from app.api.schemas.assistence_schema import AsistenciaCreate, AsistenciaSalida, AsistenciaCodigoBarras
-from app.db.connection import get_db
+from app.api.schemas.assistence_schema import AsistenciaCreate, AsistenciaSalida, AsistenciaCodigoBarras, MarcacionEvento
+from app.db.connection import DbSession, AsyncSessionLocal
+from app.db.versions import obtener_version, no_modificado
+from app.service.attendance_feed import AttendanceFeed
+from app.service.attendance_rollup import AttendanceRollup
 from app.service.assistence_service import (
     marcar_llegada, 
     marcar_llegada_por_reference_id,
+    marcar_llegadas_lote,
     marcar_salida, 
     obtener_asistencias_hoy,
+    obtener_historial_asistencias,
+    obtener_resumen_asistencias,
+    consulta_exportacion_asistencias,
+    HISTORIAL_LIMITE_MAXIMO,
     obtener_trabajadores_activos
 )
 
@@ -43,60 +55,38 @@ async def mostrar_marcar_asistencia(request: Request):
 
 
 @router.get("/marcar-salida", response_class=HTMLResponse)
-async def mostrar_marcar_salida(request: Request):
+async def mostrar_marcar_salida(request: Request, db: DbSession):
     """Muestra la página para marcar salida"""
-    db = get_db()
-    if db is None:
-        return templates.TemplateResponse("error.html", {
-            "request": request,
-            "error": "No se pudo conectar a la base de datos"
-        })
+    resultado = await db.run_sync(obtener_asistencias_hoy)
+    asistencias = resultado["data"] if resultado["success"] else []
     
-    try:
-        resultado = obtener_asistencias_hoy(db)
-        asistencias = resultado["data"] if resultado["success"] else []
-        
-        # Filtrar solo asistencias sin salida registrada
-        asistencias_sin_salida = [
-            a for a in asistencias if a["departure_time"] is None
-        ]
-        
-        fecha_hora_bogota = obtener_fecha_hora_bogota()
-        
-        return templates.TemplateResponse("marcar_salida.html", {
-            "request": request,
-            "asistencias": asistencias_sin_salida,
-            "fecha_hora_bogota": fecha_hora_bogota
-        })
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    # Filtrar solo asistencias sin salida registrada
+    asistencias_sin_salida = [
+        a for a in asistencias if a["departure_time"] is None
+    ]
+    
+    fecha_hora_bogota = obtener_fecha_hora_bogota()
+    
+    return templates.TemplateResponse("marcar_salida.html", {
+        "request": request,
+        "asistencias": asistencias_sin_salida,
+        "fecha_hora_bogota": fecha_hora_bogota
+    })
 
 
 @router.get("/resumen-asistencia", response_class=HTMLResponse)
-async def mostrar_resumen_asistencia(request: Request):
+async def mostrar_resumen_asistencia(request: Request, db: DbSession):
     """Muestra el resumen de asistencias del día"""
-    db = get_db()
-    if db is None:
-        return templates.TemplateResponse("error.html", {
-            "request": request,
-            "error": "No se pudo conectar a la base de datos"
-        })
+    resultado = await db.run_sync(obtener_asistencias_hoy)
+    asistencias = resultado["data"] if resultado["success"] else []
     
-    try:
-        resultado = obtener_asistencias_hoy(db)
-        asistencias = resultado["data"] if resultado["success"] else []
-        
-        fecha_hora_bogota = obtener_fecha_hora_bogota()
-        
-        return templates.TemplateResponse("resumen_asistencia.html", {
-            "request": request,
-            "asistencias": asistencias,
-            "fecha_hora_bogota": fecha_hora_bogota
-        })
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    fecha_hora_bogota = obtener_fecha_hora_bogota()
+    
+    return templates.TemplateResponse("resumen_asistencia.html", {
+        "request": request,
+        "asistencias": asistencias,
+        "fecha_hora_bogota": fecha_hora_bogota
+    })
 
 
 # =====================
@@ -105,135 +95,299 @@ async def mostrar_resumen_asistencia(request: Request):
 
 
 @router.post("/api/marcar-llegada", response_class=JSONResponse)
-async def api_marcar_llegada(asistencia: AsistenciaCreate):
+async def api_marcar_llegada(asistencia: AsistenciaCreate, db: DbSession):
     """
     Marca la llegada de un trabajador.
     
     Parámetros:
     - worker_id: ID del trabajador
     """
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(marcar_llegada, asistencia.worker_id)
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
         return JSONResponse(
-            status_code=500,
-            content={"error": "No se pudo conectar a la base de datos"}
+            status_code=400,
+            content={"error": resultado["error"]}
         )
-    
-    try:
-        resultado = marcar_llegada(db, asistencia.worker_id)
-        if resultado["success"]:
-            return JSONResponse(status_code=200, content=resultado)
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": resultado["error"]}
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
 
 
 @router.post("/api/marcar-llegada-codigo", response_class=JSONResponse)
-async def api_marcar_llegada_codigo(asistencia: AsistenciaCodigoBarras):
+async def api_marcar_llegada_codigo(asistencia: AsistenciaCodigoBarras, db: DbSession):
     """
     Marca la llegada de un trabajador usando el reference_id (código de barras).
     
     Parámetros:
     - reference_id: Reference ID del trabajador (código de barras)
     """
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(marcar_llegada_por_reference_id, asistencia.reference_id)
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
         return JSONResponse(
-            status_code=500,
-            content={"error": "No se pudo conectar a la base de datos"}
+            status_code=400,
+            content={"error": resultado["error"]}
         )
+
+
+@router.post("/api/marcaciones/batch", response_class=JSONResponse)
+async def api_marcar_llegadas_lote(eventos: List[MarcacionEvento], db: DbSession):
+    """
+    Registra en una sola transacción los escaneos acumulados por un kiosco.
     
-    try:
-        resultado = marcar_llegada_por_reference_id(db, asistencia.reference_id)
-        if resultado["success"]:
-            return JSONResponse(status_code=200, content=resultado)
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": resultado["error"]}
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    Cuerpo: lista de eventos con
+    - reference_id: Reference ID del trabajador (código de barras)
+    - client_timestamp: Hora del escaneo en el kiosco
+    - client_event_id: Identificador único del escaneo (reintentos seguros)
+    
+    Retorna el resultado de cada evento en el mismo orden del envío.
+    """
+    resultado = await db.run_sync(
+        marcar_llegadas_lote,
+        [evento.model_dump() for evento in eventos]
+    )
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={"error": resultado["error"]}
+        )
 
 
 @router.post("/api/marcar-salida", response_class=JSONResponse)
-async def api_marcar_salida(asistencia: AsistenciaSalida):
+async def api_marcar_salida(asistencia: AsistenciaSalida, db: DbSession):
     """
     Marca la salida de un trabajador.
     
     Parámetros:
     - assistence_id: ID del registro de asistencia
     """
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(marcar_salida, asistencia.id_assistence)
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
         return JSONResponse(
-            status_code=500,
-            content={"error": "No se pudo conectar a la base de datos"}
+            status_code=400,
+            content={"error": resultado["error"]}
         )
-    
-    try:
-        resultado = marcar_salida(db, asistencia.id_assistence)
-        if resultado["success"]:
-            return JSONResponse(status_code=200, content=resultado)
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": resultado["error"]}
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
 
 
 @router.get("/api/asistencias-hoy", response_class=JSONResponse)
-async def api_obtener_asistencias_hoy():
+async def api_obtener_asistencias_hoy(db: DbSession):
     """Obtiene todas las asistencias del día actual"""
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(obtener_asistencias_hoy)
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
         return JSONResponse(
-            status_code=500,
-            content={"error": "No se pudo conectar a la base de datos"}
+            status_code=400,
+            content={"error": resultado["error"]}
         )
+
+
+def _rango_por_defecto(desde: Optional[date], hasta: Optional[date]):
+    """Rango de consulta: por defecto, del primer día del mes a hoy"""
+    hasta = hasta or datetime.now(pytz.timezone('America/Bogota')).date()
+    desde = desde or hasta.replace(day=1)
+    return desde, hasta
+
+
+@router.get("/api/asistencias", response_class=JSONResponse)
+async def api_obtener_historial_asistencias(
+    db: DbSession,
+    desde: Optional[date] = Query(None, alias="from"),
+    hasta: Optional[date] = Query(None, alias="to"),
+    worker_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=HISTORIAL_LIMITE_MAXIMO),
+    resumen: bool = False
+):
+    """
+    Historial de asistencias en un rango de fechas.
     
-    try:
-        resultado = obtener_asistencias_hoy(db)
-        if resultado["success"]:
-            return JSONResponse(status_code=200, content=resultado)
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": resultado["error"]}
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+    Parámetros:
+    - from / to: Rango de fechas (por defecto, del primer día del mes a hoy)
+    - worker_id: Filtrar por trabajador
+    - cursor: `next_cursor` de la respuesta anterior
+    - limit: Filas por página
+    - resumen: Si es true, retorna totales por trabajador (horas y días presentes)
+    """
+    desde, hasta = _rango_por_defecto(desde, hasta)
+    
+    if resumen:
+        resultado = await db.run_sync(obtener_resumen_asistencias, desde, hasta, worker_id)
+    else:
+        resultado = await db.run_sync(
+            obtener_historial_asistencias, desde, hasta, worker_id, cursor, limit
+        )
+    
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={"error": resultado["error"]}
+        )
 
 
-@router.get("/api/trabajadores", response_class=JSONResponse)
-async def api_obtener_trabajadores():
-    """Obtiene la lista de trabajadores activos"""
-    db = get_db()
-    if db is None:
+ENCABEZADO_CSV = ["Fecha", "Trabajador", "ID trabajador", "Llegada", "Salida", "Horas trabajadas"]
+
+
+async def _stream_csv_asistencias(desde: date, hasta: date, worker_id: Optional[int]):
+    """
+    Genera el CSV por bloques desde un cursor del servidor: en memoria solo
+    hay un bloque de filas a la vez y el event loop queda libre entre bloques.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    
+    # BOM para que Excel reconozca UTF-8 (tildes y eñes)
+    buffer.write("\ufeff")
+    escritor.writerow(ENCABEZADO_CSV)
+    
+    async with AsyncSessionLocal() as db:
+        resultado = await db.stream(consulta_exportacion_asistencias(desde, hasta, worker_id))
+        async for filas in resultado.partitions():
+            for fila in filas:
+                escritor.writerow([
+                    fila.attendance_date.isoformat(),
+                    fila.worker,
+                    fila.worker_id if fila.worker_id is not None else "",
+                    fila.arrival_time.strftime("%H:%M:%S"),
+                    fila.departure_time.strftime("%H:%M:%S") if fila.departure_time else "",
+                    fila.horas_trabajadas if fila.horas_trabajadas is not None else ""
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/api/asistencias/export.csv")
+async def api_exportar_asistencias_csv(
+    desde: Optional[date] = Query(None, alias="from"),
+    hasta: Optional[date] = Query(None, alias="to"),
+    worker_id: Optional[int] = None
+):
+    """
+    Exporta a CSV las asistencias de un rango de fechas (para nómina).
+    
+    Parámetros:
+    - from / to: Rango de fechas (por defecto, del primer día del mes a hoy)
+    - worker_id: Filtrar por trabajador
+    """
+    desde, hasta = _rango_por_defecto(desde, hasta)
+    if desde > hasta:
         return JSONResponse(
-            status_code=500,
-            content={"error": "No se pudo conectar a la base de datos"}
+            status_code=400,
+            content={"error": "La fecha inicial no puede ser posterior a la final"}
         )
     
+    nombre = f"asistencias_{desde.isoformat()}_{hasta.isoformat()}.csv"
+    return StreamingResponse(
+        _stream_csv_asistencias(desde, hasta, worker_id),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
+
+
+@router.get("/api/asistencias/mensual", response_class=JSONResponse)
+async def api_obtener_resumen_mensual(
+    db: DbSession,
+    periodo: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    worker_id: Optional[int] = None
+):
+    """
+    Horas, días trabajados y llegadas tarde por trabajador en un mes.
+    Lee el resumen mensual precalculado (jornadas con salida registrada).
+    
+    Parámetros:
+    - periodo: Mes en formato YYYY-MM (por defecto, el mes actual)
+    - worker_id: Filtrar por trabajador
+    """
+    if periodo:
+        try:
+            mes = datetime.strptime(periodo, "%Y-%m").date()
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "Periodo inválido"})
+    else:
+        mes = datetime.now(pytz.timezone('America/Bogota')).date()
+    
+    resultado = await db.run_sync(AttendanceRollup.obtener_periodo, mes, worker_id)
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado)
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={"error": resultado["error"]}
+        )
+
+
+@router.get("/api/trabajadores", response_class=JSONResponse)
+async def api_obtener_trabajadores(request: Request, db: DbSession):
+    """Obtiene la lista de trabajadores activos (304 si no cambió desde If-None-Match)"""
+    etag, encabezados = await db.run_sync(obtener_version, "workers")
+    if no_modificado(request, etag):
+        return Response(status_code=304, headers=encabezados)
+    
+    resultado = await db.run_sync(obtener_trabajadores_activos)
+    if resultado["success"]:
+        return JSONResponse(status_code=200, content=resultado, headers=encabezados)
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={"error": resultado["error"]}
+        )
+
+
+# Intervalo de comentarios keep-alive para que proxies no cierren el stream
+SSE_KEEPALIVE_SEGUNDOS = 15
+
+
+async def _stream_asistencias():
+    """
+    Instantánea del día seguida de las llegadas/salidas confirmadas.
+    La suscripción se registra antes de la instantánea para no perder
+    marcaciones intermedias (el cliente aplica los eventos por id).
+    La sesión de la instantánea se cierra antes de empezar a esperar eventos.
+    """
+    cola = AttendanceFeed.suscribir()
     try:
-        resultado = obtener_trabajadores_activos(db)
-        if resultado["success"]:
-            return JSONResponse(status_code=200, content=resultado)
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": resultado["error"]}
-            )
+        async with AsyncSessionLocal() as db:
+            resultado = await db.run_sync(obtener_asistencias_hoy)
+        yield AttendanceFeed.formatear("snapshot", resultado)
+
+        while True:
+            try:
+                mensaje = await asyncio.wait_for(cola.get(), timeout=SSE_KEEPALIVE_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if mensaje is None:
+                # Suscriptor rezagado: el navegador reconecta y recibe otra instantánea
+                break
+            yield mensaje
     finally:
-        from app.db.connection import close_connection
-        close_connection(db)
+        AttendanceFeed.desuscribir(cola)
+
+
+@router.get("/api/asistencias-hoy/stream")
+async def api_stream_asistencias_hoy():
+    """
+    Feed en vivo de asistencias (Server-Sent Events).
+    
+    Eventos:
+    - snapshot: asistencias del día al conectar (mismo formato que /api/asistencias-hoy)
+    - llegada / salida: una asistencia creada o cerrada
+    """
+    return StreamingResponse(
+        _stream_asistencias(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
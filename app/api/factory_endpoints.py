@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.connection import get_db
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.db.connection import DbSession
+from app.db.versions import obtener_version, no_modificado
 from app.api.schemas.factory_schema import FactoryCreate, FactoryUpdate, FactoryResponse
 from app.service.factory_service import FactoryService
 
@@ -9,30 +9,34 @@ router = APIRouter(tags=["Factories"])
 
 
 @router.get("/factories", response_model=list[FactoryResponse])
-async def get_factories(db: Session = Depends(get_db)):
-    """Obtener todos los talleres"""
+async def get_factories(request: Request, response: Response, db: DbSession):
+    """Obtener todos los talleres (304 si no cambiaron desde If-None-Match)"""
     try:
-        factories = FactoryService.get_all_deliveries(db)
+        etag, encabezados = await db.run_sync(obtener_version, "factories")
+        if no_modificado(request, etag):
+            return Response(status_code=304, headers=encabezados)
+        factories = await db.run_sync(FactoryService.get_all_deliveries)
+        response.headers.update(encabezados)
         return factories
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/factory", response_model=FactoryResponse)
-async def create_factory(factory: FactoryCreate, db: Session = Depends(get_db)):
+async def create_factory(factory: FactoryCreate, db: DbSession):
     """Crear un nuevo taller"""
     try:
-        new_factory = FactoryService.create_delivery(db, factory)
+        new_factory = await db.run_sync(FactoryService.create_delivery, factory)
         return new_factory
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/factories/{factory_id}", response_model=FactoryResponse)
-async def get_factory(factory_id: int, db: Session = Depends(get_db)):
+async def get_factory(factory_id: int, db: DbSession):
     """Obtener un taller por ID"""
     try:
-        factory = FactoryService.get_delivery_by_id(db, factory_id)
+        factory = await db.run_sync(FactoryService.get_delivery_by_id, factory_id)
         if not factory:
             raise HTTPException(status_code=404, detail="Taller no encontrado")
         return factory
@@ -43,10 +47,10 @@ async def get_factory(factory_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/factories/{factory_id}", response_model=FactoryResponse)
-async def update_factory(factory_id: int, factory: FactoryUpdate, db: Session = Depends(get_db)):
+async def update_factory(factory_id: int, factory: FactoryUpdate, db: DbSession):
     """Actualizar un taller"""
     try:
-        updated_factory = FactoryService.update_delivery(db, factory_id, factory)
+        updated_factory = await db.run_sync(FactoryService.update_delivery, factory_id, factory)
         if not updated_factory:
             raise HTTPException(status_code=404, detail="Taller no encontrado")
         return updated_factory
@@ -57,10 +61,10 @@ async def update_factory(factory_id: int, factory: FactoryUpdate, db: Session =
 
 
 @router.delete("/factories/{factory_id}")
-async def delete_factory(factory_id: int, db: Session = Depends(get_db)):
+async def delete_factory(factory_id: int, db: DbSession):
     """Eliminar un taller"""
     try:
-        success = FactoryService.delete_delivery(db, factory_id)
+        success = await db.run_sync(FactoryService.delete_delivery, factory_id)
         if not success:
             raise HTTPException(status_code=404, detail="Taller no encontrado")
         return {"message": "Taller eliminado correctamente", "id_factory": factory_id}
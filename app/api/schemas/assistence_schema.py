@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
@@ -17,6 +17,13 @@ class AsistenciaCodigoBarras(BaseModel):
     reference_id: str
 
 
+class MarcacionEvento(BaseModel):
+    """Escaneo registrado por el kiosco, posiblemente sin conexión"""
+    reference_id: str
+    client_timestamp: datetime
+    client_event_id: str = Field(..., min_length=1, max_length=64)
+
+
 class AsistenciaSalida(BaseModel):
     id_assistence: int
 
@@ -68,6 +68,11 @@ class DeliveredPiecesUpdate(BaseModel):
     modified_by: Optional[str] = None
 
 
+class DeliveredPiecesGroupItem(DeliveredPiecesUpdate):
+    """Fila deseada de un grupo; sin id_delivery se crea una entrega nueva"""
+    id_delivery: Optional[int] = None
+
+
 class DeliveredPiecesResponse(DeliveredPiecesBase):
     id_delivery: int
     modification_date: Optional[datetime] = None
@@ -1,6 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.connection import get_db
+from fastapi import APIRouter, HTTPException
+from app.db.connection import DbSession
 from app.api.schemas.user_schema import UserCreate, UserUpdate, UserResponse, UserLogin, FactoryLogin
 from app.service.user_service import UserService
 import logging
@@ -11,34 +10,34 @@ router = APIRouter()
 
 
 @router.get("/users", response_model=list[UserResponse])
-async def get_all_users(db: Session = Depends(get_db)):
+async def get_all_users(db: DbSession):
     """Obtener todos los usuarios"""
-    users = UserService.obtener_todos_usuarios(db)
+    users = await db.run_sync(UserService.obtener_todos_usuarios)
     return users
 
 
 @router.get("/users/active", response_model=list[UserResponse])
-async def get_active_users(db: Session = Depends(get_db)):
+async def get_active_users(db: DbSession):
     """Obtener todos los usuarios activos"""
-    users = UserService.obtener_usuarios_activos(db)
+    users = await db.run_sync(UserService.obtener_usuarios_activos)
     return users
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: DbSession):
     """Obtener un usuario por ID"""
-    user = UserService.obtener_usuario(db, user_id)
+    user = await db.run_sync(UserService.obtener_usuario, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
 
 
 @router.post("/users", response_model=UserResponse)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: DbSession):
     """Crear un nuevo usuario"""
     try:
         logger.info(f"Creando usuario: {user.username}")
-        result = UserService.crear_usuario(db, user)
+        result = await db.run_sync(UserService.crear_usuario, user)
         
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["error"])
@@ -50,11 +49,11 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user: UserUpdate, db: DbSession):
     """Actualizar un usuario existente"""
     try:
         logger.info(f"Actualizando usuario con ID: {user_id}")
-        result = UserService.actualizar_usuario(db, user_id, user)
+        result = await db.run_sync(UserService.actualizar_usuario, user_id, user)
         
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["error"])
@@ -66,11 +65,11 @@ async def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: DbSession):
     """Eliminar un usuario (marcarlo como inactivo)"""
     try:
         logger.info(f"Eliminando usuario con ID: {user_id}")
-        result = UserService.eliminar_usuario(db, user_id)
+        result = await db.run_sync(UserService.eliminar_usuario, user_id)
         
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["error"])
@@ -82,11 +81,11 @@ async def delete_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/users/login")
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: DbSession):
     """Verificar credenciales de usuario (login)"""
     try:
         logger.info(f"Intento de login para usuario: {credentials.username}")
-        result = UserService.verificar_credenciales(db, credentials)
+        result = await db.run_sync(UserService.verificar_credenciales, credentials)
         
         if not result["success"]:
             raise HTTPException(status_code=401, detail=result["error"])
@@ -107,20 +106,20 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/users/username/{username}", response_model=UserResponse)
-async def get_user_by_username(username: str, db: Session = Depends(get_db)):
+async def get_user_by_username(username: str, db: DbSession):
     """Obtener un usuario por su nombre de usuario"""
-    user = UserService.obtener_usuario_por_username(db, username)
+    user = await db.run_sync(UserService.obtener_usuario_por_username, username)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
 
 
 @router.post("/factory/login")
-async def factory_login(credentials: FactoryLogin, db: Session = Depends(get_db)):
+async def factory_login(credentials: FactoryLogin, db: DbSession):
     """Verificar acceso de taller por número de documento"""
     try:
         logger.info(f"Intento de login para taller con documento: {credentials.document}")
-        result = UserService.verificar_taller_por_documento(db, credentials.document)
+        result = await db.run_sync(UserService.verificar_taller_por_documento, credentials.document)
         
         if not result["success"]:
             raise HTTPException(status_code=401, detail=result["error"])
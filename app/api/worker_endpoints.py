@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Request, Form, HTTPException, status
+from fastapi import APIRouter, Request, Response, Form, HTTPException, status
 
 
-from app.db.connection import get_db
+from app.db.connection import DbSession
+from app.db.versions import obtener_version, no_modificado
 from app.service.worker_service import WorkerService
 
 from app.api.schemas.worker_schema import (
-    WorkerCreate, WorkerUpdate, WorkerResponse, WorkerListResponse,
+    WorkerCreate, WorkerUpdate, WorkerResponse,
     WorkerCrudResponse, WorkerListCrudResponse
 )
 router = APIRouter()
@@ -16,6 +17,7 @@ router = APIRouter()
 
 @router.post("/trabajadores/crear", response_model=WorkerCrudResponse, status_code=status.HTTP_201_CREATED)
 async def crear_nuevo_trabajador(
+    db: DbSession,
     nombre: str = Form(...),
     apellido: str = Form(None),
     cedula: str = Form(...),
@@ -36,156 +38,108 @@ async def crear_nuevo_trabajador(
     - email: Email del trabajador (opcional)
     - telefono: Teléfono del trabajador (opcional)
     """
-    db = get_db()
-    if db is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="No se pudo conectar a la base de datos"
-        )
+    worker = WorkerCreate(
+        nombre=nombre,
+        apellido=apellido,
+        cedula=cedula,
+        cargo=cargo,
+        salario=salario,
+        email=email,
+        telefono=telefono
+    )
+    resultado = await db.run_sync(WorkerService.crear_trabajador, worker)
     
-    try:
-        worker = WorkerCreate(
-            nombre=nombre,
-            apellido=apellido,
-            cedula=cedula,
-            cargo=cargo,
-            salario=salario,
-            email=email,
-            telefono=telefono
+    if resultado["success"]:
+        return WorkerCrudResponse(
+            success=True,
+            message="Trabajador creado exitosamente",
+            data=WorkerResponse.from_orm(resultado["data"])
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=resultado.get("error", "Error al crear trabajador")
         )
-        resultado = WorkerService.crear_trabajador(db, worker)
-        
-        if resultado["success"]:
-            return WorkerCrudResponse(
-                success=True,
-                message="Trabajador creado exitosamente",
-                data=WorkerResponse.from_orm(resultado["data"])
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=resultado.get("error", "Error al crear trabajador")
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
 
 
 @router.get("/trabajadores", response_model=WorkerListCrudResponse)
-async def obtener_lista_trabajadores():
-    """Obtiene la lista de todos los trabajadores activos"""
-    db = get_db()
-    if db is None:
+async def obtener_lista_trabajadores(request: Request, response: Response, db: DbSession):
+    """Obtiene la lista de todos los trabajadores activos (304 si no cambió desde If-None-Match)"""
+    etag, encabezados = await db.run_sync(obtener_version, "workers")
+    if no_modificado(request, etag):
+        return Response(status_code=304, headers=encabezados)
+    
+    resultado = await db.run_sync(WorkerService.obtener_lista_trabajadores)
+    if resultado["success"]:
+        response.headers.update(encabezados)
+        # Las filas se validan directamente contra WorkerListResponse (from_attributes)
+        trabajadores = resultado["data"]
+        return WorkerListCrudResponse(
+            success=True,
+            message="Trabajadores obtenidos exitosamente",
+            data=trabajadores,
+            total=len(trabajadores)
+        )
+    else:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="No se pudo conectar a la base de datos"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=resultado.get("error", "Error al obtener trabajadores")
         )
-    
-    try:
-        resultado = WorkerService.obtener_lista_trabajadores(db)
-        if resultado["success"]:
-            trabajadores = [WorkerListResponse.from_orm(t) for t in resultado["data"]]
-            return WorkerListCrudResponse(
-                success=True,
-                message="Trabajadores obtenidos exitosamente",
-                data=trabajadores,
-                total=len(trabajadores)
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=resultado.get("error", "Error al obtener trabajadores")
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
 
 
 @router.get("/trabajadores/{trabajador_id}", response_model=WorkerCrudResponse)
-async def obtener_info_trabajador(trabajador_id: int):
+async def obtener_info_trabajador(trabajador_id: int, db: DbSession):
     """Obtiene la información de un trabajador específico"""
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(WorkerService.obtener_trabajador, trabajador_id)
+    
+    if resultado["success"]:
+        return WorkerCrudResponse(
+            success=True,
+            message="Trabajador obtenido exitosamente",
+            data=WorkerResponse.from_orm(resultado["data"])
+        )
+    else:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="No se pudo conectar a la base de datos"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=resultado.get("error", "Trabajador no encontrado")
         )
-    
-    try:
-        resultado = WorkerService.obtener_trabajador(db, trabajador_id)
-        
-        if resultado["success"]:
-            return WorkerCrudResponse(
-                success=True,
-                message="Trabajador obtenido exitosamente",
-                data=WorkerResponse.from_orm(resultado["data"])
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=resultado.get("error", "Trabajador no encontrado")
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
 
 
 @router.put("/trabajadores/{trabajador_id}", response_model=WorkerCrudResponse)
 async def actualizar_info_trabajador(
     trabajador_id: int,
-    worker: WorkerUpdate
+    worker: WorkerUpdate,
+    db: DbSession
 ):
     """Actualiza la información de un trabajador"""
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(WorkerService.actualizar_trabajador, trabajador_id, worker)
+    
+    if resultado["success"]:
+        return WorkerCrudResponse(
+            success=True,
+            message="Trabajador actualizado exitosamente",
+            data=WorkerResponse.from_orm(resultado["data"])
+        )
+    else:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="No se pudo conectar a la base de datos"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=resultado.get("error", "Trabajador no encontrado")
         )
-    
-    try:
-        resultado = WorkerService.actualizar_trabajador(db, trabajador_id, worker)
-        
-        if resultado["success"]:
-            return WorkerCrudResponse(
-                success=True,
-                message="Trabajador actualizado exitosamente",
-                data=WorkerResponse.from_orm(resultado["data"])
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=resultado.get("error", "Trabajador no encontrado")
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
 
 
 @router.delete("/trabajadores/{trabajador_id}", response_model=WorkerCrudResponse)
-async def eliminar_info_trabajador(trabajador_id: int):
+async def eliminar_info_trabajador(trabajador_id: int, db: DbSession):
     """Elimina (desactiva) un trabajador"""
-    db = get_db()
-    if db is None:
+    resultado = await db.run_sync(WorkerService.eliminar_trabajador, trabajador_id)
+    
+    if resultado["success"]:
+        return WorkerCrudResponse(
+            success=True,
+            message="Trabajador eliminado exitosamente",
+            data=None
+        )
+    else:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="No se pudo conectar a la base de datos"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=resultado.get("error", "Trabajador no encontrado")
         )
-    
-    try:
-        resultado = WorkerService.eliminar_trabajador(db, trabajador_id)
-        
-        if resultado["success"]:
-            return WorkerCrudResponse(
-                success=True,
-                message="Trabajador eliminado exitosamente",
-                data=None
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=resultado.get("error", "Trabajador no encontrado")
-            )
-    finally:
-        from app.db.connection import close_connection
-        close_connection(db)
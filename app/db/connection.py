@@ -1,4 +1,8 @@
+from typing import Annotated
+from fastapi import Depends
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 import os
 import sys
@@ -14,8 +18,38 @@ db_host = os.getenv("HOST")
 db_name = os.getenv("DATABASE")
 db_port = os.getenv("PORT_DB", "5432")
 
-# Construir la URL de conexión
-db_url = f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+# Construir la URL de conexión (DB_URL permite usar otra base, p. ej. SQLite en local)
+db_url = os.getenv("DB_URL") or f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+# Drivers asíncronos equivalentes a cada backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Configuración del pool de conexiones (una sola instancia por proceso)
+db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+db_pool_timeout = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+
+def _pool_options(url):
+    """Opciones del pool; SQLite no usa QueuePool"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": db_pool_size,
+        "max_overflow": db_max_overflow,
+        "pool_timeout": db_pool_timeout,
+        "pool_recycle": db_pool_recycle,
+    }
+
+
+def get_async_db_url(url):
+    """Convierte la URL síncrona en su equivalente con driver asíncrono"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername))
 
 
 def create_db_engine():
@@ -32,8 +66,8 @@ def create_db_engine():
         engine = create_engine(
             db_url,
             pool_pre_ping=True,
-            pool_recycle=3600,
-            echo=False  # Set to True for debugging SQL queries
+            echo=False,  # Set to True for debugging SQL queries
+            **_pool_options(db_url)
         )
         return engine
     except Exception as e:
@@ -41,37 +75,62 @@ def create_db_engine():
         return None
 
 
-def get_db():
+def create_async_db_engine():
     """
-    Obtiene una sesión de la base de datos.
-    Uso con FastAPI: como dependencia en endpoints
+    Crea el motor asíncrono (asyncpg en PostgreSQL, aiosqlite en local).
+    Retorna: AsyncEngine de SQLAlchemy
     """
     try:
-        engine = create_db_engine()
-        if engine is None:
-            raise Exception("No se pudo crear el motor de la base de datos")
-        
-        # Import models to register them with Base metadata
-        try:
-            from app.db.models.base import Base
-            from app.db.models import User, Worker, Assistence
-        except ImportError:
-            from .models.base import Base
-            from .models import User, Worker, Assistence
-        
-        # Create tables if they don't exist
-        Base.metadata.create_all(bind=engine)
-        
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        db = SessionLocal()
-        
+        return create_async_engine(
+            get_async_db_url(db_url),
+            pool_pre_ping=True,
+            echo=False,
+            **_pool_options(db_url)
+        )
+    except Exception as e:
+        print(f"Error al crear el motor asíncrono de la base de datos: {e}")
+        return None
+
+
+# Engine y fábrica de sesiones compartidos por todo el proceso.
+# create_engine no abre conexiones: el pool se llena bajo demanda.
+engine = create_db_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Los endpoints usan el motor asíncrono para no bloquear el event loop.
+# expire_on_commit=False: los objetos devueltos se serializan después del commit.
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Registra los eventos de sesión que versionan las tablas de los listados
+import app.db.versions  # noqa: E402,F401
+
+
+async def get_db():
+    """
+    Sesión de base de datos con alcance de request.
+    Uso con FastAPI: a través de `DbSession` en los endpoints.
+
+    - La conexión del pool se toma de forma perezosa, en la primera consulta.
+    - Todos los servicios del request comparten la misma sesión; se ejecutan
+      con `await db.run_sync(Servicio.metodo, *args)` y solo hacen flush.
+    - Al final se hace un único commit, o rollback si hubo una excepción.
+    """
+    if async_engine is None:
+        raise Exception("No se pudo crear el motor de la base de datos")
+
+    async with AsyncSessionLocal() as db:
         try:
             yield db
-        finally:
-            db.close()
-    except Exception as err:
-        print(f"Error al conectar a la base de datos: {err}")
-        raise
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+# scope="function": el commit ocurre antes de enviar la respuesta, así un
+# error al confirmar la transacción llega al cliente como 500.
+DbSession = Annotated[AsyncSession, Depends(get_db, scope="function")]
 
 
 def close_connection(conn):
@@ -87,16 +146,14 @@ def test_db_connection():
     """
     db = None
     try:
-        engine = create_db_engine()
         if engine is None:
             return False, "❌ Error: No se pudo crear el motor de la base de datos"
-        
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
         db = SessionLocal()
-        
+
         # Ejecutar una consulta de prueba
         db.execute(text("SELECT 1"))
-        
+
         return True, "✅ Conexión a la base de datos PostgreSQL exitosa"
     except Exception as e:
         return False, f"❌ Error al conectar a la base de datos: {str(e)}"
@@ -108,6 +165,6 @@ def test_db_connection():
 if __name__ == "__main__":
     # Add project root to sys.path for direct script execution
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-    
+
     es_conectado, mensaje = test_db_connection()
-    print(mensaje)
\ No newline at end of file
+    print(mensaje)
@@ -0,0 +1,25 @@
+"""
+Acciones que deben ejecutarse solo cuando la transacción se confirma
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+def on_commit(db, callback):
+    """
+    Registra un callback que se ejecuta después del commit de la sesión.
+    Si la transacción hace rollback, el callback se descarta.
+    """
+    db.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _ejecutar_callbacks(session):
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_callbacks(session):
+    session.info.pop("on_commit", None)
@@ -0,0 +1,63 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db.connection import engine
+from app.db.partitions import es_tabla_particion
+from app.db.models.base import Base
+import app.db.models  # noqa: F401  (registra los modelos en la metadata)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Genera el SQL de las migraciones sin conectarse a la base de datos"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# Búsqueda de entregas (0013): índice de expresión pg_trgm y tablas FTS5 de SQLite
+INDICE_BUSQUEDA = "ix_delivered_pieces_busqueda"
+TABLA_FTS = "delivered_pieces_fts"
+
+
+def include_name(name, type_, parent_names):
+    """Las particiones de assistence y los índices de búsqueda se administran fuera de autogenerate"""
+    if type_ == "table":
+        return not es_tabla_particion(name) and not name.startswith(TABLA_FTS)
+    if type_ == "index":
+        return name != INDICE_BUSQUEDA
+    return True
+
+
+def run_migrations_online():
+    """Ejecuta las migraciones con el engine de la aplicación"""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite no soporta ALTER TABLE completo: usar modo batch
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_name=include_name,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
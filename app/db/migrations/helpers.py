@@ -0,0 +1,31 @@
+"""
+Utilidades compartidas por las migraciones
+"""
+
+from alembic import op
+
+
+def create_index_concurrently(name, table, columns, **kw):
+    """
+    Crea un índice sin bloquear escrituras sobre la tabla.
+    En PostgreSQL usa CREATE INDEX CONCURRENTLY, que no puede correr dentro
+    de una transacción; por eso se ejecuta en un bloque autocommit.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            name, table, columns,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kw
+        )
+
+
+def drop_index_concurrently(name, table):
+    """Elimina un índice sin bloquear la tabla (DROP INDEX CONCURRENTLY)"""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            name,
+            table_name=table,
+            postgresql_concurrently=True,
+            if_exists=True
+        )
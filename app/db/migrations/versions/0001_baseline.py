@@ -0,0 +1,90 @@
+"""Esquema base: tablas existentes antes de las migraciones
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+Bases de datos creadas con create_all deben marcarse con
+`python manage.py stamp 0001_baseline` en lugar de ejecutar esta revisión.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id_user', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('username', sa.String(100), nullable=False, unique=True),
+        sa.Column('psw', sa.String(255), nullable=False),
+        sa.Column('email', sa.String(255), nullable=True),
+        sa.Column('rol', sa.String(50), nullable=False),
+        sa.Column('estado', sa.Integer(), nullable=False),
+    )
+
+    op.create_table(
+        'workers',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('nombre', sa.String(100), nullable=False),
+        sa.Column('apellido', sa.String(100), nullable=False),
+        sa.Column('cedula', sa.String(20), nullable=False, unique=True),
+        sa.Column('telefono', sa.String(20), nullable=True),
+        sa.Column('cargo', sa.String(100), nullable=False),
+        sa.Column('salario', sa.Numeric(10, 2), nullable=False),
+        sa.Column('activo', sa.Boolean(), nullable=False),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+        sa.Column('email', sa.String(100), nullable=True),
+        sa.Column('reference_id', sa.String(50), nullable=True),
+    )
+
+    op.create_table(
+        'assistence',
+        sa.Column('id_assistence', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('worker', sa.String(100), nullable=False),
+        sa.Column('arrival_time', sa.DateTime(), nullable=False),
+        sa.Column('departure_time', sa.DateTime(), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    )
+
+    op.create_table(
+        'factories',
+        sa.Column('id_factory', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('owner', sa.String(100), nullable=False),
+        sa.Column('document', sa.String(50), nullable=True),
+    )
+
+    size_columns = [
+        'sz6_12', 'sz12_18', 'sz18_24', 'sz24_36', 'sz36_48',
+        'sz2', 'sz4', 'sz6', 'sz8', 'sz10', 'sz12', 'sz14', 'sz16', 'sz18',
+    ]
+    op.create_table(
+        'delivered_pieces',
+        sa.Column('id_delivery', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('owner', sa.String(100), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('lot', sa.String(50), nullable=True),
+        sa.Column('type', sa.String(50), nullable=True),
+        sa.Column('color', sa.String(50), nullable=True),
+        sa.Column('annotation', sa.String(500), nullable=True),
+        sa.Column('type_fabric', sa.String(100), nullable=True),
+        sa.Column('rib', sa.String(100), nullable=True),
+        *[sa.Column(name, sa.Integer(), nullable=True) for name in size_columns],
+        sa.Column('id_group', sa.String(50), nullable=True),
+        sa.Column('modification_date', sa.DateTime(), nullable=True),
+        sa.Column('modified_by', sa.String(100), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('delivered_pieces')
+    op.drop_table('factories')
+    op.drop_table('assistence')
+    op.drop_table('workers')
+    op.drop_table('users')
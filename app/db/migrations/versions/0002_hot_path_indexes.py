@@ -0,0 +1,49 @@
+"""Índices para las consultas más frecuentes
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0002_hot_path_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Asistencias del día y verificación de llegada duplicada por trabajador
+    create_index_concurrently(
+        'ix_assistence_arrival_date_worker', 'assistence',
+        [sa.text('date(arrival_time)'), 'worker']
+    )
+    # Entregas activas por grupo (listado y detalle de grupo)
+    create_index_concurrently(
+        'ix_delivered_pieces_active_group', 'delivered_pieces',
+        ['id_group', 'id_delivery'],
+        postgresql_where=sa.text("status = 'active'"),
+        sqlite_where=sa.text("status = 'active'")
+    )
+    # Marcación por código de barras y listados de activos
+    create_index_concurrently('ix_workers_reference_id', 'workers', ['reference_id'])
+    create_index_concurrently(
+        'ix_workers_activos', 'workers', ['id'],
+        postgresql_where=sa.text("activo"),
+        sqlite_where=sa.text("activo = 1")
+    )
+    # Logins de talleres y usuarios
+    create_index_concurrently('ix_factories_document', 'factories', ['document'])
+    create_index_concurrently('ix_users_username_estado', 'users', ['username', 'estado'])
+
+
+def downgrade():
+    drop_index_concurrently('ix_users_username_estado', 'users')
+    drop_index_concurrently('ix_factories_document', 'factories')
+    drop_index_concurrently('ix_workers_activos', 'workers')
+    drop_index_concurrently('ix_workers_reference_id', 'workers')
+    drop_index_concurrently('ix_delivered_pieces_active_group', 'delivered_pieces')
+    drop_index_concurrently('ix_assistence_arrival_date_worker', 'assistence')
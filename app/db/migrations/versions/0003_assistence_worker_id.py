@@ -0,0 +1,57 @@
+"""Asistencia referenciada por worker_id en lugar del nombre
+
+Revision ID: 0003_assistence_worker_id
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0003_assistence_worker_id'
+down_revision = '0002_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assistence') as batch_op:
+        batch_op.add_column(sa.Column('worker_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_assistence_worker_id_workers', 'workers', ['worker_id'], ['id']
+        )
+
+    # Backfill: solo nombres que identifican a un único trabajador.
+    # Los nombres repetidos quedan con worker_id NULL para revisión manual.
+    op.execute(
+        """
+        UPDATE assistence
+        SET worker_id = (
+            SELECT MIN(w.id) FROM workers w
+            WHERE w.nombre = assistence.worker
+            GROUP BY w.nombre
+            HAVING COUNT(*) = 1
+        )
+        WHERE worker_id IS NULL
+        """
+    )
+
+    create_index_concurrently(
+        'ix_assistence_arrival_date_worker_id', 'assistence',
+        [sa.text('date(arrival_time)'), 'worker_id']
+    )
+    drop_index_concurrently('ix_assistence_arrival_date_worker', 'assistence')
+
+
+def downgrade():
+    create_index_concurrently(
+        'ix_assistence_arrival_date_worker', 'assistence',
+        [sa.text('date(arrival_time)'), 'worker']
+    )
+    drop_index_concurrently('ix_assistence_arrival_date_worker_id', 'assistence')
+
+    with op.batch_alter_table('assistence') as batch_op:
+        batch_op.drop_constraint('fk_assistence_worker_id_workers', type_='foreignkey')
+        batch_op.drop_column('worker_id')
@@ -0,0 +1,59 @@
+"""Fecha de asistencia almacenada y llegada única por trabajador y día
+
+Revision ID: 0004_assistence_attendance_date
+Revises: 0003_assistence_worker_id
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0004_assistence_attendance_date'
+down_revision = '0003_assistence_worker_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('assistence', sa.Column('attendance_date', sa.Date(), nullable=True))
+
+    # arrival_time ya se guarda en hora local de Bogotá
+    op.execute("UPDATE assistence SET attendance_date = date(arrival_time)")
+
+    # Llegadas duplicadas previas: se conserva la primera y las demás quedan
+    # sin worker_id (conservan el nombre) para revisión manual
+    op.execute(
+        """
+        UPDATE assistence
+        SET worker_id = NULL
+        WHERE worker_id IS NOT NULL
+          AND id_assistence NOT IN (
+              SELECT MIN(id_assistence) FROM assistence
+              WHERE worker_id IS NOT NULL
+              GROUP BY worker_id, attendance_date
+          )
+        """
+    )
+
+    with op.batch_alter_table('assistence') as batch_op:
+        batch_op.alter_column('attendance_date', existing_type=sa.Date(), nullable=False)
+
+    create_index_concurrently(
+        'uq_assistence_attendance_date_worker_id', 'assistence',
+        ['attendance_date', 'worker_id'],
+        unique=True
+    )
+    drop_index_concurrently('ix_assistence_arrival_date_worker_id', 'assistence')
+
+
+def downgrade():
+    create_index_concurrently(
+        'ix_assistence_arrival_date_worker_id', 'assistence',
+        [sa.text('date(arrival_time)'), 'worker_id']
+    )
+    drop_index_concurrently('uq_assistence_attendance_date_worker_id', 'assistence')
+
+    with op.batch_alter_table('assistence') as batch_op:
+        batch_op.drop_column('attendance_date')
@@ -0,0 +1,33 @@
+"""Id de evento del cliente para la ingesta de marcaciones por lote
+
+Revision ID: 0005_assistence_client_event_id
+Revises: 0004_assistence_attendance_date
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0005_assistence_client_event_id'
+down_revision = '0004_assistence_attendance_date'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('assistence', sa.Column('client_event_id', sa.String(length=64), nullable=True))
+
+    create_index_concurrently(
+        'uq_assistence_client_event_id', 'assistence',
+        ['client_event_id'],
+        unique=True
+    )
+
+
+def downgrade():
+    drop_index_concurrently('uq_assistence_client_event_id', 'assistence')
+
+    with op.batch_alter_table('assistence') as batch_op:
+        batch_op.drop_column('client_event_id')
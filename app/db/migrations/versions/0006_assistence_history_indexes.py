@@ -0,0 +1,31 @@
+"""Índices para el historial de asistencias con paginación por keyset
+
+Revision ID: 0006_assistence_history_indexes
+Revises: 0005_assistence_client_event_id
+Create Date: 2026-10-18
+"""
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0006_assistence_history_indexes'
+down_revision = '0005_assistence_client_event_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rango de fechas recorrido en orden (arrival_time, id_assistence)
+    create_index_concurrently(
+        'ix_assistence_arrival_time_id', 'assistence',
+        ['arrival_time', 'id_assistence']
+    )
+    # Mismo recorrido filtrado por trabajador
+    create_index_concurrently(
+        'ix_assistence_worker_id_arrival_time', 'assistence',
+        ['worker_id', 'arrival_time', 'id_assistence']
+    )
+
+
+def downgrade():
+    drop_index_concurrently('ix_assistence_worker_id_arrival_time', 'assistence')
+    drop_index_concurrently('ix_assistence_arrival_time_id', 'assistence')
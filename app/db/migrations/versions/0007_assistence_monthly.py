@@ -0,0 +1,75 @@
+"""Resumen mensual de horas por trabajador
+
+Revision ID: 0007_assistence_monthly
+Revises: 0006_assistence_history_indexes
+Create Date: 2026-10-18
+"""
+import os
+from datetime import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007_assistence_monthly'
+down_revision = '0006_assistence_history_indexes'
+branch_labels = None
+depends_on = None
+
+# Mismo cálculo que AttendanceRollup.reconstruir, escrito contra las tablas
+# tal como quedan en esta revisión (la migración no importa la aplicación)
+BACKFILL = {
+    'postgresql': """
+        INSERT INTO assistence_monthly
+            (worker_id, periodo, dias, segundos_totales, llegadas_tarde, fecha_actualizacion)
+        SELECT
+            worker_id,
+            CAST(date_trunc('month', attendance_date) AS DATE),
+            count(*),
+            sum(CAST(EXTRACT(EPOCH FROM (date_trunc('second', departure_time)
+                                         - date_trunc('second', arrival_time))) AS BIGINT)),
+            sum(CASE WHEN CAST(date_trunc('second', arrival_time) AS TIME) > '{hora_limite}' THEN 1 ELSE 0 END),
+            date_trunc('second', now() AT TIME ZONE 'America/Bogota')
+        FROM assistence
+        WHERE worker_id IS NOT NULL AND departure_time IS NOT NULL
+        GROUP BY worker_id, CAST(date_trunc('month', attendance_date) AS DATE)
+    """,
+    'sqlite': """
+        INSERT INTO assistence_monthly
+            (worker_id, periodo, dias, segundos_totales, llegadas_tarde, fecha_actualizacion)
+        SELECT
+            worker_id,
+            date(attendance_date, 'start of month'),
+            count(*),
+            sum(CAST(strftime('%s', departure_time) AS INTEGER) - CAST(strftime('%s', arrival_time) AS INTEGER)),
+            sum(CASE WHEN time(arrival_time) > '{hora_limite}' THEN 1 ELSE 0 END),
+            datetime('now', '-5 hours')
+        FROM assistence
+        WHERE worker_id IS NOT NULL AND departure_time IS NOT NULL
+        GROUP BY worker_id, date(attendance_date, 'start of month')
+    """,
+}
+
+
+def upgrade():
+    op.create_table(
+        'assistence_monthly',
+        sa.Column('worker_id', sa.Integer(), nullable=False),
+        sa.Column('periodo', sa.Date(), nullable=False),
+        sa.Column('dias', sa.Integer(), nullable=False),
+        sa.Column('segundos_totales', sa.BigInteger(), nullable=False),
+        sa.Column('llegadas_tarde', sa.Integer(), nullable=False),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['worker_id'], ['workers.id'], name='fk_assistence_monthly_worker_id_workers'),
+        sa.PrimaryKeyConstraint('worker_id', 'periodo'),
+    )
+
+    # Backfill del historial; HORA_LIMITE_LLEGADA como en el servicio
+    hora_limite = time.fromisoformat(os.getenv("HORA_LIMITE_LLEGADA", "07:00"))
+    op.execute(sa.text(
+        BACKFILL[op.get_context().dialect.name].format(hora_limite=hora_limite.strftime('%H:%M:%S'))
+    ))
+
+
+def downgrade():
+    op.drop_table('assistence_monthly')
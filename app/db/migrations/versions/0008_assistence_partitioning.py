@@ -0,0 +1,115 @@
+"""Particionado mensual de assistence por attendance_date
+
+Revision ID: 0008_assistence_partitioning
+Revises: 0007_assistence_monthly
+Create Date: 2026-10-18
+
+En PostgreSQL reemplaza assistence por una tabla particionada por rango de
+attendance_date (un mes por partición). Toda restricción única de una tabla
+particionada debe incluir la clave de partición, por eso:
+- la llave primaria pasa a ser (id_assistence, attendance_date);
+- el id de evento del kiosco es único por (client_event_id, attendance_date).
+La migración copia la tabla completa bajo bloqueo exclusivo: ejecutarla
+fuera del horario de marcación.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0008_assistence_partitioning'
+down_revision = '0007_assistence_monthly'
+branch_labels = None
+depends_on = None
+
+
+COLUMNAS = (
+    "id_assistence, worker, worker_id, arrival_time, departure_time, "
+    "attendance_date, fecha_creacion, client_event_id"
+)
+
+
+def _recrear_tabla(llave_primaria, particionada):
+    """
+    Renombra assistence a assistence_anterior y crea la nueva assistence con
+    la misma secuencia de ids. Los datos se copian en `_copiar_datos`.
+    """
+    secuencia = op.get_bind().execute(
+        sa.text("SELECT pg_get_serial_sequence('assistence', 'id_assistence')")
+    ).scalar()
+
+    op.execute("LOCK TABLE assistence IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"ALTER SEQUENCE {secuencia} OWNED BY NONE")
+    op.execute("ALTER TABLE assistence RENAME TO assistence_anterior")
+    op.execute("ALTER TABLE assistence_anterior RENAME CONSTRAINT assistence_pkey TO assistence_anterior_pkey")
+    op.execute(
+        f"""
+        CREATE TABLE assistence (
+            id_assistence INTEGER NOT NULL DEFAULT nextval('{secuencia}'::regclass),
+            worker VARCHAR(100) NOT NULL,
+            worker_id INTEGER,
+            arrival_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            departure_time TIMESTAMP WITHOUT TIME ZONE,
+            attendance_date DATE NOT NULL,
+            fecha_creacion TIMESTAMP WITHOUT TIME ZONE,
+            client_event_id VARCHAR(64),
+            CONSTRAINT assistence_pkey PRIMARY KEY ({llave_primaria}),
+            CONSTRAINT fk_assistence_worker_id_workers FOREIGN KEY (worker_id) REFERENCES workers (id)
+        ) {"PARTITION BY RANGE (attendance_date)" if particionada else ""}
+        """
+    )
+    op.execute(f"ALTER SEQUENCE {secuencia} OWNED BY assistence.id_assistence")
+
+
+def _copiar_datos(columnas_evento):
+    """Copia las filas, elimina la tabla anterior y crea los índices"""
+    op.execute(f"INSERT INTO assistence ({COLUMNAS}) SELECT {COLUMNAS} FROM assistence_anterior")
+    op.execute("DROP TABLE assistence_anterior")
+
+    op.create_index(
+        'uq_assistence_attendance_date_worker_id', 'assistence',
+        ['attendance_date', 'worker_id'], unique=True
+    )
+    op.create_index('uq_assistence_client_event_id', 'assistence', columnas_evento, unique=True)
+    op.create_index('ix_assistence_arrival_time_id', 'assistence', ['arrival_time', 'id_assistence'])
+    op.create_index(
+        'ix_assistence_worker_id_arrival_time', 'assistence',
+        ['worker_id', 'arrival_time', 'id_assistence']
+    )
+
+
+def _indice_evento_sqlite(columnas):
+    drop_index_concurrently('uq_assistence_client_event_id', 'assistence')
+    create_index_concurrently('uq_assistence_client_event_id', 'assistence', columnas, unique=True)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite no se particiona; solo se alinea el índice único del evento
+        _indice_evento_sqlite(['client_event_id', 'attendance_date'])
+        return
+
+    if context.is_offline_mode():
+        raise RuntimeError("El particionado de assistence requiere ejecutarse conectado a la base")
+
+    from app.db.partitions import asegurar_particiones
+
+    _recrear_tabla("id_assistence, attendance_date", particionada=True)
+
+    # Una partición por cada mes con datos, más los próximos meses
+    bind = op.get_bind()
+    primer_dia = bind.execute(sa.text("SELECT MIN(attendance_date) FROM assistence_anterior")).scalar()
+    asegurar_particiones(bind, desde=primer_dia)
+
+    _copiar_datos(['client_event_id', 'attendance_date'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        _indice_evento_sqlite(['client_event_id'])
+        return
+
+    # Las particiones archivadas (esquema `archivo`) no se reincorporan
+    _recrear_tabla("id_assistence", particionada=False)
+    _copiar_datos(['client_event_id'])
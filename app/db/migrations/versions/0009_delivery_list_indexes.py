@@ -0,0 +1,44 @@
+"""Índices para el listado de entregas con filtros y paginación por keyset
+
+Revision ID: 0009_delivery_list_indexes
+Revises: 0008_assistence_partitioning
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0009_delivery_list_indexes'
+down_revision = '0008_assistence_partitioning'
+branch_labels = None
+depends_on = None
+
+ACTIVAS = {
+    'postgresql_where': sa.text("status = 'active'"),
+    'sqlite_where': sa.text("status = 'active'"),
+}
+
+
+def upgrade():
+    # Listado ordenado por fecha (orden por defecto)
+    create_index_concurrently(
+        'ix_delivered_pieces_active_date', 'delivered_pieces',
+        ['date', 'id_delivery'], **ACTIVAS
+    )
+    # Listado de un responsable (rol taller)
+    create_index_concurrently(
+        'ix_delivered_pieces_active_owner_date', 'delivered_pieces',
+        ['owner', 'date', 'id_delivery'], **ACTIVAS
+    )
+    # Filtro por lote
+    create_index_concurrently(
+        'ix_delivered_pieces_active_lot', 'delivered_pieces',
+        ['lot', 'id_delivery'], **ACTIVAS
+    )
+
+
+def downgrade():
+    drop_index_concurrently('ix_delivered_pieces_active_lot', 'delivered_pieces')
+    drop_index_concurrently('ix_delivered_pieces_active_owner_date', 'delivered_pieces')
+    drop_index_concurrently('ix_delivered_pieces_active_date', 'delivered_pieces')
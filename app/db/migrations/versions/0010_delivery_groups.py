@@ -0,0 +1,121 @@
+"""Encabezados de grupos de entregas con totales
+
+Revision ID: 0010_delivery_groups
+Revises: 0009_delivery_list_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0010_delivery_groups'
+down_revision = '0009_delivery_list_indexes'
+branch_labels = None
+depends_on = None
+
+TALLAS = (
+    'sz6_12', 'sz12_18', 'sz18_24', 'sz24_36', 'sz36_48',
+    'sz2', 'sz4', 'sz6', 'sz8', 'sz10', 'sz12', 'sz14', 'sz16', 'sz18'
+)
+
+ACTIVAS = {
+    'postgresql_where': sa.text("status = 'active'"),
+    'sqlite_where': sa.text("status = 'active'"),
+}
+
+# Hora de Bogotá (columnas DateTime sin zona), como _ahora() del servicio
+AHORA = {
+    'postgresql': "now() AT TIME ZONE 'America/Bogota'",
+    'sqlite': "datetime('now', '-5 hours')",
+}
+
+COLUMNAS = ', '.join((
+    'id_group', 'id_delivery', 'owner', 'date', 'lot', 'filas', 'total_piezas',
+    *TALLAS, 'status', 'modification_date'
+))
+
+# Mismo cálculo que DeliveryGroups.reconstruir, escrito contra las tablas tal
+# como quedan en esta revisión, sin pasar por los modelos ni el servicio.
+# Grupos con filas activas: totales de esas filas y datos de la más reciente
+BACKFILL_ACTIVOS = f"""
+    INSERT INTO delivery_groups ({COLUMNAS})
+    SELECT t.id_group, t.id_delivery, u.owner, u.date, u.lot, t.filas,
+           {' + '.join(f't.{talla}' for talla in TALLAS)},
+           {', '.join(f't.{talla}' for talla in TALLAS)},
+           'active', {{ahora}}
+    FROM (
+        SELECT id_group, max(id_delivery) AS id_delivery, count(*) AS filas,
+               {', '.join(f'sum(coalesce({talla}, 0)) AS {talla}' for talla in TALLAS)}
+        FROM delivered_pieces
+        WHERE status = 'active' AND id_group IS NOT NULL
+        GROUP BY id_group
+    ) t
+    JOIN delivered_pieces u ON u.id_delivery = t.id_delivery
+"""
+
+# Grupos con todas sus filas eliminadas: se conservan como inactivos
+BACKFILL_INACTIVOS = f"""
+    INSERT INTO delivery_groups ({COLUMNAS})
+    SELECT t.id_group, t.id_delivery, u.owner, u.date, u.lot, 0, 0,
+           {', '.join('0' for _ in TALLAS)},
+           'inactive', {{ahora}}
+    FROM (
+        SELECT id_group, max(id_delivery) AS id_delivery
+        FROM delivered_pieces
+        WHERE id_group IS NOT NULL
+        GROUP BY id_group
+        HAVING count(CASE WHEN status = 'active' THEN 1 END) = 0
+    ) t
+    JOIN delivered_pieces u ON u.id_delivery = t.id_delivery
+"""
+
+# Índices del listado (0009); el listado ahora se lee de delivery_groups
+INDICES_LISTADO = (
+    ('ix_delivered_pieces_active_date', ['date', 'id_delivery']),
+    ('ix_delivered_pieces_active_owner_date', ['owner', 'date', 'id_delivery']),
+    ('ix_delivered_pieces_active_lot', ['lot', 'id_delivery']),
+)
+
+
+def upgrade():
+    # Las entregas sin grupo pasan a ser un grupo propio
+    op.execute("UPDATE delivered_pieces SET id_group = 'grp_' || id_delivery WHERE id_group IS NULL")
+
+    op.create_table(
+        'delivery_groups',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('id_group', sa.String(length=50), nullable=False),
+        sa.Column('id_delivery', sa.Integer(), nullable=False),
+        sa.Column('owner', sa.String(length=100), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('lot', sa.String(length=50), nullable=True),
+        sa.Column('filas', sa.Integer(), nullable=False),
+        sa.Column('total_piezas', sa.BigInteger(), nullable=False),
+        *[sa.Column(talla, sa.BigInteger(), nullable=False) for talla in TALLAS],
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('modification_date', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id_group'),
+    )
+
+    # Backfill con el mismo cálculo que `rebuild-delivery-groups`
+    ahora = AHORA[op.get_context().dialect.name]
+    op.execute(BACKFILL_ACTIVOS.format(ahora=ahora))
+    op.execute(BACKFILL_INACTIVOS.format(ahora=ahora))
+
+    op.create_index('ix_delivery_groups_active_date', 'delivery_groups', ['date', 'id'], **ACTIVAS)
+    op.create_index('ix_delivery_groups_active_owner_date', 'delivery_groups', ['owner', 'date', 'id'], **ACTIVAS)
+    op.create_index('ix_delivery_groups_active_lot', 'delivery_groups', ['lot', 'id'], **ACTIVAS)
+    op.create_index('ix_delivery_groups_active_total', 'delivery_groups', ['total_piezas', 'id'], **ACTIVAS)
+
+    for nombre, _ in INDICES_LISTADO:
+        drop_index_concurrently(nombre, 'delivered_pieces')
+
+
+def downgrade():
+    for nombre, columnas in INDICES_LISTADO:
+        create_index_concurrently(nombre, 'delivered_pieces', columnas, **ACTIVAS)
+
+    op.drop_table('delivery_groups')
@@ -0,0 +1,34 @@
+"""Índice para la sincronización incremental de entregas
+
+Revision ID: 0011_delivery_changes_index
+Revises: 0010_delivery_groups
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0011_delivery_changes_index'
+down_revision = '0010_delivery_groups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filas anteriores a la auditoría: se toma la fecha de la entrega, para
+    # que también aparezcan en una sincronización completa
+    if op.get_context().dialect.name == 'sqlite':
+        op.execute("UPDATE delivered_pieces SET modification_date = date || ' 00:00:00.000000' WHERE modification_date IS NULL")
+    else:
+        op.execute("UPDATE delivered_pieces SET modification_date = date WHERE modification_date IS NULL")
+
+    # Recorrido en orden (modification_date, id_delivery) desde una marca de agua
+    create_index_concurrently(
+        'ix_delivered_pieces_modification_date', 'delivered_pieces',
+        ['modification_date', 'id_delivery']
+    )
+
+
+def downgrade():
+    drop_index_concurrently('ix_delivered_pieces_modification_date', 'delivered_pieces')
@@ -0,0 +1,35 @@
+"""Versiones por tabla para GET condicionales
+
+Revision ID: 0012_table_versions
+Revises: 0011_delivery_changes_index
+Create Date: 2026-10-18
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+import pytz
+
+
+revision = '0012_table_versions'
+down_revision = '0011_delivery_changes_index'
+branch_labels = None
+depends_on = None
+
+TABLAS = ('delivered_pieces', 'factories', 'workers')
+
+
+def upgrade():
+    tabla = op.create_table(
+        'table_versions',
+        sa.Column('tabla', sa.String(length=63), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('actualizado', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('tabla'),
+    )
+    ahora = datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None, microsecond=0)
+    op.bulk_insert(tabla, [{'tabla': nombre, 'version': 1, 'actualizado': ahora} for nombre in TABLAS])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,70 @@
+"""Búsqueda de texto sobre entregas (pg_trgm / FTS5)
+
+Revision ID: 0013_delivery_search
+Revises: 0012_table_versions
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0013_delivery_search'
+down_revision = '0012_table_versions'
+branch_labels = None
+depends_on = None
+
+COLUMNAS = ('owner', 'lot', 'color', 'type_fabric', 'rib', 'annotation')
+
+# Debe coincidir con TEXTO_BUSQUEDA de app/service/delivery_search.py
+TEXTO = " || ' ' || ".join(f"coalesce({columna}, '')" for columna in COLUMNAS)
+
+
+def _columnas(prefijo=''):
+    return ', '.join(f"{prefijo}{columna}" for columna in COLUMNAS)
+
+
+def upgrade():
+    if op.get_context().dialect.name == 'sqlite':
+        # Contenido externo: la tabla FTS solo guarda el índice de trigramas
+        op.execute(
+            f"CREATE VIRTUAL TABLE delivered_pieces_fts USING fts5({_columnas()}, "
+            "content='delivered_pieces', content_rowid='id_delivery', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER delivered_pieces_fts_ai AFTER INSERT ON delivered_pieces BEGIN "
+            f"INSERT INTO delivered_pieces_fts(rowid, {_columnas()}) VALUES (new.id_delivery, {_columnas('new.')}); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER delivered_pieces_fts_ad AFTER DELETE ON delivered_pieces BEGIN "
+            f"INSERT INTO delivered_pieces_fts(delivered_pieces_fts, rowid, {_columnas()}) "
+            f"VALUES ('delete', old.id_delivery, {_columnas('old.')}); "
+            "END"
+        )
+        op.execute(
+            f"CREATE TRIGGER delivered_pieces_fts_au AFTER UPDATE OF {_columnas()} ON delivered_pieces BEGIN "
+            f"INSERT INTO delivered_pieces_fts(delivered_pieces_fts, rowid, {_columnas()}) "
+            f"VALUES ('delete', old.id_delivery, {_columnas('old.')}); "
+            f"INSERT INTO delivered_pieces_fts(rowid, {_columnas()}) VALUES (new.id_delivery, {_columnas('new.')}); "
+            "END"
+        )
+        op.execute("INSERT INTO delivered_pieces_fts(delivered_pieces_fts) VALUES ('rebuild')")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Índice de expresión: no se declara en el modelo (env.py lo excluye de autogenerate)
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_delivered_pieces_busqueda "
+            f"ON delivered_pieces USING gin (({TEXTO}) gin_trgm_ops) WHERE status = 'active'"
+        )
+
+
+def downgrade():
+    if op.get_context().dialect.name == 'sqlite':
+        for sufijo in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS delivered_pieces_fts_{sufijo}")
+        op.execute("DROP TABLE IF EXISTS delivered_pieces_fts")
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_delivered_pieces_busqueda")
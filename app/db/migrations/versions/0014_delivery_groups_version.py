@@ -0,0 +1,33 @@
+"""Versión de delivery_groups para el GET condicional de entregas
+
+Revision ID: 0014_delivery_groups_version
+Revises: 0013_delivery_search
+Create Date: 2026-10-18
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+import pytz
+
+
+revision = '0014_delivery_groups_version'
+down_revision = '0013_delivery_search'
+branch_labels = None
+depends_on = None
+
+table_versions = sa.table(
+    'table_versions',
+    sa.column('tabla', sa.String),
+    sa.column('version', sa.BigInteger),
+    sa.column('actualizado', sa.DateTime),
+)
+
+
+def upgrade():
+    ahora = datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None, microsecond=0)
+    op.bulk_insert(table_versions, [{'tabla': 'delivery_groups', 'version': 1, 'actualizado': ahora}])
+
+
+def downgrade():
+    op.execute(table_versions.delete().where(table_versions.c.tabla == 'delivery_groups'))
@@ -0,0 +1,32 @@
+"""Índice de expresión para el orden por lote de los grupos de entregas
+
+Revision ID: 0015_delivery_groups_lot_order
+Revises: 0014_delivery_groups_version
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0015_delivery_groups_lot_order'
+down_revision = '0014_delivery_groups_version'
+branch_labels = None
+depends_on = None
+
+ACTIVAS = {
+    'postgresql_where': sa.text("status = 'active'"),
+    'sqlite_where': sa.text("status = 'active'"),
+}
+
+
+def upgrade():
+    # El listado ordena por coalesce(lot, ''): (lot, id) no sirve para ese orden
+    create_index_concurrently(
+        'ix_delivery_groups_active_lot_orden', 'delivery_groups',
+        [sa.text("coalesce(lot, '')"), 'id'],
+        **ACTIVAS
+    )
+
+
+def downgrade():
+    drop_index_concurrently('ix_delivery_groups_active_lot_orden', 'delivery_groups')
@@ -0,0 +1,28 @@
+"""Quita el índice parcial de trabajadores activos
+
+Revision ID: 0016_drop_workers_activos_index
+Revises: 0015_delivery_groups_lot_order
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from app.db.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = '0016_drop_workers_activos_index'
+down_revision = '0015_delivery_groups_lot_order'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (id) WHERE activo no sirve a los listados de activos, que leen filas
+    # completas de casi toda la tabla; la búsqueda por id ya usa la llave primaria
+    drop_index_concurrently('ix_workers_activos', 'workers')
+
+
+def downgrade():
+    create_index_concurrently(
+        'ix_workers_activos', 'workers', ['id'],
+        postgresql_where=sa.text("activo"),
+        sqlite_where=sa.text("activo = 1")
+    )
@@ -1,5 +1,9 @@
 from app.db.models.assistence_model import Assistence
+from app.db.models.assistence_monthly_model import AssistenceMonthly
 from app.db.models.worker_model import Worker
 from app.db.models.user_model import User
+from app.db.models.factory_model import Factory
+from app.db.models.delivery_models import DeliveredPieces, DeliveryGroup
+from app.db.models.table_version_model import TableVersion
 
-__all__ = ['Assistence', 'Worker', 'User']
+__all__ = ['Assistence', 'AssistenceMonthly', 'Worker', 'User', 'Factory', 'DeliveredPieces', 'DeliveryGroup', 'TableVersion']
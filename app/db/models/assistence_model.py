@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
 from datetime import datetime
 import pytz
 from app.db.models.base import Base
@@ -10,10 +10,25 @@ class Assistence(Base):
     __tablename__ = "assistence"
     
     id_assistence = Column(Integer, primary_key=True, autoincrement=True)
-    worker = Column(String(100), nullable=False)
+    worker = Column(String(100), nullable=False)  # Nombre para mostrar
+    worker_id = Column(Integer, ForeignKey('workers.id', name='fk_assistence_worker_id_workers'), nullable=True)
     arrival_time = Column(DateTime, nullable=False)
     departure_time = Column(DateTime, nullable=True)
-    fecha_creacion = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
+    attendance_date = Column(Date, nullable=False)  # Fecha local de Bogotá de la llegada
+    client_event_id = Column(String(64), nullable=True)  # Id del escaneo generado por el kiosco (lotes)
+    fecha_creacion = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None))
+
+    __table_args__ = (
+        # Una llegada por trabajador y día; también sirve las consultas del día
+        Index('uq_assistence_attendance_date_worker_id', attendance_date, worker_id, unique=True),
+        # Reenvíos del mismo escaneo desde el kiosco no se registran dos veces.
+        # Incluye attendance_date porque en PostgreSQL la tabla está particionada
+        # por esa columna (ver app/db/partitions.py)
+        Index('uq_assistence_client_event_id', client_event_id, attendance_date, unique=True),
+        # Historial paginado por (arrival_time, id_assistence), general y por trabajador
+        Index('ix_assistence_arrival_time_id', arrival_time, id_assistence),
+        Index('ix_assistence_worker_id_arrival_time', worker_id, arrival_time, id_assistence),
+    )
     
     def __repr__(self):
-        return f"<Assistence(id={self.id_assistence}, worker='{self.worker}', arrival_time='{self.arrival_time}')>"
+        return f"<Assistence(id={self.id_assistence}, worker_id={self.worker_id}, worker='{self.worker}', arrival_time='{self.arrival_time}')>"
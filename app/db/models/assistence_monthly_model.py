@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, DateTime, ForeignKey
+from datetime import datetime
+import pytz
+from app.db.models.base import Base
+
+
+class AssistenceMonthly(Base):
+    """
+    Resumen mensual de asistencia por trabajador.
+    Se actualiza en cada salida (jornada cerrada) y se puede reconstruir con
+    `python manage.py rebuild-resumen-mensual`.
+    """
+    __tablename__ = "assistence_monthly"
+    
+    worker_id = Column(Integer, ForeignKey('workers.id', name='fk_assistence_monthly_worker_id_workers'), primary_key=True)
+    periodo = Column(Date, primary_key=True)  # Primer día del mes
+    dias = Column(Integer, nullable=False, default=0)  # Jornadas cerradas
+    segundos_totales = Column(BigInteger, nullable=False, default=0)
+    llegadas_tarde = Column(Integer, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None))
+    
+    def __repr__(self):
+        return f"<AssistenceMonthly(worker_id={self.worker_id}, periodo='{self.periodo}', dias={self.dias})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Index, func, literal_column, text
 from app.db.models.base import Base
 from datetime import date, datetime
 
@@ -40,5 +40,99 @@ class DeliveredPieces(Base):
     modified_by = Column(String(100), nullable=True)
     status = Column(String(20), default="active", nullable=False)
 
+    __table_args__ = (
+        # Entregas activas por grupo (listado y detalle de grupo)
+        Index(
+            'ix_delivered_pieces_active_group',
+            id_group, id_delivery,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Sincronización incremental (/api/deliveries/changes)
+        Index('ix_delivered_pieces_modification_date', modification_date, id_delivery),
+    )
+
     def __repr__(self):
         return f"<DeliveredPieces(id_delivery={self.id_delivery}, owner={self.owner}, date={self.date}, status={self.status})>"
+
+
+
+class DeliveryGroup(Base):
+    """
+    Encabezado de un grupo de entregas (filas de delivered_pieces con el mismo
+    id_group) con sus totales. DeliveryService lo recalcula en cada cambio y
+    se puede reconstruir con `python manage.py rebuild-delivery-groups`.
+    """
+    __tablename__ = "delivery_groups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    id_group = Column(String(50), nullable=False, unique=True)
+
+    # Datos de la entrega más reciente del grupo (activa, si hay alguna)
+    id_delivery = Column(Integer, nullable=False)
+    owner = Column(String(100), nullable=False)
+    date = Column(Date, nullable=False)
+    lot = Column(String(50), nullable=True)
+
+    # Totales de las filas activas
+    filas = Column(Integer, nullable=False, default=0)
+    total_piezas = Column(BigInteger, nullable=False, default=0)
+    sz6_12 = Column(BigInteger, nullable=False, default=0)
+    sz12_18 = Column(BigInteger, nullable=False, default=0)
+    sz18_24 = Column(BigInteger, nullable=False, default=0)
+    sz24_36 = Column(BigInteger, nullable=False, default=0)
+    sz36_48 = Column(BigInteger, nullable=False, default=0)
+    sz2 = Column(BigInteger, nullable=False, default=0)
+    sz4 = Column(BigInteger, nullable=False, default=0)
+    sz6 = Column(BigInteger, nullable=False, default=0)
+    sz8 = Column(BigInteger, nullable=False, default=0)
+    sz10 = Column(BigInteger, nullable=False, default=0)
+    sz12 = Column(BigInteger, nullable=False, default=0)
+    sz14 = Column(BigInteger, nullable=False, default=0)
+    sz16 = Column(BigInteger, nullable=False, default=0)
+    sz18 = Column(BigInteger, nullable=False, default=0)
+
+    # 'active' mientras el grupo tenga filas activas
+    status = Column(String(20), default="active", nullable=False)
+    modification_date = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Listado ordenado por fecha (orden por defecto)
+        Index(
+            'ix_delivery_groups_active_date',
+            date, id,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Listado de un responsable (rol taller)
+        Index(
+            'ix_delivery_groups_active_owner_date',
+            owner, date, id,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Filtro por lote
+        Index(
+            'ix_delivery_groups_active_lot',
+            lot, id,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Orden por lote (los grupos sin lote van primero, como '')
+        Index(
+            'ix_delivery_groups_active_lot_orden',
+            func.coalesce(lot, literal_column("''")), id,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Orden por cantidad de piezas
+        Index(
+            'ix_delivery_groups_active_total',
+            total_piezas, id,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<DeliveryGroup(id={self.id}, id_group={self.id_group}, filas={self.filas}, total_piezas={self.total_piezas})>"
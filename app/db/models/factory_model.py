@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from app.db.models.base import Base
 
 
@@ -10,5 +10,10 @@ class Factory(Base):
     owner = Column(String(100), nullable=False)
     document = Column(String(50), nullable=True)
 
+    __table_args__ = (
+        # Login de talleres por documento
+        Index('ix_factories_document', document),
+    )
+
     def __repr__(self):
         return f"<Factory(id_factory={self.id_factory}, owner='{self.owner}')>"
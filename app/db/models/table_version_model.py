@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from app.db.models.base import Base
+
+
+class TableVersion(Base):
+    """
+    Versión de una tabla: aumenta en cada transacción que la modifica.
+    Los listados la usan como ETag para responder 304 sin leer las filas.
+    """
+    __tablename__ = "table_versions"
+
+    tabla = Column(String(63), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    actualizado = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<TableVersion(tabla='{self.tabla}', version={self.version})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from app.db.models.base import Base
 
 
@@ -13,5 +13,10 @@ class User(Base):
     rol = Column(String(50), nullable=False)
     estado = Column(Integer, default=1, nullable=False)  # 1 = activo, 0 = inactivo
 
+    __table_args__ = (
+        # Login: búsqueda por usuario y estado
+        Index('ix_users_username_estado', username, estado),
+    )
+
     def __repr__(self):
         return f"<User(id_user={self.id_user}, username='{self.username}', rol='{self.rol}', estado={self.estado})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Numeric, Index
 from datetime import datetime
 from app.db.models.base import Base
 
@@ -18,5 +18,10 @@ class Worker(Base):
     email = Column(String(100), nullable=True)
     reference_id = Column(String(50), nullable=True)
 
+    __table_args__ = (
+        # Marcación por código de barras
+        Index('ix_workers_reference_id', reference_id),
+    )
+
     def __repr__(self):
         return f"<Worker(id={self.id}, nombre='{self.nombre}', apellido='{self.apellido}', cedula='{self.cedula}')>"
@@ -0,0 +1,214 @@
+"""
+Particiones mensuales de la tabla assistence (solo PostgreSQL).
+
+La tabla está particionada por rango de attendance_date, un mes por
+partición (assistence_YYYY_MM), más una partición por defecto que recibe
+filas fuera de los meses creados. Las consultas del día solo tocan la
+partición del mes y la retención se hace desacoplando particiones viejas.
+
+En SQLite la tabla no se particiona y estas funciones no hacen nada.
+"""
+
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+import pytz
+
+TABLA = "assistence"
+PARTICION_DEFAULT = f"{TABLA}_default"
+ESQUEMA_ARCHIVO = "archivo"
+
+# Meses futuros que se dejan creados (además del actual)
+MESES_ADELANTE = int(os.getenv("ASSISTENCE_PARTICIONES_ADELANTE", "2"))
+
+_PATRON_PARTICION = re.compile(rf"^{TABLA}_(\d{{4}})_(\d{{2}})$")
+
+
+def inicio_de_mes(fecha: date) -> date:
+    return fecha.replace(day=1)
+
+
+def mes_siguiente(fecha: date) -> date:
+    return (fecha.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"{TABLA}_{mes:%Y_%m}"
+
+
+def es_tabla_particion(nombre: str) -> bool:
+    """Indica si el nombre corresponde a una partición de assistence"""
+    return nombre == PARTICION_DEFAULT or bool(_PATRON_PARTICION.match(nombre))
+
+
+def es_particionada(conn) -> bool:
+    """Indica si assistence es una tabla particionada de PostgreSQL"""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(
+        text(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table p
+                JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.relname = :tabla AND pg_table_is_visible(c.oid)
+            )
+            """
+        ),
+        {"tabla": TABLA}
+    ).scalar())
+
+
+def _bloquear(conn):
+    """Serializa la administración de particiones entre procesos (hasta el fin de la transacción)"""
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:clave))"), {"clave": f"{TABLA}_particiones"})
+
+
+def listar_particiones(conn) -> list:
+    """Meses (primer día) con partición creada, en orden"""
+    nombres = conn.execute(
+        text(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :tabla AND pg_table_is_visible(p.oid)
+            """
+        ),
+        {"tabla": TABLA}
+    ).scalars()
+
+    meses = []
+    for nombre in nombres:
+        coincidencia = _PATRON_PARTICION.match(nombre)
+        if coincidencia:
+            meses.append(date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1))
+    return sorted(meses)
+
+
+def primer_mes_conservado(conn):
+    """
+    Primer mes cuyas asistencias siguen en la tabla: el de la partición
+    acoplada más antigua, o uno anterior si la partición por defecto guarda
+    filas más viejas. Los meses previos fueron archivados o eliminados.
+    Devuelve None si la tabla no está particionada.
+    """
+    if not es_particionada(conn):
+        return None
+
+    meses = listar_particiones(conn)
+    if conn.execute(text("SELECT to_regclass(:tabla)"), {"tabla": PARTICION_DEFAULT}).scalar():
+        sin_particion = conn.execute(text(f"SELECT min(attendance_date) FROM {PARTICION_DEFAULT}")).scalar()
+        if sin_particion is not None:
+            meses.append(inicio_de_mes(sin_particion))
+    if not meses:
+        return inicio_de_mes(datetime.now(pytz.timezone('America/Bogota')).date())
+    return min(meses)
+
+
+def crear_particion_default(conn):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {PARTICION_DEFAULT} PARTITION OF {TABLA} DEFAULT"))
+
+
+def crear_particion(conn, mes: date):
+    """
+    Crea la partición del mes. Si la partición por defecto ya tiene filas de
+    ese mes, se mueven a la nueva partición antes de acoplarla.
+    """
+    mes = inicio_de_mes(mes)
+    nombre = nombre_particion(mes)
+    rango = {"desde": mes, "hasta": mes_siguiente(mes)}
+
+    pendientes = conn.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {PARTICION_DEFAULT} "
+            "WHERE attendance_date >= :desde AND attendance_date < :hasta)"
+        ),
+        rango
+    ).scalar()
+
+    limites = f"FROM ('{rango['desde']:%Y-%m-%d}') TO ('{rango['hasta']:%Y-%m-%d}')"
+    if not pendientes:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {nombre} PARTITION OF {TABLA} FOR VALUES {limites}"))
+        return
+
+    conn.execute(text(f"CREATE TABLE {nombre} (LIKE {TABLA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(
+            f"""
+            WITH movidas AS (
+                DELETE FROM {PARTICION_DEFAULT}
+                WHERE attendance_date >= :desde AND attendance_date < :hasta
+                RETURNING *
+            )
+            INSERT INTO {nombre} SELECT * FROM movidas
+            """
+        ),
+        rango
+    )
+    conn.execute(text(f"ALTER TABLE {TABLA} ATTACH PARTITION {nombre} FOR VALUES {limites}"))
+
+
+def asegurar_particiones(conn, desde: date = None, meses_adelante: int = None) -> list:
+    """
+    Crea las particiones que falten desde `desde` (por defecto, el mes actual)
+    hasta `meses_adelante` meses después del actual.
+
+    Returns:
+        list: Nombres de las particiones creadas
+    """
+    if not es_particionada(conn):
+        return []
+
+    if meses_adelante is None:
+        meses_adelante = MESES_ADELANTE
+
+    _bloquear(conn)
+    crear_particion_default(conn)
+    existentes = set(listar_particiones(conn))
+
+    actual = inicio_de_mes(datetime.now(pytz.timezone('America/Bogota')).date())
+    mes = inicio_de_mes(desde) if desde else actual
+    ultimo = actual
+    for _ in range(meses_adelante):
+        ultimo = mes_siguiente(ultimo)
+
+    creadas = []
+    while mes <= ultimo:
+        if mes not in existentes:
+            crear_particion(conn, mes)
+            creadas.append(nombre_particion(mes))
+        mes = mes_siguiente(mes)
+    return creadas
+
+
+def archivar_particiones(conn, antes_de: date, eliminar: bool = False) -> list:
+    """
+    Desacopla las particiones de meses anteriores a `antes_de`.
+    Se mueven al esquema `archivo` (consultables y respaldables aparte) o,
+    con `eliminar`, se borran. El resumen mensual de horas se conserva.
+
+    Returns:
+        list: Nombres de las particiones archivadas o eliminadas
+    """
+    if not es_particionada(conn):
+        return []
+
+    _bloquear(conn)
+    if not eliminar:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA_ARCHIVO}"))
+
+    procesadas = []
+    for mes in listar_particiones(conn):
+        if mes >= inicio_de_mes(antes_de):
+            break
+        nombre = nombre_particion(mes)
+        conn.execute(text(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre}"))
+        if eliminar:
+            conn.execute(text(f"DROP TABLE {nombre}"))
+        else:
+            conn.execute(text(f"ALTER TABLE {nombre} SET SCHEMA {ESQUEMA_ARCHIVO}"))
+        procesadas.append(nombre)
+    return procesadas
@@ -0,0 +1,105 @@
+"""
+Construcciones SQL que dependen del motor de base de datos
+"""
+
+from sqlalchemy import BigInteger, Date, Float, Time
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+def dialect_insert(db, table):
+    """
+    INSERT del dialecto de la sesión, con soporte para ON CONFLICT.
+    PostgreSQL y SQLite comparten on_conflict_do_nothing / on_conflict_do_update.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+class horas_entre(FunctionElement):
+    """
+    Horas (decimales) entre dos columnas DateTime, calculadas en la base.
+    Uso: horas_entre(Assistence.arrival_time, Assistence.departure_time)
+    Es NULL si alguna de las dos es NULL.
+    """
+    type = Float()
+    inherit_cache = True
+    name = "horas_entre"
+
+
+@compiles(horas_entre, "postgresql")
+def _horas_entre_postgresql(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return "(EXTRACT(EPOCH FROM (%s - %s)) / 3600.0)" % (
+        compiler.process(fin, **kw), compiler.process(inicio, **kw)
+    )
+
+
+@compiles(horas_entre, "sqlite")
+def _horas_entre_sqlite(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return "((julianday(%s) - julianday(%s)) * 24.0)" % (
+        compiler.process(fin, **kw), compiler.process(inicio, **kw)
+    )
+
+
+class segundos_entre(FunctionElement):
+    """
+    Segundos enteros entre dos columnas DateTime (se ignoran las fracciones
+    de segundo de cada extremo, igual que el cálculo incremental en Python).
+    """
+    type = BigInteger()
+    inherit_cache = True
+    name = "segundos_entre"
+
+
+@compiles(segundos_entre, "postgresql")
+def _segundos_entre_postgresql(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return "CAST(EXTRACT(EPOCH FROM (date_trunc('second', %s) - date_trunc('second', %s))) AS BIGINT)" % (
+        compiler.process(fin, **kw), compiler.process(inicio, **kw)
+    )
+
+
+@compiles(segundos_entre, "sqlite")
+def _segundos_entre_sqlite(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return "(CAST(strftime('%%s', %s) AS INTEGER) - CAST(strftime('%%s', %s) AS INTEGER))" % (
+        compiler.process(fin, **kw), compiler.process(inicio, **kw)
+    )
+
+
+class inicio_de_mes(FunctionElement):
+    """Primer día del mes de una columna Date/DateTime"""
+    type = Date()
+    inherit_cache = True
+    name = "inicio_de_mes"
+
+
+@compiles(inicio_de_mes, "postgresql")
+def _inicio_de_mes_postgresql(element, compiler, **kw):
+    return "CAST(date_trunc('month', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(inicio_de_mes, "sqlite")
+def _inicio_de_mes_sqlite(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
+
+
+class hora_del_dia(FunctionElement):
+    """Hora (al segundo) de una columna DateTime, comparable con datetime.time"""
+    type = Time()
+    inherit_cache = True
+    name = "hora_del_dia"
+
+
+@compiles(hora_del_dia, "postgresql")
+def _hora_del_dia_postgresql(element, compiler, **kw):
+    return "CAST(date_trunc('second', %s) AS TIME)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(hora_del_dia, "sqlite")
+def _hora_del_dia_sqlite(element, compiler, **kw):
+    return "time(%s)" % compiler.process(element.clauses, **kw)
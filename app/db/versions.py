@@ -0,0 +1,107 @@
+"""
+Versión por tabla para GET condicionales (ETag / Last-Modified).
+
+Cada sesión anota las tablas versionadas que modifica (flush del ORM y
+sentencias insert/update/delete ejecutadas con la sesión) y, justo antes del
+commit, aumenta su contador en table_versions dentro de la misma
+transacción. Las escrituras que no pasan por la sesión (p. ej. COPY) se
+anotan con `marcar_modificada`.
+
+Los listados leen solo la versión: si coincide con If-None-Match responden
+304 sin consultar ni serializar las filas.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+import pytz
+from app.db.models.table_version_model import TableVersion
+
+BOGOTA_TZ = pytz.timezone('America/Bogota')
+
+# Tablas cuyos listados admiten GET condicional
+TABLAS_VERSIONADAS = frozenset({"delivered_pieces", "delivery_groups", "workers", "factories"})
+
+
+def marcar_modificada(db, *tablas):
+    """Anota tablas modificadas por la transacción actual de la sesión"""
+    db.info.setdefault("tablas_modificadas", set()).update(
+        tabla for tabla in tablas if tabla in TABLAS_VERSIONADAS
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _anotar_flush(session, flush_context):
+    tablas = set()
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        tabla = getattr(objeto, "__tablename__", None)
+        if tabla and (objeto not in session.dirty or session.is_modified(objeto)):
+            tablas.add(tabla)
+    marcar_modificada(session, *tablas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _anotar_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabla = getattr(orm_execute_state.statement, "table", None)
+        if tabla is not None:
+            marcar_modificada(orm_execute_state.session, tabla.name)
+
+
+@event.listens_for(Session, "before_commit")
+def _aumentar_versiones(session):
+    # Un flush pendiente puede anotar más tablas
+    session.flush()
+    tablas = session.info.pop("tablas_modificadas", None)
+    if not tablas:
+        return
+    session.execute(
+        update(TableVersion)
+        .where(TableVersion.tabla.in_(sorted(tablas)))
+        .values(
+            version=TableVersion.version + 1,
+            actualizado=datetime.now(BOGOTA_TZ).replace(tzinfo=None, microsecond=0)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar(session):
+    session.info.pop("tablas_modificadas", None)
+
+
+def obtener_version(db, *tablas: str):
+    """
+    Versión actual de una o varias tablas. Con varias (un listado que lee
+    de más de una), el ETag combina sus contadores y Last-Modified es el
+    cambio más reciente.
+
+    Returns:
+        tuple: (etag, encabezados HTTP de caché)
+    """
+    filas = {
+        fila.tabla: fila
+        for fila in db.execute(
+            select(TableVersion.tabla, TableVersion.version, TableVersion.actualizado)
+            .where(TableVersion.tabla.in_(tablas))
+        )
+    }
+    versiones = [(tabla, filas[tabla].version if tabla in filas else 0) for tabla in tablas]
+    actualizados = [fila.actualizado for fila in filas.values() if fila.actualizado is not None]
+
+    etag = 'W/"{}"'.format(".".join(f"{tabla}-{version}" for tabla, version in versiones))
+    encabezados = {"ETag": etag, "Cache-Control": "no-cache"}
+    if actualizados:
+        encabezados["Last-Modified"] = format_datetime(BOGOTA_TZ.localize(max(actualizados)).astimezone(timezone.utc), usegmt=True)
+    return etag, encabezados
+
+
+def no_modificado(request, etag: str) -> bool:
+    """Indica si el cliente ya tiene la versión (If-None-Match)"""
+    candidatos = request.headers.get("if-none-match")
+    if not candidatos:
+        return False
+    return candidatos.strip() == "*" or etag in [c.strip() for c in candidatos.split(",")]
@@ -3,25 +3,83 @@ Servicio de asistencia y trabajadores
 Proporciona funciones para gestionar asistencias y trabajadores
 """
 
-from datetime import datetime, date
-from sqlalchemy import func
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import select, update, func, cast, case, tuple_, Numeric
 from sqlalchemy.exc import IntegrityError
 from app.db.models import Worker
 from app.db.models.assistence_model import Assistence
+from app.db.sql import dialect_insert, horas_entre
+from app.db.events import on_commit
+from app.service.worker_index import WorkerIndex
+from app.service.cost_engine import CostEngine
+from app.service.attendance_feed import AttendanceFeed
+from app.service.attendance_rollup import AttendanceRollup
+from app.utils.pagination import codificar_cursor, decodificar_cursor
 import pytz
 
 
 def obtener_fecha_hora_bogota():
-    """Obtiene la fecha y hora actual en zona horaria de Bogotá"""
+    """
+    Obtiene la fecha y hora actual en zona horaria de Bogotá.
+    Se retorna sin tzinfo porque las columnas son DateTime sin zona
+    (asyncpg rechaza datetimes con zona en esas columnas).
+    """
     bogota_tz = pytz.timezone('America/Bogota')
     ahora = datetime.now(bogota_tz)
-    return ahora
+    return ahora.replace(tzinfo=None)
 
 
 # ==================
 # FUNCIONES DE ASISTENCIA
 # ==================
 
+def _fila_asistencia(id_assistence: int, worker_id, worker: str,
+                     arrival_time: datetime, departure_time: datetime = None):
+    """Representación de una asistencia del día (API y feed en vivo)"""
+    horas_trabajadas = None
+    if departure_time:
+        tiempo_trabajado = departure_time - arrival_time
+        horas_trabajadas = round(tiempo_trabajado.total_seconds() / 3600, 2)
+    
+    return {
+        "id_assistence": id_assistence,
+        "worker_id": worker_id,
+        "worker": worker,
+        "arrival_time": arrival_time.isoformat(),
+        "departure_time": departure_time.isoformat() if departure_time else None,
+        "hora_llegada": arrival_time.strftime("%H:%M:%S"),
+        "hora_salida": departure_time.strftime("%H:%M:%S") if departure_time else "---",
+        "horas_trabajadas": horas_trabajadas,
+        "estado": "Salió" if departure_time else "Presente"
+    }
+
+
+def _publicar_al_confirmar(db, evento: str, fila: dict):
+    """Difunde la marcación a las pantallas en vivo cuando se confirme"""
+    on_commit(db, lambda: AttendanceFeed.publicar(evento, fila))
+
+
+def _insertar_llegada(db, worker_id: int, nombre: str, ahora: datetime):
+    """
+    Inserta la llegada del día en una sola sentencia.
+    ON CONFLICT sobre (attendance_date, worker_id) detecta la llegada
+    duplicada sin consulta previa, incluso con dos escaneos simultáneos.
+    
+    Returns:
+        Row (id_assistence, arrival_time) o None si ya estaba marcado hoy
+    """
+    stmt = dialect_insert(db, Assistence).values(
+        worker=nombre,
+        worker_id=worker_id,
+        arrival_time=ahora,
+        attendance_date=ahora.date()
+    ).on_conflict_do_nothing(
+        index_elements=[Assistence.attendance_date, Assistence.worker_id]
+    ).returning(Assistence.id_assistence, Assistence.arrival_time)
+    
+    return db.execute(stmt).first()
+
+
 def marcar_llegada(db, worker_id: int):
     """
     Marca la llegada de un trabajador
@@ -34,8 +92,8 @@ def marcar_llegada(db, worker_id: int):
         dict: {"success": bool, "message": str, "data": dict}
     """
     try:
-        # Obtener el trabajador
-        worker = db.query(Worker).filter(Worker.id == worker_id).first()
+        # Obtener el trabajador (índice en memoria)
+        worker = WorkerIndex.por_id(db, worker_id)
         
         if not worker:
             return {
@@ -46,34 +104,25 @@ def marcar_llegada(db, worker_id: int):
         # Obtener la fecha de hoy en Bogotá
         ahora = obtener_fecha_hora_bogota()
         
-        # Verificar si ya hay un registro de llegada hoy
-        asistencia_hoy = db.query(Assistence).filter(
-            Assistence.worker == worker.nombre,
-            func.DATE(Assistence.arrival_time) == ahora.date()
-        ).first()
+        # Insertar la llegada; si ya existe la de hoy no se retorna fila
+        nueva_asistencia = _insertar_llegada(db, worker.id, worker.nombre, ahora)
         
-        if asistencia_hoy:
+        if nueva_asistencia is None:
             return {
                 "success": False,
                 "error": f"El trabajador {worker.nombre} ya fue marcado hoy"
             }
         
-        # Crear nuevo registro de asistencia
-        nueva_asistencia = Assistence(
-            worker=worker.nombre,
-            arrival_time=ahora
-        )
-        
-        db.add(nueva_asistencia)
-        db.commit()
-        db.refresh(nueva_asistencia)
+        _publicar_al_confirmar(db, "llegada", _fila_asistencia(
+            nueva_asistencia.id_assistence, worker.id, worker.nombre, nueva_asistencia.arrival_time
+        ))
         
         return {
             "success": True,
             "message": f"Llegada marcada para {worker.nombre}",
             "data": {
                 "id": nueva_asistencia.id_assistence,
-                "worker": nueva_asistencia.worker,
+                "worker": worker.nombre,
                 "arrival_time": nueva_asistencia.arrival_time.isoformat(),
                 "fecha": nueva_asistencia.arrival_time.strftime("%d/%m/%Y"),
                 "hora": nueva_asistencia.arrival_time.strftime("%H:%M:%S")
@@ -99,8 +148,8 @@ def marcar_llegada_por_reference_id(db, reference_id: str):
         dict: {"success": bool, "message": str, "data": dict}
     """
     try:
-        # Obtener el trabajador por reference_id
-        worker = db.query(Worker).filter(Worker.reference_id == reference_id).first()
+        # Obtener el trabajador por reference_id (índice en memoria)
+        worker = WorkerIndex.por_reference_id(db, reference_id)
         
         if not worker:
             return {
@@ -111,27 +160,18 @@ def marcar_llegada_por_reference_id(db, reference_id: str):
         # Obtener la fecha de hoy en Bogotá
         ahora = obtener_fecha_hora_bogota()
         
-        # Verificar si ya hay un registro de llegada hoy
-        asistencia_hoy = db.query(Assistence).filter(
-            Assistence.worker == worker.nombre,
-            func.DATE(Assistence.arrival_time) == ahora.date()
-        ).first()
+        # Insertar la llegada; si ya existe la de hoy no se retorna fila
+        nueva_asistencia = _insertar_llegada(db, worker.id, worker.nombre, ahora)
         
-        if asistencia_hoy:
+        if nueva_asistencia is None:
             return {
                 "success": False,
                 "error": f"El trabajador {worker.nombre} ya fue marcado hoy"
             }
         
-        # Crear nuevo registro de asistencia
-        nueva_asistencia = Assistence(
-            worker=worker.nombre,
-            arrival_time=ahora
-        )
-        
-        db.add(nueva_asistencia)
-        db.commit()
-        db.refresh(nueva_asistencia)
+        _publicar_al_confirmar(db, "llegada", _fila_asistencia(
+            nueva_asistencia.id_assistence, worker.id, worker.nombre, nueva_asistencia.arrival_time
+        ))
         
         return {
             "success": True,
@@ -152,6 +192,160 @@ def marcar_llegada_por_reference_id(db, reference_id: str):
         }
 
 
+# Máximo de eventos aceptados en un lote de marcaciones
+LOTE_MAXIMO = 500
+
+
+def _hora_cliente(client_timestamp: datetime, ahora: datetime):
+    """
+    Hora del escaneo en hora local de Bogotá (sin tzinfo).
+    Si el reloj del kiosco está adelantado se usa la hora del servidor.
+    """
+    if client_timestamp.tzinfo is not None:
+        client_timestamp = client_timestamp.astimezone(
+            pytz.timezone('America/Bogota')
+        ).replace(tzinfo=None)
+    return min(client_timestamp, ahora)
+
+
+def _resultado_evento(evento: dict, estado: str, success: bool, mensaje: str, **datos):
+    """Resultado individual de un evento del lote"""
+    return {
+        "client_event_id": evento["client_event_id"],
+        "reference_id": evento["reference_id"],
+        "success": success,
+        "estado": estado,
+        "message": mensaje,
+        **datos
+    }
+
+
+def marcar_llegadas_lote(db, eventos: list):
+    """
+    Registra un lote de escaneos enviados por un kiosco.
+    
+    Los eventos se deduplican por client_event_id (dentro del lote y contra
+    envíos anteriores) y todas las llegadas se insertan en una sola sentencia
+    con ON CONFLICT DO NOTHING. Cada evento recibe un estado final:
+    - registrado: llegada creada
+    - duplicado: el evento ya había sido procesado
+    - ya_marcado: el trabajador ya tenía llegada ese día
+    - no_encontrado: no existe trabajador con ese código
+    El kiosco puede descartar de su cola todo evento con respuesta.
+    
+    Args:
+        db: Sesión de base de datos
+        eventos: Lista de dicts con reference_id, client_timestamp y client_event_id
+        
+    Returns:
+        dict: {"success": bool, "data": list, "total": int, "registrados": int}
+    """
+    if len(eventos) > LOTE_MAXIMO:
+        return {
+            "success": False,
+            "error": f"El lote supera el máximo de {LOTE_MAXIMO} eventos"
+        }
+    
+    try:
+        resultados = [None] * len(eventos)
+        pendientes = []
+        vistos = set()
+        
+        # Duplicados dentro del mismo lote
+        for indice, evento in enumerate(eventos):
+            if evento["client_event_id"] in vistos:
+                resultados[indice] = _resultado_evento(
+                    evento, "duplicado", True, "Evento repetido en el lote"
+                )
+                continue
+            vistos.add(evento["client_event_id"])
+            pendientes.append(indice)
+        
+        # Eventos ya procesados en envíos anteriores (reintentos del kiosco)
+        procesados = {}
+        if vistos:
+            procesados = dict(db.execute(
+                select(Assistence.client_event_id, Assistence.id_assistence)
+                .where(Assistence.client_event_id.in_(list(vistos)))
+            ).all())
+        
+        ahora = obtener_fecha_hora_bogota()
+        filas = []
+        por_evento = {}
+        
+        for indice in pendientes:
+            evento = eventos[indice]
+            event_id = evento["client_event_id"]
+            
+            if event_id in procesados:
+                resultados[indice] = _resultado_evento(
+                    evento, "duplicado", True, "Evento ya registrado",
+                    id=procesados[event_id]
+                )
+                continue
+            
+            worker = WorkerIndex.por_reference_id(db, evento["reference_id"])
+            if not worker:
+                resultados[indice] = _resultado_evento(
+                    evento, "no_encontrado", False,
+                    f"No se encontró trabajador con código {evento['reference_id']}"
+                )
+                continue
+            
+            llegada = _hora_cliente(evento["client_timestamp"], ahora)
+            filas.append({
+                "worker": worker.nombre,
+                "worker_id": worker.id,
+                "arrival_time": llegada,
+                "attendance_date": llegada.date(),
+                "client_event_id": event_id
+            })
+            por_evento[event_id] = (indice, worker)
+        
+        insertadas = {}
+        if filas:
+            # El primer escaneo del día es la llegada: se insertan en orden
+            # cronológico y ON CONFLICT descarta los posteriores
+            filas.sort(key=lambda fila: fila["arrival_time"])
+            stmt = dialect_insert(db, Assistence).values(filas).on_conflict_do_nothing().returning(
+                Assistence.client_event_id, Assistence.id_assistence, Assistence.arrival_time
+            )
+            insertadas = {fila.client_event_id: fila for fila in db.execute(stmt)}
+        
+        for event_id, (indice, worker) in por_evento.items():
+            evento = eventos[indice]
+            fila = insertadas.get(event_id)
+            if fila is None:
+                resultados[indice] = _resultado_evento(
+                    evento, "ya_marcado", False,
+                    f"El trabajador {worker.nombre} ya fue marcado ese día"
+                )
+                continue
+            if fila.arrival_time.date() == ahora.date():
+                _publicar_al_confirmar(db, "llegada", _fila_asistencia(
+                    fila.id_assistence, worker.id, worker.nombre, fila.arrival_time
+                ))
+            resultados[indice] = _resultado_evento(
+                evento, "registrado", True, f"Llegada marcada para {worker.nombre}",
+                id=fila.id_assistence,
+                worker=f"{worker.nombre} {worker.apellido}",
+                arrival_time=fila.arrival_time.isoformat()
+            )
+        
+        return {
+            "success": True,
+            "data": resultados,
+            "total": len(resultados),
+            "registrados": len(insertadas)
+        }
+    except Exception as e:
+        db.rollback()
+        return {
+            "success": False,
+            "error": f"Error al registrar el lote de marcaciones: {str(e)}"
+        }
+
+
 def marcar_salida(db, assistence_id: int):
     """
     Marca la salida de un trabajador
@@ -164,29 +358,54 @@ def marcar_salida(db, assistence_id: int):
         dict: {"success": bool, "message": str, "data": dict}
     """
     try:
-        # Obtener la asistencia
-        asistencia = db.query(Assistence).filter(Assistence.id_assistence == assistence_id).first()
+        # Obtener la fecha y hora actual en Bogotá
+        ahora = obtener_fecha_hora_bogota()
         
-        if not asistencia:
-            return {
-                "success": False,
-                "error": "Registro de asistencia no encontrado"
-            }
+        # Actualización condicional: con dos salidas simultáneas solo una
+        # encuentra departure_time en NULL (la otra espera el bloqueo de la
+        # fila y ya no la actualiza), así el resumen mensual suma una vez
+        asistencia = db.execute(
+            update(Assistence)
+            .where(
+                Assistence.id_assistence == assistence_id,
+                Assistence.departure_time.is_(None)
+            )
+            .values(departure_time=ahora)
+            .returning(
+                Assistence.id_assistence,
+                Assistence.worker_id,
+                Assistence.worker,
+                Assistence.attendance_date,
+                Assistence.arrival_time,
+                Assistence.departure_time
+            )
+            .execution_options(synchronize_session=False)
+        ).first()
         
-        if asistencia.departure_time:
+        if asistencia is None:
+            trabajador = db.execute(
+                select(Assistence.worker).where(Assistence.id_assistence == assistence_id)
+            ).first()
+            if trabajador is None:
+                return {
+                    "success": False,
+                    "error": "Registro de asistencia no encontrado"
+                }
             return {
                 "success": False,
-                "error": f"El trabajador {asistencia.worker} ya tiene hora de salida registrada"
+                "error": f"El trabajador {trabajador.worker} ya tiene hora de salida registrada"
             }
         
-        # Obtener la fecha y hora actual en Bogotá
-        ahora = obtener_fecha_hora_bogota()
-        
-        # Actualizar la hora de salida
-        asistencia.departure_time = ahora
+        # Resumen mensual en la misma transacción
+        AttendanceRollup.registrar_salida(
+            db, asistencia.worker_id, asistencia.attendance_date,
+            asistencia.arrival_time, asistencia.departure_time
+        )
         
-        db.commit()
-        db.refresh(asistencia)
+        _publicar_al_confirmar(db, "salida", _fila_asistencia(
+            asistencia.id_assistence, asistencia.worker_id, asistencia.worker,
+            asistencia.arrival_time, asistencia.departure_time
+        ))
         
         # Calcular tiempo trabajado
         tiempo_trabajado = asistencia.departure_time - asistencia.arrival_time
@@ -231,28 +450,16 @@ def obtener_asistencias_hoy(db):
         
         # Obtener todas las asistencias de hoy
         asistencias = db.query(Assistence).filter(
-            func.DATE(Assistence.arrival_time) == hoy
+            Assistence.attendance_date == hoy
         ).all()
         
-        datos = []
-        for asistencia in asistencias:
-            tiempo_trabajado = None
-            horas_trabajadas = None
-            
-            if asistencia.departure_time:
-                tiempo_trabajado = asistencia.departure_time - asistencia.arrival_time
-                horas_trabajadas = round(tiempo_trabajado.total_seconds() / 3600, 2)
-            
-            datos.append({
-                "id_assistence": asistencia.id_assistence,
-                "worker": asistencia.worker,
-                "arrival_time": asistencia.arrival_time.isoformat(),
-                "departure_time": asistencia.departure_time.isoformat() if asistencia.departure_time else None,
-                "hora_llegada": asistencia.arrival_time.strftime("%H:%M:%S"),
-                "hora_salida": asistencia.departure_time.strftime("%H:%M:%S") if asistencia.departure_time else "---",
-                "horas_trabajadas": horas_trabajadas,
-                "estado": "Salió" if asistencia.departure_time else "Presente"
-            })
+        datos = [
+            _fila_asistencia(
+                asistencia.id_assistence, asistencia.worker_id, asistencia.worker,
+                asistencia.arrival_time, asistencia.departure_time
+            )
+            for asistencia in asistencias
+        ]
         
         return {
             "success": True,
@@ -268,6 +475,218 @@ def obtener_asistencias_hoy(db):
         }
 
 
+# Máximo de filas por página del historial
+HISTORIAL_LIMITE_MAXIMO = 500
+
+# Filas leídas del cursor del servidor por cada bloque del CSV
+EXPORTACION_FILAS_POR_LOTE = 1000
+
+
+def _horas_trabajadas(horas):
+    """Redondea en SQL a 2 decimales una expresión de horas"""
+    return func.round(cast(horas, Numeric), 2)
+
+
+def _filtro_historial(desde: date, hasta: date, worker_id: int = None):
+    """
+    Condiciones del rango [desde, hasta] (fechas locales de Bogotá).
+    Se filtra sobre arrival_time para recorrer los índices del historial y
+    sobre attendance_date para que PostgreSQL descarte las particiones
+    fuera del rango (ambas fechas coinciden).
+    """
+    condiciones = [
+        Assistence.attendance_date >= desde,
+        Assistence.attendance_date <= hasta,
+        Assistence.arrival_time >= datetime.combine(desde, time.min),
+        Assistence.arrival_time < datetime.combine(hasta + timedelta(days=1), time.min)
+    ]
+    if worker_id is not None:
+        condiciones.append(Assistence.worker_id == worker_id)
+    return condiciones
+
+
+def obtener_historial_asistencias(db, desde: date, hasta: date, worker_id: int = None,
+                                  cursor: str = None, limite: int = 100):
+    """
+    Historial de asistencias de un rango de fechas, paginado por keyset
+    sobre (arrival_time, id_assistence). Las horas se calculan en SQL.
+    
+    Args:
+        db: Sesión de base de datos
+        desde: Fecha inicial (inclusive)
+        hasta: Fecha final (inclusive)
+        worker_id: Filtrar por trabajador (opcional)
+        cursor: `next_cursor` de la página anterior (opcional)
+        limite: Filas por página
+        
+    Returns:
+        dict: {"success": bool, "data": list, "total": int, "next_cursor": str | None}
+    """
+    if desde > hasta:
+        return {
+            "success": False,
+            "error": "La fecha inicial no puede ser posterior a la final"
+        }
+    
+    condiciones = _filtro_historial(desde, hasta, worker_id)
+    
+    if cursor:
+        try:
+            arrival_time, id_assistence = decodificar_cursor(cursor, 2)
+            condiciones.append(
+                tuple_(Assistence.arrival_time, Assistence.id_assistence)
+                > tuple_(datetime.fromisoformat(arrival_time), int(id_assistence))
+            )
+        except (ValueError, TypeError):
+            return {
+                "success": False,
+                "error": "Cursor inválido"
+            }
+    
+    try:
+        horas = _horas_trabajadas(
+            horas_entre(Assistence.arrival_time, Assistence.departure_time)
+        ).label("horas_trabajadas")
+        
+        # Se pide una fila extra para saber si hay otra página
+        filas = db.execute(
+            select(
+                Assistence.id_assistence,
+                Assistence.worker_id,
+                Assistence.worker,
+                Assistence.attendance_date,
+                Assistence.arrival_time,
+                Assistence.departure_time,
+                horas
+            )
+            .where(*condiciones)
+            .order_by(Assistence.arrival_time, Assistence.id_assistence)
+            .limit(limite + 1)
+        ).all()
+        
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+        
+        datos = [
+            {
+                "id_assistence": fila.id_assistence,
+                "worker_id": fila.worker_id,
+                "worker": fila.worker,
+                "fecha": fila.attendance_date.isoformat(),
+                "arrival_time": fila.arrival_time.isoformat(),
+                "departure_time": fila.departure_time.isoformat() if fila.departure_time else None,
+                "horas_trabajadas": float(fila.horas_trabajadas) if fila.horas_trabajadas is not None else None
+            }
+            for fila in filas
+        ]
+        
+        siguiente = None
+        if hay_mas:
+            siguiente = codificar_cursor(filas[-1].arrival_time, filas[-1].id_assistence)
+        
+        return {
+            "success": True,
+            "data": datos,
+            "total": len(datos),
+            "next_cursor": siguiente
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error al obtener el historial de asistencias: {str(e)}",
+            "data": []
+        }
+
+
+def consulta_exportacion_asistencias(desde: date, hasta: date, worker_id: int = None):
+    """
+    SELECT para exportar asistencias de un rango, en orden de llegada y con
+    las horas calculadas en SQL. Se ejecuta en modo streaming (yield_per)
+    para recorrer rangos grandes con memoria constante.
+    """
+    return (
+        select(
+            Assistence.attendance_date,
+            Assistence.worker_id,
+            Assistence.worker,
+            Assistence.arrival_time,
+            Assistence.departure_time,
+            _horas_trabajadas(
+                horas_entre(Assistence.arrival_time, Assistence.departure_time)
+            ).label("horas_trabajadas")
+        )
+        .where(*_filtro_historial(desde, hasta, worker_id))
+        .order_by(Assistence.arrival_time, Assistence.id_assistence)
+        .execution_options(yield_per=EXPORTACION_FILAS_POR_LOTE)
+    )
+
+
+def obtener_resumen_asistencias(db, desde: date, hasta: date, worker_id: int = None):
+    """
+    Totales por trabajador en un rango de fechas, en un solo GROUP BY.
+    Las asistencias antiguas sin worker_id se agrupan por nombre.
+    
+    Args:
+        db: Sesión de base de datos
+        desde: Fecha inicial (inclusive)
+        hasta: Fecha final (inclusive)
+        worker_id: Filtrar por trabajador (opcional)
+        
+    Returns:
+        dict: {"success": bool, "data": list, "total": int}
+    """
+    if desde > hasta:
+        return {
+            "success": False,
+            "error": "La fecha inicial no puede ser posterior a la final"
+        }
+    
+    try:
+        horas = horas_entre(Assistence.arrival_time, Assistence.departure_time)
+        nombre = func.max(Assistence.worker)
+        
+        filas = db.execute(
+            select(
+                Assistence.worker_id,
+                nombre.label("worker"),
+                func.count(func.distinct(Assistence.attendance_date)).label("dias_presentes"),
+                func.count(Assistence.departure_time).label("jornadas_cerradas"),
+                _horas_trabajadas(func.coalesce(func.sum(horas), 0)).label("horas_totales")
+            )
+            .where(*_filtro_historial(desde, hasta, worker_id))
+            .group_by(
+                Assistence.worker_id,
+                case((Assistence.worker_id.is_(None), Assistence.worker))
+            )
+            .order_by(nombre)
+        ).all()
+        
+        datos = [
+            {
+                "worker_id": fila.worker_id,
+                "worker": fila.worker,
+                "dias_presentes": fila.dias_presentes,
+                "jornadas_cerradas": fila.jornadas_cerradas,
+                "horas_totales": float(fila.horas_totales)
+            }
+            for fila in filas
+        ]
+        
+        return {
+            "success": True,
+            "data": datos,
+            "total": len(datos),
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat()
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error al obtener el resumen de asistencias: {str(e)}",
+            "data": []
+        }
+
+
 # ==================
 # FUNCIONES DE TRABAJADORES
 # ==================
@@ -283,21 +702,22 @@ def obtener_trabajadores_activos(db):
         dict: {"success": bool, "data": list}
     """
     try:
-        trabajadores = db.query(Worker).filter(Worker.activo == True).all()
+        # Solo las columnas de la vista: filas planas, sin entidades del ORM
+        filas = db.execute(
+            select(
+                Worker.id,
+                Worker.nombre,
+                Worker.apellido,
+                Worker.cedula,
+                Worker.email,
+                Worker.telefono,
+                Worker.cargo,
+                Worker.salario,
+                Worker.activo
+            ).where(Worker.activo == True)
+        ).all()
         
-        datos = []
-        for trabajador in trabajadores:
-            datos.append({
-                "id": trabajador.id,
-                "nombre": trabajador.nombre,
-                "apellido": trabajador.apellido,
-                "cedula": trabajador.cedula,
-                "email": trabajador.email,
-                "telefono": trabajador.telefono,
-                "cargo": trabajador.cargo,
-                "salario": trabajador.salario,
-                "activo": trabajador.activo
-            })
+        datos = [{**fila._asdict(), "salario": float(fila.salario)} for fila in filas]
         
         return {
             "success": True,
@@ -353,8 +773,10 @@ def crear_trabajador(db, nombre: str, apellido: str, cedula: str, cargo: str,
         )
         
         db.add(nuevo_trabajador)
-        db.commit()
+        db.flush()
         db.refresh(nuevo_trabajador)
+        on_commit(db, WorkerIndex.invalidar)
+        on_commit(db, CostEngine.invalidar)
         
         return {
             "success": True,
@@ -453,8 +875,10 @@ def actualizar_trabajador(db, trabajador_id: int, **kwargs):
             if campo in campos_permitidos and valor is not None:
                 setattr(trabajador, campo, valor)
         
-        db.commit()
+        db.flush()
         db.refresh(trabajador)
+        on_commit(db, WorkerIndex.invalidar)
+        on_commit(db, CostEngine.invalidar)
         
         return {
             "success": True,
@@ -508,7 +932,9 @@ def eliminar_trabajador(db, trabajador_id: int):
         # Desactivar en lugar de eliminar
         trabajador.activo = False
         
-        db.commit()
+        db.flush()
+        on_commit(db, WorkerIndex.invalidar)
+        on_commit(db, CostEngine.invalidar)
         
         return {
             "success": True,
@@ -0,0 +1,76 @@
+"""
+Difusión en vivo de llegadas y salidas (Server-Sent Events).
+
+Cada pantalla suscrita tiene su propia cola en memoria. Los servicios de
+asistencia publican con `on_commit`, así solo se difunden marcaciones
+confirmadas. El evento se serializa una sola vez y se comparte entre todas
+las colas, por lo que el costo por suscriptor es mínimo.
+
+El broker vive en el proceso: cada worker de uvicorn difunde las marcaciones
+que él mismo registra.
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+
+class AttendanceFeed:
+    """Broker en memoria de eventos de asistencia"""
+
+    # Eventos pendientes por suscriptor antes de considerarlo rezagado
+    MAX_PENDIENTES = 100
+
+    _suscriptores = set()
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def formatear(evento: str, datos: dict) -> str:
+        """Mensaje SSE listo para enviar"""
+        return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+    @staticmethod
+    def suscribir() -> asyncio.Queue:
+        """Registra un suscriptor; debe llamarse desde el event loop"""
+        AttendanceFeed._loop = asyncio.get_running_loop()
+        cola = asyncio.Queue(maxsize=AttendanceFeed.MAX_PENDIENTES)
+        AttendanceFeed._suscriptores.add(cola)
+        return cola
+
+    @staticmethod
+    def desuscribir(cola: asyncio.Queue):
+        AttendanceFeed._suscriptores.discard(cola)
+
+    @staticmethod
+    def _entregar(mensaje: str):
+        for cola in list(AttendanceFeed._suscriptores):
+            try:
+                cola.put_nowait(mensaje)
+            except asyncio.QueueFull:
+                # Cliente demasiado lento: se cierra su stream y al reconectar
+                # recibe una instantánea nueva
+                AttendanceFeed._suscriptores.discard(cola)
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait(None)
+
+    @staticmethod
+    def publicar(evento: str, datos: dict):
+        """
+        Difunde un evento a todos los suscriptores.
+        Se puede llamar desde el event loop o desde otro hilo.
+        """
+        loop = AttendanceFeed._loop
+        if loop is None or not AttendanceFeed._suscriptores:
+            return
+
+        mensaje = AttendanceFeed.formatear(evento, datos)
+        try:
+            en_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            en_loop = False
+
+        if en_loop:
+            AttendanceFeed._entregar(mensaje)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(AttendanceFeed._entregar, mensaje)
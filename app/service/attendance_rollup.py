@@ -0,0 +1,183 @@
+"""
+Resumen mensual de horas por trabajador (tabla assistence_monthly).
+
+marcar_salida suma cada jornada cerrada en la misma transacción, así los
+reportes de nómina leen una fila por trabajador y mes en lugar de recorrer
+todo el historial. `reconstruir` recalcula cualquier rango desde cero.
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select, delete, func, case, literal
+import pytz
+from app.db.models import Worker
+from app.db.models.assistence_model import Assistence
+from app.db.models.assistence_monthly_model import AssistenceMonthly
+from app.db.sql import dialect_insert, segundos_entre, inicio_de_mes, hora_del_dia
+from app.db.partitions import primer_mes_conservado
+
+
+def _hora_limite():
+    """Hora de entrada (HH:MM); llegar después cuenta como llegada tarde"""
+    return time.fromisoformat(os.getenv("HORA_LIMITE_LLEGADA", "07:00"))
+
+
+class AttendanceRollup:
+    """Mantenimiento y consulta del resumen mensual de asistencia"""
+
+    HORA_LIMITE = _hora_limite()
+
+    @staticmethod
+    def periodo(fecha: date) -> date:
+        """Primer día del mes de la fecha"""
+        return fecha.replace(day=1)
+
+    @staticmethod
+    def mes_siguiente(fecha: date) -> date:
+        """Primer día del mes siguiente"""
+        return (fecha.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def registrar_salida(db, worker_id: int, attendance_date: date,
+                         arrival_time: datetime, departure_time: datetime):
+        """
+        Suma una jornada cerrada al mes correspondiente (upsert atómico).
+        Los segundos y la llegada tarde se calculan al segundo, igual que en
+        `reconstruir`.
+        """
+        if worker_id is None:
+            return
+
+        llegada = arrival_time.replace(microsecond=0)
+        segundos = int((departure_time.replace(microsecond=0) - llegada).total_seconds())
+        tarde = 1 if llegada.time() > AttendanceRollup.HORA_LIMITE else 0
+
+        stmt = dialect_insert(db, AssistenceMonthly).values(
+            worker_id=worker_id,
+            periodo=AttendanceRollup.periodo(attendance_date),
+            dias=1,
+            segundos_totales=segundos,
+            llegadas_tarde=tarde,
+            fecha_actualizacion=departure_time
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AssistenceMonthly.worker_id, AssistenceMonthly.periodo],
+            set_={
+                "dias": AssistenceMonthly.dias + stmt.excluded.dias,
+                "segundos_totales": AssistenceMonthly.segundos_totales + stmt.excluded.segundos_totales,
+                "llegadas_tarde": AssistenceMonthly.llegadas_tarde + stmt.excluded.llegadas_tarde,
+                "fecha_actualizacion": stmt.excluded.fecha_actualizacion
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def reconstruir(db, desde: date = None, hasta: date = None) -> int:
+        """
+        Recalcula los meses entre `desde` y `hasta` (inclusive) a partir de
+        las asistencias. Sin rango, recalcula todo el historial.
+
+        Con la tabla particionada, `desde` nunca es anterior al primer mes
+        que sigue acoplado: el resumen de los meses archivados ya no tiene
+        asistencias de origen y se conserva tal cual.
+
+        Returns:
+            int: Filas de resumen generadas
+        """
+        conservado = primer_mes_conservado(db.connection())
+        if conservado is not None and (desde is None or desde < conservado):
+            desde = conservado
+
+        condiciones_resumen = []
+        condiciones_asistencia = [
+            Assistence.worker_id.isnot(None),
+            Assistence.departure_time.isnot(None)
+        ]
+        if desde is not None:
+            desde = AttendanceRollup.periodo(desde)
+            condiciones_resumen.append(AssistenceMonthly.periodo >= desde)
+            condiciones_asistencia.append(Assistence.attendance_date >= desde)
+        if hasta is not None:
+            hasta = AttendanceRollup.periodo(hasta)
+            condiciones_resumen.append(AssistenceMonthly.periodo <= hasta)
+            condiciones_asistencia.append(Assistence.attendance_date < AttendanceRollup.mes_siguiente(hasta))
+
+        db.execute(delete(AssistenceMonthly).where(*condiciones_resumen))
+
+        periodo = inicio_de_mes(Assistence.attendance_date)
+        ahora = datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None, microsecond=0)
+        consulta = (
+            select(
+                Assistence.worker_id,
+                periodo,
+                func.count(),
+                func.sum(segundos_entre(Assistence.arrival_time, Assistence.departure_time)),
+                func.sum(case(
+                    (hora_del_dia(Assistence.arrival_time) > AttendanceRollup.HORA_LIMITE, 1),
+                    else_=0
+                )),
+                literal(ahora)
+            )
+            .where(*condiciones_asistencia)
+            .group_by(Assistence.worker_id, periodo)
+        )
+
+        resultado = db.execute(
+            AssistenceMonthly.__table__.insert().from_select(
+                ["worker_id", "periodo", "dias", "segundos_totales", "llegadas_tarde", "fecha_actualizacion"],
+                consulta
+            )
+        )
+        return resultado.rowcount
+
+    @staticmethod
+    def obtener_periodo(db, periodo: date, worker_id: int = None):
+        """
+        Resumen de un mes: una fila por trabajador.
+
+        Returns:
+            dict: {"success": bool, "data": list, "total": int}
+        """
+        try:
+            condiciones = [AssistenceMonthly.periodo == AttendanceRollup.periodo(periodo)]
+            if worker_id is not None:
+                condiciones.append(AssistenceMonthly.worker_id == worker_id)
+
+            filas = db.execute(
+                select(
+                    AssistenceMonthly.worker_id,
+                    Worker.nombre,
+                    Worker.apellido,
+                    AssistenceMonthly.dias,
+                    AssistenceMonthly.segundos_totales,
+                    AssistenceMonthly.llegadas_tarde
+                )
+                .join(Worker, Worker.id == AssistenceMonthly.worker_id)
+                .where(*condiciones)
+                .order_by(Worker.nombre, Worker.apellido)
+            ).all()
+
+            datos = [
+                {
+                    "worker_id": fila.worker_id,
+                    "worker": f"{fila.nombre} {fila.apellido}",
+                    "dias": fila.dias,
+                    "horas_totales": round(fila.segundos_totales / 3600, 2),
+                    "llegadas_tarde": fila.llegadas_tarde
+                }
+                for fila in filas
+            ]
+
+            return {
+                "success": True,
+                "data": datos,
+                "total": len(datos),
+                "periodo": AttendanceRollup.periodo(periodo).strftime("%Y-%m")
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error al obtener el resumen mensual: {str(e)}",
+                "data": []
+            }
@@ -0,0 +1,156 @@
+"""
+Cálculo de costos de operación a partir de los salarios de la nómina.
+
+Los cálculos de costo de operación y punto de equilibrio solo necesitan,
+por cargo, la cantidad de trabajadores activos y el salario promedio: se
+obtienen con un GROUP BY y se guardan en memoria junto con el detalle de
+operarias y aprendices que muestran los reportes. La foto se invalida
+cuando WorkerService (o el servicio de asistencia) modifica un trabajador
+y se recarga por TTL como red de seguridad, igual que WorkerIndex.
+"""
+
+import os
+import time
+from typing import NamedTuple
+
+from sqlalchemy import select, func
+from app.db.models.worker_model import Worker
+from app.api.schemas.gastos_schema import GastoSchema
+
+CARGO_OPERARIA = 'operaria'
+CARGO_APRENDIZ = 'aprendiz'
+
+# Salarios diarios usados cuando no hay trabajadores activos del cargo
+SALARIO_OPERARIA_DEFECTO = 56000
+SALARIO_APRENDIZ_DEFECTO = 30000
+
+
+class CargoStats(NamedTuple):
+    """Trabajadores activos de un cargo"""
+    cantidad: int
+    salario_promedio: float
+
+
+class CostSnapshot(NamedTuple):
+    """Estadísticas de salarios por cargo (en minúsculas) y detalle para los reportes"""
+    por_cargo: dict
+    operarias: list
+    aprendices: list
+
+    def cantidad(self, cargo: str) -> int:
+        stats = self.por_cargo.get(cargo)
+        return stats.cantidad if stats else 0
+
+    def salario_promedio(self, cargo: str, defecto: float) -> float:
+        stats = self.por_cargo.get(cargo)
+        return stats.salario_promedio if stats else defecto
+
+
+class CostEngine:
+    """Foto de salarios compartida por el proceso y cálculos de costo"""
+
+    TTL_SECONDS = int(os.getenv("COST_ENGINE_TTL", "300"))
+
+    _snapshot = None
+    _cargado_en = None
+    # Aumenta en cada invalidación: una carga que empezó antes no queda vigente
+    _generacion = 0
+
+    @staticmethod
+    def cargar(db) -> CostSnapshot:
+        """Carga (o recarga) la foto de salarios desde la base de datos"""
+        generacion = CostEngine._generacion
+        cargo = func.lower(Worker.cargo)
+        por_cargo = {
+            fila.cargo: CargoStats(fila.cantidad, float(fila.salario_promedio))
+            for fila in db.execute(
+                select(
+                    cargo.label('cargo'),
+                    func.count().label('cantidad'),
+                    func.avg(Worker.salario).label('salario_promedio')
+                )
+                .where(Worker.activo == True)
+                .group_by(cargo)
+            )
+        }
+
+        detalle = {CARGO_OPERARIA: [], CARGO_APRENDIZ: []}
+        for fila in db.execute(
+            select(cargo.label('cargo'), Worker.nombre, Worker.apellido, Worker.salario)
+            .where(Worker.activo == True, cargo.in_(list(detalle)))
+            .order_by(Worker.id)
+        ):
+            detalle[fila.cargo].append({
+                "nombre": fila.nombre,
+                "apellido": fila.apellido,
+                "salario": float(fila.salario)
+            })
+
+        snapshot = CostSnapshot(por_cargo, detalle[CARGO_OPERARIA], detalle[CARGO_APRENDIZ])
+        if generacion == CostEngine._generacion:
+            CostEngine._snapshot = snapshot
+            CostEngine._cargado_en = time.monotonic()
+        return snapshot
+
+    @staticmethod
+    def invalidar():
+        """Descarta la foto; se recarga en el siguiente cálculo"""
+        CostEngine._generacion += 1
+        CostEngine._cargado_en = None
+
+    @staticmethod
+    def snapshot(db) -> CostSnapshot:
+        """Foto vigente de salarios por cargo"""
+        cargado_en = CostEngine._cargado_en
+        if cargado_en is None or time.monotonic() - cargado_en > CostEngine.TTL_SECONDS:
+            return CostEngine.cargar(db)
+        return CostEngine._snapshot
+
+    @staticmethod
+    def costo_operacion(snapshot: CostSnapshot, cantidad_trabajadoras: int,
+                        cantidad_trabajadoras_prestaciones: int, cantidad_practicantes: int) -> dict:
+        """
+        Costo diario de operación para las cantidades indicadas, con los
+        salarios promedio de la foto.
+
+        Returns:
+            dict: Costos por concepto y `costo_operacion` (total)
+        """
+        salario_operaria = snapshot.salario_promedio(CARGO_OPERARIA, SALARIO_OPERARIA_DEFECTO)
+        salario_aprendiz = snapshot.salario_promedio(CARGO_APRENDIZ, SALARIO_APRENDIZ_DEFECTO)
+
+        costo_trabajadoras = cantidad_trabajadoras * salario_operaria
+        costo_trabajadoras_prestaciones = cantidad_trabajadoras_prestaciones * salario_operaria
+        costo_practicantes = cantidad_practicantes * salario_aprendiz
+        gastos_fijos_total = sum(GastoSchema.gastos_fijos.values())
+        arriendo_diario = GastoSchema.arriendo / 30
+
+        return {
+            'costo_trabajadoras': costo_trabajadoras,
+            'costo_trabajadoras_prestaciones': costo_trabajadoras_prestaciones,
+            'costo_practicantes': costo_practicantes,
+            'gastos_fijos_total': gastos_fijos_total,
+            'arriendo_diario': arriendo_diario,
+            'costo_operacion': (costo_trabajadoras +
+                                costo_trabajadoras_prestaciones +
+                                costo_practicantes +
+                                gastos_fijos_total +
+                                arriendo_diario)
+        }
+
+    @staticmethod
+    def costo_nomina_actual(snapshot: CostSnapshot) -> dict:
+        """
+        Costo de operación con las cantidades reales de la nómina: todas las
+        operarias activas (sin contar prestaciones aparte) y los aprendices.
+        """
+        cantidad_trabajadoras = snapshot.cantidad(CARGO_OPERARIA)
+        cantidad_practicantes = snapshot.cantidad(CARGO_APRENDIZ)
+        return {
+            'cantidad_trabajadoras': cantidad_trabajadoras,
+            'cantidad_trabajadoras_prestaciones': 0,
+            'cantidad_practicantes': cantidad_practicantes,
+            'operarias': snapshot.operarias,
+            'aprendices': snapshot.aprendices,
+            **CostEngine.costo_operacion(snapshot, cantidad_trabajadoras, 0, cantidad_practicantes)
+        }
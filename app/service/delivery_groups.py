@@ -0,0 +1,175 @@
+"""
+Encabezados de grupos de entregas (tabla delivery_groups).
+
+Cada cambio de DeliveryService recalcula, en la misma transacción, los
+grupos que tocó: una consulta GROUP BY sobre las filas activas de esos
+grupos (índice parcial por id_group) y un upsert. Así el listado lee una
+fila angosta por grupo en lugar de agregar todo el detalle.
+`reconstruir` recalcula la tabla completa.
+"""
+
+import secrets
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update, delete, func, case, exists, literal
+from sqlalchemy.orm import aliased
+import pytz
+from app.db.models.delivery_models import DeliveredPieces, DeliveryGroup
+from app.db.sql import dialect_insert
+
+TALLAS = (
+    'sz6_12', 'sz12_18', 'sz18_24', 'sz24_36', 'sz36_48',
+    'sz2', 'sz4', 'sz6', 'sz8', 'sz10', 'sz12', 'sz14', 'sz16', 'sz18'
+)
+
+COLUMNAS = (
+    'id_group', 'id_delivery', 'owner', 'date', 'lot', 'filas', 'total_piezas',
+    *TALLAS, 'status', 'modification_date'
+)
+
+
+def _ahora():
+    return datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None)
+
+
+class DeliveryGroups:
+    """Mantenimiento de la tabla delivery_groups"""
+
+    @staticmethod
+    def nuevo_id() -> str:
+        """id_group generado en el servidor (mismo formato que el formulario de entregas)"""
+        return f"grp_{int(time.time() * 1000)}_{secrets.token_hex(5)[:9]}"
+
+    @staticmethod
+    def _consulta_activos(condiciones, ahora):
+        """
+        Totales de las filas activas por grupo, con los datos de la entrega
+        activa más reciente. Columnas en el orden de COLUMNAS.
+        """
+        sumas = [
+            func.sum(func.coalesce(getattr(DeliveredPieces, talla), 0)).label(talla)
+            for talla in TALLAS
+        ]
+        totales = select(
+            DeliveredPieces.id_group,
+            func.max(DeliveredPieces.id_delivery).label('id_delivery'),
+            func.count().label('filas'),
+            *sumas
+        ).where(
+            DeliveredPieces.status == 'active',
+            DeliveredPieces.id_group.isnot(None),
+            *condiciones
+        ).group_by(DeliveredPieces.id_group).subquery()
+
+        total_piezas = 0
+        for talla in TALLAS:
+            total_piezas = total_piezas + totales.c[talla]
+
+        ultima = aliased(DeliveredPieces)
+        return select(
+            totales.c.id_group,
+            totales.c.id_delivery,
+            ultima.owner,
+            ultima.date,
+            ultima.lot,
+            totales.c.filas,
+            total_piezas,
+            *[totales.c[talla] for talla in TALLAS],
+            literal('active'),
+            literal(ahora)
+        ).join(ultima, ultima.id_delivery == totales.c.id_delivery)
+
+    @staticmethod
+    def recalcular(db, ids_grupo):
+        """
+        Recalcula los grupos indicados (upsert). Los grupos que se quedaron
+        sin filas activas pasan a 'inactive' con totales en cero.
+
+        Primero se bloquean los encabezados existentes: si otra transacción
+        está modificando el mismo grupo, se espera a que confirme y el
+        recálculo ya incluye sus filas.
+        """
+        ids = {str(id_group) for id_group in ids_grupo if id_group is not None}
+        if not ids:
+            return
+
+        db.execute(
+            select(DeliveryGroup.id)
+            .where(DeliveryGroup.id_group.in_(ids))
+            .order_by(DeliveryGroup.id_group)
+            .with_for_update()
+        )
+        ahora = _ahora()
+        stmt = dialect_insert(db, DeliveryGroup).from_select(
+            list(COLUMNAS),
+            DeliveryGroups._consulta_activos([DeliveredPieces.id_group.in_(ids)], ahora)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DeliveryGroup.id_group],
+            set_={columna: getattr(stmt.excluded, columna) for columna in COLUMNAS if columna != 'id_group'}
+        )
+        db.execute(stmt)
+
+        activa = aliased(DeliveredPieces)
+        db.execute(
+            update(DeliveryGroup)
+            .where(
+                DeliveryGroup.id_group.in_(ids),
+                DeliveryGroup.status == 'active',
+                ~exists().where(activa.id_group == DeliveryGroup.id_group, activa.status == 'active')
+            )
+            .values(
+                status='inactive',
+                filas=0,
+                total_piezas=0,
+                modification_date=ahora,
+                **{talla: 0 for talla in TALLAS}
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def reconstruir(db) -> int:
+        """
+        Recalcula todos los grupos desde delivered_pieces.
+
+        Returns:
+            int: Grupos generados
+        """
+        ahora = _ahora()
+        db.execute(delete(DeliveryGroup))
+        activos = db.execute(
+            DeliveryGroup.__table__.insert().from_select(
+                list(COLUMNAS), DeliveryGroups._consulta_activos([], ahora)
+            )
+        ).rowcount
+
+        # Grupos con todas sus filas eliminadas: se conservan como inactivos
+        ultimas = select(
+            DeliveredPieces.id_group,
+            func.max(DeliveredPieces.id_delivery).label('id_delivery')
+        ).where(
+            DeliveredPieces.id_group.isnot(None)
+        ).group_by(DeliveredPieces.id_group).having(
+            func.count(case((DeliveredPieces.status == 'active', 1))) == 0
+        ).subquery()
+        ultima = aliased(DeliveredPieces)
+        inactivos = db.execute(
+            DeliveryGroup.__table__.insert().from_select(
+                list(COLUMNAS),
+                select(
+                    ultimas.c.id_group,
+                    ultimas.c.id_delivery,
+                    ultima.owner,
+                    ultima.date,
+                    ultima.lot,
+                    literal(0),
+                    literal(0),
+                    *[literal(0) for _ in TALLAS],
+                    literal('inactive'),
+                    literal(ahora)
+                ).join(ultima, ultima.id_delivery == ultimas.c.id_delivery)
+            )
+        ).rowcount
+        return activos + inactivos
@@ -0,0 +1,211 @@
+"""
+Importación masiva de entregas desde CSV.
+
+El archivo se lee por lotes: cada fila se valida con el esquema
+DeliveredPiecesCreate y las válidas del lote se cargan con COPY en
+PostgreSQL (executemany en SQLite). Al final se recalculan una sola vez
+los grupos tocados. Las filas con errores se reportan con su número de
+línea y no detienen la importación.
+
+Columnas del CSV: las de DeliveredPiecesCreate (owner, date, lot, type,
+color, annotation, type_fabric, rib, sz6_12 ... sz18, id_group). Si no se
+indica id_group, las filas con el mismo responsable, fecha y lote forman
+un grupo nuevo.
+"""
+
+import csv
+import io
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from app.api.schemas.delivery_schemas import DeliveredPiecesCreate
+from app.db.models.delivery_models import DeliveredPieces
+from app.db.versions import marcar_modificada
+from app.service.delivery_service import DeliveryService
+from app.service.delivery_groups import DeliveryGroups
+
+
+class DeliveryImport:
+    """Validación y carga por lotes de entregas"""
+
+    # Filas validadas y cargadas por lote
+    LOTE = 1000
+
+    # Errores detallados en el reporte (el resto solo se cuenta)
+    MAX_ERRORES = 500
+
+    COLUMNAS_REQUERIDAS = ('owner', 'date')
+
+    # Orden de las columnas en el COPY / INSERT
+    COLUMNAS = (
+        'owner', 'date', 'lot', 'type', 'color', 'annotation', 'type_fabric', 'rib',
+        *DeliveryService.TALLAS,
+        'id_group', 'status', 'modification_date', 'modified_by'
+    )
+
+    @staticmethod
+    def _lector(archivo):
+        """
+        csv.DictReader sobre el archivo de texto. Detecta el separador
+        (coma o punto y coma, como exportan las hojas de cálculo en español).
+        """
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.DictReader(archivo, dialect=dialecto)
+
+        encabezado = [(columna or '').strip() for columna in (lector.fieldnames or [])]
+        faltantes = [columna for columna in DeliveryImport.COLUMNAS_REQUERIDAS if columna not in encabezado]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+        lector.fieldnames = encabezado
+        return lector
+
+    @staticmethod
+    def _normalizar(fila: dict) -> dict:
+        """Celdas vacías como None y fechas DD/MM/YYYY en formato ISO"""
+        datos = {}
+        for columna, valor in fila.items():
+            if columna not in DeliveredPiecesCreate.model_fields:
+                continue
+            valor = (valor or '').strip()
+            if valor == '':
+                continue
+            datos[columna] = valor
+
+        fecha = datos.get('date')
+        if fecha and '/' in fecha:
+            try:
+                datos['date'] = datetime.strptime(fecha, "%d/%m/%Y").date()
+            except ValueError:
+                pass
+        return datos
+
+    @staticmethod
+    def lotes(archivo, modified_by: str = None):
+        """
+        Lee y valida el CSV por lotes.
+
+        Yields:
+            tuple: (filas válidas listas para cargar, errores del lote)
+        """
+        lector = DeliveryImport._lector(archivo)
+        auditoria = {
+            'status': 'active',
+            'modification_date': DeliveryService.get_bogota_time(),
+            'modified_by': modified_by or 'system'
+        }
+        grupos = {}
+
+        validas, errores = [], []
+        for fila in lector:
+            linea = lector.line_num
+            try:
+                entrega = DeliveredPiecesCreate.model_validate(DeliveryImport._normalizar(fila))
+            except ValidationError as e:
+                errores.append({
+                    "linea": linea,
+                    "errores": [
+                        f"{'.'.join(str(parte) for parte in error['loc'])}: {error['msg']}"
+                        for error in e.errors()
+                    ]
+                })
+            else:
+                datos = entrega.model_dump(include=set(DeliveryImport.COLUMNAS))
+                if datos['id_group'] is None:
+                    llave = (datos['owner'], datos['date'], datos['lot'])
+                    if llave not in grupos:
+                        grupos[llave] = DeliveryGroups.nuevo_id()
+                    datos['id_group'] = grupos[llave]
+                datos['id_group'] = str(datos['id_group'])
+                validas.append({**datos, **auditoria})
+
+            if len(validas) + len(errores) >= DeliveryImport.LOTE:
+                yield validas, errores
+                validas, errores = [], []
+
+        if validas or errores:
+            yield validas, errores
+
+    @staticmethod
+    def _registros(filas: list):
+        return [tuple(fila[columna] for columna in DeliveryImport.COLUMNAS) for fila in filas]
+
+    @staticmethod
+    def cargar(db, filas: list):
+        """Carga un lote validado: COPY con psycopg2, executemany en otros drivers"""
+        if not filas:
+            return
+        conexion = db.connection()
+        if conexion.dialect.driver == 'psycopg2':
+            buffer = io.StringIO()
+            # En formato CSV, un campo vacío sin comillas es NULL
+            csv.writer(buffer).writerows(DeliveryImport._registros(filas))
+            buffer.seek(0)
+            with conexion.connection.driver_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {DeliveredPieces.__tablename__} ({', '.join(DeliveryImport.COLUMNAS)}) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            marcar_modificada(db, DeliveredPieces.__tablename__)
+        else:
+            db.execute(insert(DeliveredPieces), filas)
+
+    @staticmethod
+    async def cargar_async(db, filas: list):
+        """Carga un lote desde la sesión asíncrona (COPY binario con asyncpg)"""
+        if not filas:
+            return
+        conexion = await db.connection()
+        if conexion.dialect.driver == 'asyncpg':
+            crudo = await conexion.get_raw_connection()
+            await crudo.driver_connection.copy_records_to_table(
+                DeliveredPieces.__tablename__,
+                records=DeliveryImport._registros(filas),
+                columns=list(DeliveryImport.COLUMNAS)
+            )
+            marcar_modificada(db, DeliveredPieces.__tablename__)
+        else:
+            await db.run_sync(DeliveryImport.cargar, filas)
+
+    @staticmethod
+    def recalcular_grupos(db, ids_grupo):
+        """Recalcula los encabezados de los grupos importados, por lotes"""
+        ids = sorted(ids_grupo)
+        for inicio in range(0, len(ids), DeliveryImport.LOTE):
+            DeliveryGroups.recalcular(db, ids[inicio:inicio + DeliveryImport.LOTE])
+
+    @staticmethod
+    def nuevo_reporte() -> dict:
+        return {"importadas": 0, "con_errores": 0, "errores": []}
+
+    @staticmethod
+    def acumular(reporte: dict, validas: list, errores: list):
+        """Suma un lote al reporte de la importación"""
+        reporte["importadas"] += len(validas)
+        reporte["con_errores"] += len(errores)
+        espacio = DeliveryImport.MAX_ERRORES - len(reporte["errores"])
+        if espacio > 0:
+            reporte["errores"].extend(errores[:espacio])
+
+    @staticmethod
+    def importar(db, archivo, modified_by: str = None) -> dict:
+        """
+        Importa un CSV completo con la sesión síncrona (comando de consola).
+
+        Returns:
+            dict: {"importadas": int, "con_errores": int, "errores": list}
+        """
+        reporte = DeliveryImport.nuevo_reporte()
+        grupos = set()
+        for validas, errores in DeliveryImport.lotes(archivo, modified_by):
+            DeliveryImport.cargar(db, validas)
+            DeliveryImport.acumular(reporte, validas, errores)
+            grupos.update(fila['id_group'] for fila in validas)
+        DeliveryImport.recalcular_grupos(db, grupos)
+        return reporte
@@ -0,0 +1,122 @@
+"""
+Búsqueda de texto sobre las entregas activas.
+
+Se busca en owner, lot, color, type_fabric, rib y annotation:
+
+- PostgreSQL: índice GIN con pg_trgm sobre el texto concatenado de esas
+  columnas (solo filas activas). Coinciden las entregas que contienen la
+  búsqueda (ILIKE) o que se le parecen (`<%`, tolera errores de tipeo);
+  el orden es por word_similarity.
+- SQLite: tabla FTS5 `delivered_pieces_fts` con tokenizador trigram,
+  mantenida por triggers; el orden es por bm25.
+
+Ambos índices trabajan con trigramas: la búsqueda necesita al menos
+3 caracteres.
+"""
+
+from sqlalchemy import select, func, literal_column, text, tuple_, bindparam, table, column, Float
+
+from app.db.models.delivery_models import DeliveredPieces
+from app.utils.pagination import codificar_cursor, decodificar_cursor
+
+# Mismo texto que indexa ix_delivered_pieces_busqueda (migración 0013);
+# si cambia, el índice deja de usarse
+TEXTO_BUSQUEDA = literal_column(
+    "(coalesce(owner, '') || ' ' || coalesce(lot, '') || ' ' || coalesce(color, '') || ' ' || "
+    "coalesce(type_fabric, '') || ' ' || coalesce(rib, '') || ' ' || coalesce(annotation, ''))"
+)
+
+# Tabla FTS5 (contenido externo: rowid = id_delivery), creada en la migración 0013
+TABLA_FTS = "delivered_pieces_fts"
+_fts = table(TABLA_FTS, column("rowid"))
+
+
+def _escapar_like(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class DeliverySearch:
+    """Búsqueda paginada y ordenada por relevancia"""
+
+    LONGITUD_MINIMA = 3
+
+    # Resultados por página
+    LIMITE_MAXIMO = 100
+
+    @staticmethod
+    def _consulta_postgresql(q: str):
+        puntaje = func.word_similarity(bindparam("q", q), TEXTO_BUSQUEDA)
+        coincide = TEXTO_BUSQUEDA.ilike(f"%{_escapar_like(q)}%", escape="\\") | \
+            bindparam("q", q).op("<%")(TEXTO_BUSQUEDA)
+        return puntaje, select(DeliveredPieces, puntaje.label("puntaje")).where(coincide)
+
+    @staticmethod
+    def _consulta_sqlite(q: str):
+        # bm25 es menor cuanto más relevante: se invierte para ordenar igual que en PostgreSQL
+        puntaje = -func.bm25(literal_column(TABLA_FTS))
+        frase = '"' + q.replace('"', '""') + '"'
+        consulta = (
+            select(DeliveredPieces, puntaje.label("puntaje"))
+            .select_from(DeliveredPieces)
+            .join(_fts, _fts.c.rowid == DeliveredPieces.id_delivery)
+            .where(text(f"{TABLA_FTS} MATCH :frase").bindparams(frase=frase))
+        )
+        return puntaje, consulta
+
+    @staticmethod
+    def buscar(db, q: str, cursor: str = None, limite: int = 20):
+        """
+        Entregas activas que coinciden con `q`, de la más a la menos relevante.
+
+        Args:
+            q: Texto a buscar (al menos LONGITUD_MINIMA caracteres)
+            cursor: Cursor de la página anterior
+            limite: Resultados por página
+
+        Returns:
+            tuple: (lista de entregas con su `puntaje`, cursor de la siguiente página o None)
+
+        Raises:
+            ValueError: Si la búsqueda es muy corta o el cursor no es válido
+        """
+        q = (q or "").strip()
+        if len(q) < DeliverySearch.LONGITUD_MINIMA:
+            raise ValueError(f"La búsqueda debe tener al menos {DeliverySearch.LONGITUD_MINIMA} caracteres")
+
+        if db.get_bind().dialect.name == "sqlite":
+            puntaje, consulta = DeliverySearch._consulta_sqlite(q)
+        else:
+            puntaje, consulta = DeliverySearch._consulta_postgresql(q)
+
+        consulta = consulta.where(DeliveredPieces.status == 'active')
+        if cursor:
+            try:
+                ultimo_puntaje, ultimo_id = decodificar_cursor(cursor, 2)
+                ultimo_puntaje, ultimo_id = float(ultimo_puntaje), int(ultimo_id)
+            except (ValueError, TypeError):
+                raise ValueError("Cursor inválido")
+            consulta = consulta.where(
+                tuple_(puntaje, DeliveredPieces.id_delivery)
+                < tuple_(bindparam("ultimo_puntaje", ultimo_puntaje, type_=Float()), ultimo_id)
+            )
+
+        # Se pide una fila extra para saber si hay otra página
+        filas = db.execute(
+            consulta.order_by(puntaje.desc(), DeliveredPieces.id_delivery.desc()).limit(limite + 1)
+        ).all()
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        datos = [
+            {
+                **{columna.key: getattr(entrega, columna.key) for columna in DeliveredPieces.__table__.columns},
+                "puntaje": valor
+            }
+            for entrega, valor in filas
+        ]
+
+        siguiente = None
+        if hay_mas:
+            entrega, valor = filas[-1]
+            siguiente = codificar_cursor(valor, entrega.id_delivery)
+        return datos, siguiente
@@ -1,14 +1,47 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.models.delivery_models import DeliveredPieces
-from app.api.schemas.delivery_schemas import DeliveredPiecesCreate, DeliveredPiecesUpdate
-from datetime import datetime
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, exists, tuple_, insert, update, literal_column
+from app.db.models.delivery_models import DeliveredPieces, DeliveryGroup
+from app.api.schemas.delivery_schemas import DeliveredPiecesCreate, DeliveredPiecesUpdate, DeliveredPiecesGroupItem
+from typing import List
+from app.utils.pagination import codificar_cursor, decodificar_cursor
+from app.service.delivery_groups import DeliveryGroups, TALLAS
+from datetime import date, datetime, timedelta
+import os
 import pytz
 
 
 class DeliveryService:
     # Zona horaria de Bogotá
     BOGOTA_TZ = pytz.timezone('America/Bogota')
+
+    # Columnas de cantidades por talla
+    TALLAS = TALLAS
+
+    # Ordenamientos del listado: (clave, descendente)
+    ORDENES = {
+        'fecha-desc': ('date', True),
+        'fecha-asc': ('date', False),
+        'responsable-asc': ('owner', False),
+        'responsable-desc': ('owner', True),
+        'lote-asc': ('lot', False),
+        'total-desc': ('total', True),
+        'total-asc': ('total', False),
+    }
+
+    # Columnas de una entrega en las lecturas con select() de Core: filas
+    # planas, sin identity map ni objetos del ORM
+    COLUMNAS = tuple(DeliveredPieces.__table__.columns)
+    CLAVES = tuple(columna.key for columna in COLUMNAS)
+
+    # Grupos por página del listado
+    LIMITE_MAXIMO = 200
+
+    # Cambios por página de /api/deliveries/changes
+    CAMBIOS_LIMITE_MAXIMO = 1000
+
+    # Los cambios más recientes que este margen aún no se entregan: da tiempo a
+    # que confirmen las transacciones que ya marcaron modification_date
+    CAMBIOS_MARGEN = timedelta(seconds=int(os.getenv("DELIVERY_CAMBIOS_MARGEN", "30")))
     
     @staticmethod
     def get_bogota_time():
@@ -26,10 +59,15 @@ class DeliveryService:
         data_dict['modification_date'] = DeliveryService.get_bogota_time()
         if 'modified_by' not in data_dict:
             data_dict['modified_by'] = 'system'
+        # Sin grupo indicado, la entrega forma un grupo propio
+        if data_dict.get('id_group') is None:
+            data_dict['id_group'] = DeliveryGroups.nuevo_id()
+        data_dict['id_group'] = str(data_dict['id_group'])
         
         db_delivery = DeliveredPieces(**data_dict)
         db.add(db_delivery)
-        db.commit()
+        db.flush()
+        DeliveryGroups.recalcular(db, [db_delivery.id_group])
         db.refresh(db_delivery)
         return db_delivery
     
@@ -39,26 +77,274 @@ class DeliveryService:
         return db.query(DeliveredPieces).filter(DeliveredPieces.status == 'active').all()
     
     @staticmethod
-    def get_deliveries_one_per_group(db: Session):
-        """Obtener una entrega activa por cada id_group (la más reciente)"""
-        # Subquery para obtener el id_delivery más reciente de cada id_group
-        subquery = db.query(
-            func.max(DeliveredPieces.id_delivery).label('max_id')
-        ).filter(
-            DeliveredPieces.status == 'active'
-        ).group_by(DeliveredPieces.id_group).subquery()
-        
-        return db.query(DeliveredPieces).join(
-            subquery, DeliveredPieces.id_delivery == subquery.c.max_id
-        ).all()
+    def get_deliveries_one_per_group(db: Session, owner: str = None, desde: date = None, hasta: date = None,
+                                     lot: str = None, tipo: str = None, color: str = None,
+                                     status: str = 'active', orden: str = 'fecha-desc',
+                                     cursor: str = None, limite: int = 50):
+        """
+        Obtener una página de grupos de entregas desde delivery_groups, con la
+        entrega más reciente de cada grupo y sus totales.
+
+        El responsable, la fecha y el lote se filtran sobre el encabezado del
+        grupo; tipo y color son por fila, así que el grupo aparece si alguna de
+        sus filas coincide. La paginación es por keyset sobre (clave de orden,
+        id del grupo).
+
+        Returns:
+            tuple: (lista de grupos con `group_id`, `filas`, `tallas` y
+                    `total_piezas`, cursor de la página siguiente o None)
+
+        Raises:
+            ValueError: Si el orden o el cursor no son válidos
+        """
+        if orden not in DeliveryService.ORDENES:
+            raise ValueError("Orden no válido")
+        campo, descendente = DeliveryService.ORDENES[orden]
+
+        condiciones = [DeliveryGroup.status == status]
+        if owner:
+            condiciones.append(DeliveryGroup.owner == owner)
+        if desde:
+            condiciones.append(DeliveryGroup.date >= desde)
+        if hasta:
+            condiciones.append(DeliveryGroup.date <= hasta)
+        if lot:
+            condiciones.append(DeliveryGroup.lot == lot)
+        for columna, valor in (('type', tipo), ('color', color)):
+            if valor:
+                fila = aliased(DeliveredPieces)
+                condiciones.append(exists().where(
+                    fila.id_group == DeliveryGroup.id_group,
+                    fila.status == status,
+                    getattr(fila, columna) == valor
+                ))
+
+        if campo == 'total':
+            clave = DeliveryGroup.total_piezas
+        elif campo == 'lot':
+            # Misma expresión que ix_delivery_groups_active_lot_orden ('' literal,
+            # no parámetro, para que el planificador la reconozca)
+            clave = func.coalesce(DeliveryGroup.lot, literal_column("''"))
+        else:
+            clave = getattr(DeliveryGroup, campo)
+
+        if cursor:
+            try:
+                valor, id_grupo = decodificar_cursor(cursor, 2)
+                if campo == 'date':
+                    valor = date.fromisoformat(valor)
+                elif campo == 'total':
+                    valor = int(valor)
+                elif not isinstance(valor, str):
+                    raise ValueError
+                id_grupo = int(id_grupo)
+            except (ValueError, TypeError):
+                raise ValueError("Cursor inválido")
+            limite_keyset = tuple_(valor, id_grupo)
+            llave = tuple_(clave, DeliveryGroup.id)
+            condiciones.append(llave < limite_keyset if descendente else llave > limite_keyset)
+
+        consulta = (
+            select(
+                *DeliveryService.COLUMNAS,
+                DeliveryGroup.id.label('group_id'),
+                DeliveryGroup.filas,
+                DeliveryGroup.total_piezas,
+                *[getattr(DeliveryGroup, talla).label(f'grupo_{talla}') for talla in DeliveryService.TALLAS],
+                clave.label('clave')
+            )
+            .join(DeliveryGroup, DeliveryGroup.id_delivery == DeliveredPieces.id_delivery)
+            .where(*condiciones)
+        )
+        if descendente:
+            consulta = consulta.order_by(clave.desc(), DeliveryGroup.id.desc())
+        else:
+            consulta = consulta.order_by(clave, DeliveryGroup.id)
+
+        # Se pide una fila extra para saber si hay otra página
+        filas = db.execute(consulta.limit(limite + 1)).all()
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        grupos = []
+        for fila in filas:
+            # zip se detiene en CLAVES: toma solo las columnas de la entrega
+            grupo = dict(zip(DeliveryService.CLAVES, fila))
+            mapeo = fila._mapping
+            grupo['group_id'] = fila.group_id
+            grupo['filas'] = fila.filas
+            grupo['tallas'] = {talla: mapeo[f'grupo_{talla}'] for talla in DeliveryService.TALLAS}
+            grupo['total_piezas'] = fila.total_piezas
+            grupos.append(grupo)
+
+        siguiente = None
+        if hay_mas and filas:
+            ultima = filas[-1]
+            siguiente = codificar_cursor(ultima.clave, ultima.group_id)
+        return grupos, siguiente
+    
+    @staticmethod
+    def get_changes(db: Session, since: datetime = None, cursor: str = None, limite: int = 500):
+        """
+        Entregas creadas, modificadas o eliminadas (status 'inactive') desde una
+        marca de agua, en orden de (modification_date, id_delivery).
+
+        Solo se entregan cambios hasta `ahora - CAMBIOS_MARGEN`. Ese límite es
+        la nueva marca de agua y viaja dentro del cursor, así todas las páginas
+        de una sincronización usan el mismo corte.
+
+        Args:
+            since: Marca de agua de la sincronización anterior (exclusiva);
+                   sin ella se recorre todo el historial
+            cursor: `next_cursor` de la página anterior
+            limite: Filas por página
+
+        Returns:
+            dict: {"data": list, "next_cursor": str | None, "watermark": str | None}
+                  `watermark` solo viene en la última página
+
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        condiciones = [DeliveredPieces.modification_date.isnot(None)]
+        if cursor:
+            try:
+                modification_date, id_delivery, hasta = decodificar_cursor(cursor, 3)
+                modification_date = datetime.fromisoformat(modification_date)
+                hasta = datetime.fromisoformat(hasta)
+                id_delivery = int(id_delivery)
+            except (ValueError, TypeError):
+                raise ValueError("Cursor inválido")
+            condiciones.append(
+                tuple_(DeliveredPieces.modification_date, DeliveredPieces.id_delivery)
+                > tuple_(modification_date, id_delivery)
+            )
+        else:
+            hasta = (DeliveryService.get_bogota_time() - DeliveryService.CAMBIOS_MARGEN).replace(microsecond=0)
+            if since is not None:
+                if since.tzinfo is not None:
+                    since = since.astimezone(DeliveryService.BOGOTA_TZ).replace(tzinfo=None)
+                if since >= hasta:
+                    return {"data": [], "next_cursor": None, "watermark": since.isoformat()}
+                condiciones.append(DeliveredPieces.modification_date > since)
+        condiciones.append(DeliveredPieces.modification_date <= hasta)
+
+        # Se pide una fila extra para saber si hay otra página
+        filas = db.execute(
+            select(DeliveredPieces)
+            .where(*condiciones)
+            .order_by(DeliveredPieces.modification_date, DeliveredPieces.id_delivery)
+            .limit(limite + 1)
+        ).scalars().all()
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        datos = [
+            {columna.key: getattr(entrega, columna.key) for columna in DeliveredPieces.__table__.columns}
+            for entrega in filas
+        ]
+
+        if hay_mas:
+            ultima = filas[-1]
+            return {
+                "data": datos,
+                "next_cursor": codificar_cursor(ultima.modification_date, ultima.id_delivery, hasta),
+                "watermark": None
+            }
+        return {"data": datos, "next_cursor": None, "watermark": hasta.isoformat()}
     
     @staticmethod
     def get_deliveries_by_group(db: Session, id_group: str):
-        """Obtener todas las entregas activas de un grupo"""
-        return db.query(DeliveredPieces).filter(
-            DeliveredPieces.id_group == id_group,
-            DeliveredPieces.status == 'active'
+        """Obtener todas las entregas activas de un grupo (dicts con las columnas de la entrega)"""
+        filas = db.execute(
+            select(*DeliveryService.COLUMNAS)
+            .where(
+                DeliveredPieces.id_group == id_group,
+                DeliveredPieces.status == 'active'
+            )
+            .order_by(DeliveredPieces.id_delivery)
         ).all()
+        return [dict(zip(DeliveryService.CLAVES, fila)) for fila in filas]
+    
+    @staticmethod
+    def reconcile_group(db: Session, id_group: str, items: List[DeliveredPiecesGroupItem],
+                        modified_by: str = None):
+        """
+        Reemplazar las entregas activas de un grupo por la lista deseada.
+
+        Compara la lista con las filas guardadas y, en la transacción del
+        request, inserta las filas sin id_delivery, actualiza solo las que
+        cambiaron y marca como inactivas las que ya no están, con una sentencia
+        por tipo de cambio. La fecha y el usuario de auditoría son los mismos
+        para todas las filas modificadas.
+
+        Returns:
+            dict | None: Conteo de cambios y entregas activas del grupo,
+                         o None si el grupo no existe
+
+        Raises:
+            ValueError: Si la lista está vacía o referencia entregas de otro grupo
+        """
+        if not items:
+            raise ValueError("El grupo debe tener al menos una entrega")
+
+        campos = [campo for campo in DeliveredPiecesUpdate.model_fields if campo != 'modified_by']
+
+        # Se bloquean las filas del grupo para que dos ediciones no se mezclen
+        guardadas = {
+            fila.id_delivery: fila
+            for fila in db.execute(
+                select(DeliveredPieces.id_delivery, *[getattr(DeliveredPieces, campo) for campo in campos])
+                .where(DeliveredPieces.id_group == id_group, DeliveredPieces.status == 'active')
+                .with_for_update()
+            ).all()
+        }
+        if not guardadas:
+            return None
+
+        ids = [item.id_delivery for item in items if item.id_delivery is not None]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Hay entregas repetidas en la lista")
+        ajenas = set(ids) - guardadas.keys()
+        if ajenas:
+            raise ValueError(f"Las entregas {sorted(ajenas)} no pertenecen al grupo activo {id_group}")
+
+        usuario = modified_by or next((item.modified_by for item in items if item.modified_by), None) or 'system'
+        auditoria = {'modification_date': DeliveryService.get_bogota_time(), 'modified_by': usuario}
+
+        nuevas = []
+        cambios = []
+        for item in items:
+            valores = item.model_dump(include=set(campos))
+            if item.id_delivery is None:
+                nuevas.append({**valores, **auditoria, 'id_group': id_group, 'status': 'active'})
+                continue
+            guardada = guardadas[item.id_delivery]
+            if any(getattr(guardada, campo) != valor for campo, valor in valores.items()):
+                cambios.append({**valores, **auditoria, 'id_delivery': item.id_delivery})
+        eliminadas = sorted(guardadas.keys() - set(ids))
+
+        if nuevas:
+            db.execute(insert(DeliveredPieces), nuevas)
+        if cambios:
+            # UPDATE por llave primaria en lote (executemany)
+            db.execute(update(DeliveredPieces), cambios)
+        if eliminadas:
+            db.execute(
+                update(DeliveredPieces)
+                .where(DeliveredPieces.id_delivery.in_(eliminadas))
+                .values(status='inactive', **auditoria)
+                .execution_options(synchronize_session=False)
+            )
+        DeliveryGroups.recalcular(db, [id_group])
+
+        return {
+            "id_group": id_group,
+            "creadas": len(nuevas),
+            "actualizadas": len(cambios),
+            "eliminadas": len(eliminadas),
+            "deliveries": DeliveryService.get_deliveries_by_group(db, id_group)
+        }
     
     @staticmethod
     def get_delivery_by_id(db: Session, delivery_id: int) -> DeliveredPieces:
@@ -79,7 +365,8 @@ class DeliveryService:
             
             for field, value in update_data.items():
                 setattr(db_delivery, field, value)
-            db.commit()
+            db.flush()
+            DeliveryGroups.recalcular(db, [db_delivery.id_group])
             db.refresh(db_delivery)
         return db_delivery
     
@@ -91,6 +378,7 @@ class DeliveryService:
             db_delivery.status = 'inactive'
             db_delivery.modification_date = DeliveryService.get_bogota_time()
             db_delivery.modified_by = modified_by or 'system'
-            db.commit()
+            db.flush()
+            DeliveryGroups.recalcular(db, [db_delivery.id_group])
             return True
         return False
@@ -23,7 +23,7 @@ class FactoryService:
                 document=factory_data.document if hasattr(factory_data, 'document') else None
             )
             db.add(new_factory)
-            db.commit()
+            db.flush()
             db.refresh(new_factory)
             return new_factory
         except Exception as e:
@@ -47,7 +47,7 @@ class FactoryService:
             if not factory:
                 return False
             db.delete(factory)
-            db.commit()
+            db.flush()
             return True
         except Exception as e:
             db.rollback()
@@ -64,7 +64,7 @@ class FactoryService:
                 factory.owner = factory_data.owner
             if hasattr(factory_data, 'document') and factory_data.document is not None:
                 factory.document = factory_data.document
-            db.commit()
+            db.flush()
             db.refresh(factory)
             return factory
         except Exception as e:
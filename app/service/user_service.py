@@ -1,3 +1,4 @@
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.db.models.user_model import User
@@ -8,6 +9,9 @@ from typing import Optional, List, Dict, Any
 
 class UserService:
     """Servicio para gestionar operaciones de usuarios"""
+
+    # Columnas de los listados (UserResponse): nunca se lee psw
+    COLUMNAS_LISTA = (User.id_user, User.username, User.rol, User.estado)
     
     @staticmethod
     def crear_usuario(db: Session, user_data: UserCreate) -> Dict[str, Any]:
@@ -27,7 +31,7 @@ class UserService:
                 nuevo_usuario.email = user_data.email
             
             db.add(nuevo_usuario)
-            db.commit()
+            db.flush()
             db.refresh(nuevo_usuario)
             
             return {
@@ -62,18 +66,18 @@ class UserService:
         return db.query(User).filter(User.username == username).first()
     
     @staticmethod
-    def obtener_todos_usuarios(db: Session) -> List[User]:
+    def obtener_todos_usuarios(db: Session) -> List[Row]:
         """
-        Obtiene todos los usuarios
+        Obtiene todos los usuarios (filas con las columnas de UserResponse)
         """
-        return db.query(User).all()
+        return db.execute(select(*UserService.COLUMNAS_LISTA)).all()
     
     @staticmethod
-    def obtener_usuarios_activos(db: Session) -> List[User]:
+    def obtener_usuarios_activos(db: Session) -> List[Row]:
         """
-        Obtiene todos los usuarios activos
+        Obtiene todos los usuarios activos (filas con las columnas de UserResponse)
         """
-        return db.query(User).filter(User.estado == '1').all()
+        return db.execute(select(*UserService.COLUMNAS_LISTA).where(User.estado == 1)).all()
     
     @staticmethod
     def actualizar_usuario(db: Session, usuario_id: int, user_data: UserUpdate) -> Dict[str, Any]:
@@ -100,7 +104,7 @@ class UserService:
                 usuario.estado = user_data.estado
 
             
-            db.commit()
+            db.flush()
             db.refresh(usuario)
             
             return {
@@ -134,9 +138,9 @@ class UserService:
                     "error": "Usuario no encontrado"
                 }
             
-            # Cambiar estado a inactivo en lugar de eliminar
-            usuario.estado = 'inactivo'
-            db.commit()
+            # Cambiar estado a inactivo (0) en lugar de eliminar
+            usuario.estado = 0
+            db.flush()
             
             return {
                 "success": True,
@@ -156,7 +160,7 @@ class UserService:
         """
         usuario = db.query(User).filter(
             User.username == user_data.username,
-            User.estado == 'activo'
+            User.estado == 1
         ).first()
         
         if not usuario:
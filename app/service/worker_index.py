@@ -0,0 +1,89 @@
+"""
+Índice en memoria de trabajadores para la marcación por código de barras.
+
+La nómina es pequeña y cambia poco: se carga al iniciar, se invalida cuando
+WorkerService modifica un trabajador y se recarga por TTL como red de
+seguridad (cada worker de uvicorn tiene su propia copia).
+"""
+
+import os
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from app.db.models.worker_model import Worker
+
+
+class WorkerRecord(NamedTuple):
+    """Datos mínimos del trabajador para registrar asistencia"""
+    id: int
+    nombre: str
+    apellido: str
+    reference_id: Optional[str]
+
+
+_COLUMNAS = (Worker.id, Worker.nombre, Worker.apellido, Worker.reference_id)
+
+
+class WorkerIndex:
+    """Índice reference_id / id -> WorkerRecord compartido por el proceso"""
+
+    TTL_SECONDS = int(os.getenv("WORKER_INDEX_TTL", "300"))
+
+    _por_reference = {}
+    _por_id = {}
+    _cargado_en = None
+
+    @staticmethod
+    def cargar(db):
+        """Carga (o recarga) el índice completo desde la base de datos"""
+        por_reference = {}
+        por_id = {}
+        for fila in db.execute(select(*_COLUMNAS).order_by(Worker.id)):
+            registro = WorkerRecord(*fila)
+            por_id[registro.id] = registro
+            if registro.reference_id:
+                por_reference.setdefault(registro.reference_id, registro)
+
+        WorkerIndex._por_reference = por_reference
+        WorkerIndex._por_id = por_id
+        WorkerIndex._cargado_en = time.monotonic()
+
+    @staticmethod
+    def invalidar():
+        """Descarta el índice; se recarga en la siguiente consulta"""
+        WorkerIndex._cargado_en = None
+
+    @staticmethod
+    def _vigente(db):
+        cargado_en = WorkerIndex._cargado_en
+        if cargado_en is None or time.monotonic() - cargado_en > WorkerIndex.TTL_SECONDS:
+            WorkerIndex.cargar(db)
+
+    @staticmethod
+    def por_reference_id(db, reference_id: str) -> Optional[WorkerRecord]:
+        """Busca un trabajador por su código de barras"""
+        WorkerIndex._vigente(db)
+        registro = WorkerIndex._por_reference.get(reference_id)
+        if registro is None:
+            # Puede ser un trabajador creado desde otro proceso
+            fila = db.execute(
+                select(*_COLUMNAS).where(Worker.reference_id == reference_id).order_by(Worker.id).limit(1)
+            ).first()
+            if fila is not None:
+                registro = WorkerRecord(*fila)
+                WorkerIndex._por_reference[reference_id] = registro
+                WorkerIndex._por_id[registro.id] = registro
+        return registro
+
+    @staticmethod
+    def por_id(db, worker_id: int) -> Optional[WorkerRecord]:
+        """Busca un trabajador por su ID"""
+        WorkerIndex._vigente(db)
+        registro = WorkerIndex._por_id.get(worker_id)
+        if registro is None:
+            fila = db.execute(select(*_COLUMNAS).where(Worker.id == worker_id)).first()
+            if fila is not None:
+                registro = WorkerRecord(*fila)
+                WorkerIndex._por_id[worker_id] = registro
+        return registro
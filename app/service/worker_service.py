@@ -1,12 +1,22 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.db.models.worker_model import Worker
+from app.db.events import on_commit
+from app.service.worker_index import WorkerIndex
+from app.service.cost_engine import CostEngine
 from app.api.schemas.worker_schema import WorkerCreate, WorkerUpdate
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any
 
 
 class WorkerService:
     """Servicio para gestionar operaciones de trabajadores"""
+
+    # Columnas del listado de trabajadores (WorkerListResponse)
+    COLUMNAS_LISTA = (
+        Worker.id, Worker.nombre, Worker.apellido, Worker.cedula, Worker.cargo,
+        Worker.salario, Worker.email, Worker.telefono, Worker.activo
+    )
     
     @staticmethod
     def crear_trabajador(db: Session, worker_data: WorkerCreate) -> Dict[str, Any]:
@@ -25,8 +35,10 @@ class WorkerService:
             )
             
             db.add(nuevo_trabajador)
-            db.commit()
+            db.flush()
             db.refresh(nuevo_trabajador)
+            on_commit(db, WorkerIndex.invalidar)
+            on_commit(db, CostEngine.invalidar)
             
             return {
                 "success": True,
@@ -69,10 +81,14 @@ class WorkerService:
     @staticmethod
     def obtener_lista_trabajadores(db: Session) -> Dict[str, Any]:
         """
-        Obtiene la lista de todos los trabajadores activos
+        Obtiene la lista de todos los trabajadores activos.
+        Cada trabajador es una fila (tupla con nombres) con las columnas de
+        WorkerListResponse, sin entidades del ORM.
         """
         try:
-            trabajadores = db.query(Worker).filter(Worker.activo == True).all()
+            trabajadores = db.execute(
+                select(*WorkerService.COLUMNAS_LISTA).where(Worker.activo == True)
+            ).all()
             
             return {
                 "success": True,
@@ -110,8 +126,10 @@ class WorkerService:
                     else:
                         setattr(trabajador, field, value)
             
-            db.commit()
+            db.flush()
             db.refresh(trabajador)
+            on_commit(db, WorkerIndex.invalidar)
+            on_commit(db, CostEngine.invalidar)
             
             return {
                 "success": True,
@@ -148,7 +166,9 @@ class WorkerService:
                 }
             
             trabajador.activo = False
-            db.commit()
+            db.flush()
+            on_commit(db, WorkerIndex.invalidar)
+            on_commit(db, CostEngine.invalidar)
             
             return {
                 "success": True,
@@ -0,0 +1,31 @@
+"""
+Cursores opacos para paginación por keyset.
+
+El cursor es la última clave ordenada de la página (p. ej. fecha e id)
+serializada en JSON y codificada en base64 apta para URL.
+"""
+
+import base64
+import json
+
+
+def codificar_cursor(*valores) -> str:
+    """Codifica la clave de la última fila; fechas en formato ISO"""
+    datos = [v.isoformat() if hasattr(v, "isoformat") else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> list:
+    """
+    Decodifica un cursor con `cantidad` valores.
+    Lanza ValueError si el cursor no es válido.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(datos, list) or len(datos) != cantidad:
+        raise ValueError("Cursor inválido")
+    return datos
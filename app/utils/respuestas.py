@@ -0,0 +1,16 @@
+"""
+Respuesta JSON serializada con orjson.
+
+Para listados que ya vienen como dicts desde un select() de Core: el
+endpoint devuelve la respuesta directamente, sin jsonable_encoder ni
+response_model. orjson escribe date y datetime en ISO 8601, igual que
+jsonable_encoder, así que el JSON no cambia.
+"""
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class RespuestaOrjson(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
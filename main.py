@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
@@ -12,8 +13,34 @@ from app.api.auth_endpoints import router as auth_router
 from app.api.user_endpoints import router as user_router
 from app.api.admin_endpoints import router as admin_router
 from app.api.endpoints import router
+from app.db.connection import AsyncSessionLocal, async_engine
+from app.db.partitions import asegurar_particiones
+from app.service.worker_index import WorkerIndex
+import logging
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precargar el índice de trabajadores para la marcación por código
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(WorkerIndex.cargar)
+    except Exception as e:
+        logger.warning(f"No se pudo precargar el índice de trabajadores: {str(e)}")
+    # Crear las particiones mensuales de asistencia que falten
+    try:
+        async with async_engine.begin() as conn:
+            creadas = await conn.run_sync(asegurar_particiones)
+        if creadas:
+            logger.info(f"Particiones de asistencia creadas: {', '.join(creadas)}")
+    except Exception as e:
+        logger.warning(f"No se pudieron crear las particiones de asistencia: {str(e)}")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configurar templates
 templates = Jinja2Templates(directory="app/templates")
@@ -0,0 +1,185 @@
+"""
+Comandos de mantenimiento de la aplicación.
+
+Uso:
+    python manage.py upgrade [revision]      # aplica migraciones (por defecto: head)
+    python manage.py downgrade <revision>    # revierte hasta la revisión indicada
+    python manage.py stamp <revision>        # marca la revisión sin ejecutarla
+    python manage.py current                 # muestra la revisión actual
+    python manage.py history                 # lista las revisiones
+    python manage.py rebuild-resumen-mensual [--desde YYYY-MM] [--hasta YYYY-MM]
+                                             # recalcula el resumen mensual de horas
+    python manage.py create-partitions [--meses N]   # crea las particiones mensuales de asistencia
+    python manage.py archive-partitions --antes-de YYYY-MM [--eliminar]
+                                             # desacopla (archiva o borra) particiones viejas
+    python manage.py import-deliveries <archivo.csv> [--usuario NOMBRE]
+                                             # importa entregas desde un CSV
+    python manage.py rebuild-delivery-groups # recalcula los encabezados de grupos de entregas
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from alembic import command
+from alembic.config import Config
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_alembic_config():
+    """Configuración de Alembic apuntando al alembic.ini del proyecto"""
+    return Config(os.path.join(BASE_DIR, "alembic.ini"))
+
+
+def cmd_upgrade(args):
+    command.upgrade(get_alembic_config(), args.revision, sql=args.sql)
+
+
+def cmd_downgrade(args):
+    command.downgrade(get_alembic_config(), args.revision, sql=args.sql)
+
+
+def cmd_stamp(args):
+    command.stamp(get_alembic_config(), args.revision)
+
+
+def cmd_current(args):
+    command.current(get_alembic_config(), verbose=True)
+
+
+def cmd_history(args):
+    command.history(get_alembic_config(), verbose=True)
+
+
+def _mes(valor):
+    """Argumento YYYY-MM -> primer día del mes"""
+    try:
+        return datetime.strptime(valor, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Mes inválido: {valor} (formato YYYY-MM)")
+
+
+def cmd_rebuild_resumen_mensual(args):
+    from app.db.connection import SessionLocal
+    from app.service.attendance_rollup import AttendanceRollup
+
+    with SessionLocal() as db:
+        filas = AttendanceRollup.reconstruir(db, args.desde, args.hasta)
+        db.commit()
+    print(f"Resumen mensual reconstruido: {filas} filas")
+
+
+def cmd_create_partitions(args):
+    from app.db.connection import engine
+    from app.db.partitions import asegurar_particiones, es_particionada
+
+    with engine.begin() as conn:
+        if not es_particionada(conn):
+            print("La tabla assistence no está particionada (solo PostgreSQL)")
+            return
+        creadas = asegurar_particiones(conn, meses_adelante=args.meses)
+    print(f"Particiones creadas: {', '.join(creadas) if creadas else 'ninguna'}")
+
+
+def cmd_archive_partitions(args):
+    from app.db.connection import engine
+    from app.db.partitions import archivar_particiones, es_particionada, ESQUEMA_ARCHIVO
+
+    with engine.begin() as conn:
+        if not es_particionada(conn):
+            print("La tabla assistence no está particionada (solo PostgreSQL)")
+            return
+        procesadas = archivar_particiones(conn, args.antes_de, eliminar=args.eliminar)
+
+    destino = "eliminadas" if args.eliminar else f"movidas al esquema {ESQUEMA_ARCHIVO}"
+    print(f"Particiones {destino}: {', '.join(procesadas) if procesadas else 'ninguna'}")
+
+
+def cmd_import_deliveries(args):
+    from app.db.connection import SessionLocal
+    from app.service.delivery_import import DeliveryImport
+
+    with open(args.archivo, encoding="utf-8-sig", newline="") as archivo, SessionLocal() as db:
+        reporte = DeliveryImport.importar(db, archivo, args.usuario)
+        db.commit()
+
+    for error in reporte["errores"]:
+        print(f"Línea {error['linea']}: {'; '.join(error['errores'])}")
+    print(f"Entregas importadas: {reporte['importadas']}, filas con errores: {reporte['con_errores']}")
+
+
+def cmd_rebuild_delivery_groups(args):
+    from app.db.connection import SessionLocal
+    from app.service.delivery_groups import DeliveryGroups
+
+    with SessionLocal() as db:
+        grupos = DeliveryGroups.reconstruir(db)
+        db.commit()
+    print(f"Grupos de entregas reconstruidos: {grupos}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    upgrade = subparsers.add_parser("upgrade", help="Aplica migraciones")
+    upgrade.add_argument("revision", nargs="?", default="head")
+    upgrade.add_argument("--sql", action="store_true", help="Solo imprime el SQL")
+    upgrade.set_defaults(func=cmd_upgrade)
+
+    downgrade = subparsers.add_parser("downgrade", help="Revierte migraciones")
+    downgrade.add_argument("revision")
+    downgrade.add_argument("--sql", action="store_true", help="Solo imprime el SQL")
+    downgrade.set_defaults(func=cmd_downgrade)
+
+    stamp = subparsers.add_parser("stamp", help="Marca una revisión sin ejecutarla")
+    stamp.add_argument("revision")
+    stamp.set_defaults(func=cmd_stamp)
+
+    current = subparsers.add_parser("current", help="Muestra la revisión actual")
+    current.set_defaults(func=cmd_current)
+
+    history = subparsers.add_parser("history", help="Lista las revisiones")
+    history.set_defaults(func=cmd_history)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-resumen-mensual",
+        help="Recalcula el resumen mensual de horas desde las asistencias"
+    )
+    rebuild.add_argument("--desde", type=_mes, help="Primer mes (YYYY-MM); por defecto, el más antiguo no archivado")
+    rebuild.add_argument("--hasta", type=_mes, help="Último mes (YYYY-MM)")
+    rebuild.set_defaults(func=cmd_rebuild_resumen_mensual)
+
+    crear = subparsers.add_parser(
+        "create-partitions",
+        help="Crea las particiones mensuales de asistencia del mes actual y los siguientes"
+    )
+    crear.add_argument("--meses", type=int, default=None, help="Meses futuros a crear (por defecto 2)")
+    crear.set_defaults(func=cmd_create_partitions)
+
+    archivar = subparsers.add_parser(
+        "archive-partitions",
+        help="Desacopla las particiones de asistencia anteriores a un mes"
+    )
+    archivar.add_argument("--antes-de", dest="antes_de", type=_mes, required=True, help="Primer mes que se conserva (YYYY-MM)")
+    archivar.add_argument("--eliminar", action="store_true", help="Borrar las particiones en lugar de archivarlas")
+    archivar.set_defaults(func=cmd_archive_partitions)
+
+    importar = subparsers.add_parser("import-deliveries", help="Importa entregas desde un CSV")
+    importar.add_argument("archivo", help="Ruta del CSV (UTF-8, separado por comas o punto y coma)")
+    importar.add_argument("--usuario", default=None, help="Usuario registrado en la auditoría")
+    importar.set_defaults(func=cmd_import_deliveries)
+
+    grupos = subparsers.add_parser(
+        "rebuild-delivery-groups",
+        help="Recalcula la tabla delivery_groups desde las entregas"
+    )
+    grupos.set_defaults(func=cmd_rebuild_delivery_groups)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.func(args)
@@ -0,0 +1,41 @@
+"""
+Configuración compartida de las pruebas.
+
+Las pruebas corren contra la base de DB_URL (p. ej. una base PostgreSQL de
+pruebas) o, si no está definida, contra un SQLite temporal. DB_URL se fija
+antes de importar la aplicación porque app/db/connection.py lo lee al
+importarse. La base se lleva a la última migración una vez por sesión.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# main.py monta app/static y app/templates con rutas relativas
+os.chdir(RAIZ)
+
+if not os.getenv("DB_URL"):
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='pruebas_'), 'pruebas.db')}"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def base_de_datos():
+    """Aplica las migraciones y crea las particiones de asistencia (PostgreSQL)"""
+    from alembic import command
+    from alembic.config import Config
+    from app.db.connection import engine
+    from app.db.partitions import asegurar_particiones
+
+    command.upgrade(Config(os.path.join(RAIZ, "alembic.ini")), "head")
+    with engine.begin() as conn:
+        asegurar_particiones(conn)
+    yield engine
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
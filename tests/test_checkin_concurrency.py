@@ -0,0 +1,106 @@
+"""
+Marcaciones concurrentes del mismo trabajador:
+- varios escaneos de llegada simultáneos dejan una sola asistencia del día;
+  la primera respuesta marca la llegada y las demás informan que ya estaba
+  marcado.
+- varias salidas simultáneas de la misma asistencia la cierran una vez y
+  suman una sola jornada al resumen mensual.
+"""
+
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+import main
+from app.db.connection import SessionLocal, async_engine
+from app.db.models import Worker
+from app.db.models.assistence_model import Assistence
+from app.db.models.assistence_monthly_model import AssistenceMonthly
+from app.service.assistence_service import obtener_fecha_hora_bogota
+from app.service.worker_index import WorkerIndex
+
+ESCANEOS = 10
+
+
+@pytest.fixture
+def trabajador():
+    codigo = f"CONC-{uuid.uuid4().hex[:12]}"
+    with SessionLocal() as db:
+        worker_id = db.execute(
+            insert(Worker).returning(Worker.id),
+            {"nombre": "Concurrente", "apellido": "Prueba", "cedula": codigo, "cargo": "operaria",
+             "salario": 50000, "activo": True, "reference_id": codigo}
+        ).scalar_one()
+        db.commit()
+    WorkerIndex.invalidar()
+    try:
+        yield worker_id, codigo
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(AssistenceMonthly).where(AssistenceMonthly.worker_id == worker_id))
+            db.execute(delete(Assistence).where(Assistence.worker_id == worker_id))
+            db.execute(delete(Worker).where(Worker.id == worker_id))
+            db.commit()
+        WorkerIndex.invalidar()
+
+
+async def _enviar_simultaneos(ruta: str, cuerpo: dict, veces: int) -> list:
+    """Envía `veces` POST iguales a la vez y devuelve las respuestas"""
+    transporte = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transporte, base_url="http://prueba") as cliente:
+            return await asyncio.gather(*[cliente.post(ruta, json=cuerpo) for _ in range(veces)])
+    finally:
+        # Las conexiones del pool asíncrono quedan atadas a este event loop
+        await async_engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_escaneos_simultaneos_marcan_una_sola_llegada(trabajador):
+    worker_id, codigo = trabajador
+    respuestas = await _enviar_simultaneos(
+        "/assistence/api/marcar-llegada-codigo", {"reference_id": codigo}, ESCANEOS
+    )
+
+    nuevas = [r for r in respuestas if r.status_code == 200]
+    repetidas = [r for r in respuestas if r.status_code == 400]
+    assert len(nuevas) == 1, [r.json() for r in respuestas]
+    assert nuevas[0].json()["success"] is True
+    assert len(repetidas) == ESCANEOS - 1
+    assert all("ya fue marcado hoy" in r.json()["error"] for r in repetidas), [r.json() for r in repetidas]
+
+    with SessionLocal() as db:
+        filas = db.execute(
+            select(func.count()).select_from(Assistence).where(
+                Assistence.attendance_date == obtener_fecha_hora_bogota().date(),
+                Assistence.worker_id == worker_id
+            )
+        ).scalar_one()
+    assert filas == 1
+
+
+@pytest.mark.anyio
+async def test_salidas_simultaneas_suman_una_sola_jornada(trabajador):
+    worker_id, codigo = trabajador
+    llegada = await _enviar_simultaneos("/assistence/api/marcar-llegada-codigo", {"reference_id": codigo}, 1)
+    assert llegada[0].status_code == 200, llegada[0].text
+    id_assistence = llegada[0].json()["data"]["id"]
+
+    respuestas = await _enviar_simultaneos(
+        "/assistence/api/marcar-salida", {"id_assistence": id_assistence}, ESCANEOS
+    )
+
+    cerradas = [r for r in respuestas if r.status_code == 200]
+    repetidas = [r for r in respuestas if r.status_code == 400]
+    assert len(cerradas) == 1, [r.json() for r in respuestas]
+    assert len(repetidas) == ESCANEOS - 1
+    assert all("ya tiene hora de salida" in r.json()["error"] for r in repetidas), [r.json() for r in repetidas]
+
+    with SessionLocal() as db:
+        dias = db.execute(
+            select(AssistenceMonthly.dias).where(AssistenceMonthly.worker_id == worker_id)
+        ).scalars().all()
+    assert dias == [1]
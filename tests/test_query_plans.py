@@ -0,0 +1,256 @@
+"""
+Planes de las consultas calientes: cada una debe recorrer el índice creado
+para ella y no la tabla completa.
+
+Los datos se siembran en una transacción que se revierte al final. En
+PostgreSQL se desactiva enable_seqscan dentro de esa transacción: con pocas
+filas el planificador puede preferir un Seq Scan aunque el índice sirva, y
+la prueba busca índices que no sirven para la consulta, no costos.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+
+from app.api.schemas.user_schema import UserLogin
+from app.db.models import Factory, User, Worker
+from app.db.models.assistence_model import Assistence
+from app.db.models.delivery_models import DeliveredPieces
+from app.db.partitions import asegurar_particiones
+from app.service.assistence_service import (
+    obtener_asistencias_hoy, obtener_historial_asistencias, obtener_fecha_hora_bogota
+)
+from app.service.delivery_groups import DeliveryGroups
+from app.service.delivery_service import DeliveryService
+from app.service.user_service import UserService
+from app.service.worker_index import WorkerIndex
+from app.service.worker_service import WorkerService
+
+TRABAJADORES = 200
+TALLERES = 200
+USUARIOS = 200
+DIAS = 40
+ENTREGAS = 6000
+
+
+@pytest.fixture(scope="module")
+def conexion(base_de_datos):
+    with base_de_datos.connect() as conn:
+        transaccion = conn.begin()
+        hoy = obtener_fecha_hora_bogota().date()
+        primer_dia = hoy - timedelta(days=DIAS - 1)
+        asegurar_particiones(conn, desde=primer_dia)
+
+        ids = conn.execute(
+            insert(Worker).returning(Worker.id),
+            [
+                {"nombre": f"Plan{i}", "apellido": "Prueba", "cedula": f"plan-{i}", "cargo": "operaria",
+                 "salario": 50000, "activo": True, "reference_id": f"PLAN{i}"}
+                for i in range(TRABAJADORES)
+            ]
+        ).scalars().all()
+        filas = []
+        for dia in range(DIAS):
+            fecha = primer_dia + timedelta(days=dia)
+            for n, worker_id in enumerate(ids):
+                llegada = datetime.combine(fecha, time(6, 30)) + timedelta(seconds=n)
+                filas.append({
+                    "worker": f"Plan{n}", "worker_id": worker_id, "attendance_date": fecha,
+                    "arrival_time": llegada, "departure_time": llegada + timedelta(hours=8)
+                })
+        conn.execute(insert(Assistence), filas)
+
+        conn.execute(insert(DeliveredPieces), [
+            {"owner": f"Taller {i % 20}", "date": primer_dia + timedelta(days=i % DIAS),
+             "lot": f"L-{i % 300}", "id_group": f"plan-{i // 3}", "status": "active", "sz2": 1}
+            for i in range(ENTREGAS)
+        ])
+        conn.execute(insert(Factory), [
+            {"owner": f"Taller {i}", "document": f"plan-doc-{i}"} for i in range(TALLERES)
+        ])
+        conn.execute(insert(User), [
+            {"username": f"plan_{i}", "psw": f"clave-{i}", "rol": "admin", "estado": i % 2}
+            for i in range(USUARIOS)
+        ])
+        with Session(bind=conn) as db:
+            DeliveryGroups.reconstruir(db)
+            db.flush()
+
+        conn.execute(text("ANALYZE"))
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        try:
+            yield conn
+        finally:
+            transaccion.rollback()
+
+
+@contextmanager
+def _capturar(conn):
+    """Sentencias (SQL y parámetros del driver) ejecutadas en la conexión"""
+    sentencias = []
+
+    def anotar(conn, cursor, sentencia, parametros, contexto, executemany):
+        sentencias.append((sentencia, parametros))
+
+    event.listen(conn, "before_cursor_execute", anotar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(conn, "before_cursor_execute", anotar)
+
+
+def _plan(conn, sentencia, parametros) -> str:
+    if conn.dialect.name == "sqlite":
+        filas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sentencia}", parametros)
+        return "\n".join(fila[-1] for fila in filas)
+    filas = conn.exec_driver_sql(f"EXPLAIN {sentencia}", parametros)
+    return "\n".join(fila[0] for fila in filas)
+
+
+def _planes(conn, consulta, tabla: str) -> list:
+    """Ejecuta `consulta(db)` y devuelve los planes de sus SELECT sobre `tabla`"""
+    with _capturar(conn) as sentencias, Session(bind=conn) as db:
+        consulta(db)
+    planes = [
+        _plan(conn, sentencia, parametros)
+        for sentencia, parametros in sentencias
+        if sentencia.lstrip().upper().startswith("SELECT") and tabla in sentencia
+    ]
+    assert planes, f"La consulta no leyó {tabla}"
+    return planes
+
+
+def _usa_indice(conn, plan: str, indice: str, columnas: str) -> bool:
+    """
+    En PostgreSQL cada partición de assistence tiene su copia del índice,
+    nombrada por PostgreSQL con sus columnas; se busca esa parte del nombre.
+    """
+    if conn.dialect.name == "sqlite":
+        return indice in plan
+    return indice in plan or columnas in plan
+
+
+def _sin_recorrido_completo(conn, plan: str, tabla: str) -> bool:
+    if conn.dialect.name == "sqlite":
+        # "SCAN tabla" sin índice es el recorrido de toda la tabla
+        return not any(
+            linea.startswith(f"SCAN {tabla}") and "INDEX" not in linea
+            for linea in plan.splitlines()
+        )
+    return "Seq Scan" not in plan
+
+
+def test_asistencias_de_hoy_usan_el_indice_de_fecha(conexion):
+    def hoy(db):
+        resultado = obtener_asistencias_hoy(db)
+        assert resultado["success"] and resultado["total"] == TRABAJADORES, resultado
+
+    for plan in _planes(conexion, hoy, "assistence"):
+        assert _usa_indice(conexion, plan, "uq_assistence_attendance_date_worker_id", "attendance_date_worker_id"), plan
+        assert _sin_recorrido_completo(conexion, plan, "assistence"), plan
+
+
+def test_historial_usa_el_indice_de_llegada(conexion):
+    hoy = obtener_fecha_hora_bogota().date()
+
+    def historial(db):
+        resultado = obtener_historial_asistencias(db, hoy - timedelta(days=10), hoy, limite=100)
+        assert resultado["success"] and resultado["next_cursor"], resultado
+        obtener_historial_asistencias(db, hoy - timedelta(days=10), hoy, cursor=resultado["next_cursor"])
+
+    for plan in _planes(conexion, historial, "assistence"):
+        assert _usa_indice(conexion, plan, "ix_assistence_arrival_time_id", "arrival_time_id"), plan
+        assert _sin_recorrido_completo(conexion, plan, "assistence"), plan
+
+
+def test_historial_de_un_trabajador_usa_su_indice(conexion):
+    hoy = obtener_fecha_hora_bogota().date()
+    worker_id = conexion.execute(text("SELECT min(worker_id) FROM assistence")).scalar()
+
+    def historial(db):
+        resultado = obtener_historial_asistencias(db, hoy - timedelta(days=30), hoy, worker_id=worker_id)
+        assert resultado["success"] and resultado["data"], resultado
+
+    for plan in _planes(conexion, historial, "assistence"):
+        assert _usa_indice(conexion, plan, "ix_assistence_worker_id_arrival_time", "worker_id_arrival_time"), plan
+        assert _sin_recorrido_completo(conexion, plan, "assistence"), plan
+
+
+@pytest.mark.parametrize("orden, indice", [
+    ("fecha-desc", "ix_delivery_groups_active_date"),
+    ("responsable-asc", "ix_delivery_groups_active_owner_date"),
+    ("lote-asc", "ix_delivery_groups_active_lot_orden"),
+    ("total-desc", "ix_delivery_groups_active_total"),
+])
+def test_listado_de_grupos_usa_el_indice_del_orden(conexion, orden, indice):
+    def listado(db):
+        grupos, siguiente = DeliveryService.get_deliveries_one_per_group(db, orden=orden, limite=50)
+        assert len(grupos) == 50 and siguiente
+        DeliveryService.get_deliveries_one_per_group(db, orden=orden, cursor=siguiente, limite=50)
+
+    for plan in _planes(conexion, listado, "delivery_groups"):
+        assert indice in plan, plan
+        assert _sin_recorrido_completo(conexion, plan, "delivery_groups"), plan
+        assert _sin_recorrido_completo(conexion, plan, "delivered_pieces"), plan
+
+
+def test_entregas_de_un_grupo_usan_el_indice_de_grupo(conexion):
+    def detalle(db):
+        assert DeliveryService.get_deliveries_by_group(db, "plan-7")
+
+    for plan in _planes(conexion, detalle, "delivered_pieces"):
+        assert "ix_delivered_pieces_active_group" in plan, plan
+        assert _sin_recorrido_completo(conexion, plan, "delivered_pieces"), plan
+
+
+def test_codigo_desconocido_busca_por_el_indice_de_reference_id(conexion):
+    with Session(bind=conexion) as db:
+        WorkerIndex.cargar(db)
+
+    def escaneo(db):
+        # Fallo del índice en memoria: se consulta la base por el código
+        assert WorkerIndex.por_reference_id(db, "PLAN-DESCONOCIDO") is None
+
+    try:
+        for plan in _planes(conexion, escaneo, "workers"):
+            assert "ix_workers_reference_id" in plan, plan
+            assert _sin_recorrido_completo(conexion, plan, "workers"), plan
+    finally:
+        WorkerIndex.invalidar()
+
+
+def test_trabajador_activo_se_busca_por_llave_primaria(conexion):
+    worker_id = conexion.execute(text("SELECT min(id) FROM workers WHERE cedula = 'plan-7'")).scalar()
+
+    def trabajador(db):
+        assert WorkerService.obtener_trabajador(db, worker_id)["success"]
+
+    for plan in _planes(conexion, trabajador, "workers"):
+        assert _usa_indice(conexion, plan, "INTEGER PRIMARY KEY", "workers_pkey"), plan
+        assert _sin_recorrido_completo(conexion, plan, "workers"), plan
+
+
+def test_login_de_taller_usa_el_indice_de_documento(conexion):
+    def login(db):
+        assert UserService.verificar_taller_por_documento(db, "plan-doc-7")["success"]
+
+    for plan in _planes(conexion, login, "factories"):
+        assert "ix_factories_document" in plan, plan
+        assert _sin_recorrido_completo(conexion, plan, "factories"), plan
+
+
+def test_login_de_usuario_usa_un_indice_de_usuario(conexion):
+    def login(db):
+        assert UserService.verificar_credenciales(db, UserLogin(username="plan_7", psw="clave-7"))["success"]
+        assert not UserService.verificar_credenciales(db, UserLogin(username="plan_8", psw="clave-8"))["success"]
+
+    # username es único: SQLite resuelve el login con el índice de la
+    # restricción, PostgreSQL con (username, estado); ambos leen una fila
+    indices = ("ix_users_username_estado", "sqlite_autoindex_users_1", "users_username_key")
+    for plan in _planes(conexion, login, "users"):
+        assert any(indice in plan for indice in indices), plan
+        assert _sin_recorrido_completo(conexion, plan, "users"), plan